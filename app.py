@@ -1,26 +1,33 @@
 import sys
+import startup_profile
+# Start timing before the heavy imports below when profiling startup
+if '--profile-startup' in sys.argv:
+    startup_profile.enable()
 import os
+import re
 import time
+import queue
+import threading
+from collections import deque
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QTabWidget, QVBoxLayout, QWidget,
     QLabel, QPushButton, QHBoxLayout, QFileDialog, QMessageBox,
     QStatusBar, QLineEdit, QComboBox, QCheckBox, QMenu, QMenuBar,
     QDialog, QDialogButtonBox, QSplitter, QProgressBar, QScrollBar, QTextEdit,
-    QFrame
+    QFrame, QInputDialog
 )
 from PyQt6.QtCore import Qt, QTimer, QSettings, QRect, QSize, QThread, pyqtSignal
 from PyQt6.QtGui import QPixmap, QAction, QIcon, QKeySequence, QFont, QImage, QClipboard
-import mss
-import mss.tools
-import keyboard
-import numpy as np
-from PIL import Image
 
+# OCR, OpenCV and screen capture load on first use so the window paints without them
+from lazy_imports import lazy_import
+ocr_utils = lazy_import('ocr_utils')
+screen_capture = lazy_import('screen_capture')
+from ocr_models import engine_models_exist, OCR_ENGINES, DEFAULT_OCR_ENGINE
 # Import custom OCR modules
-from ocr_utils import OCRProcessor
 from ocr_ui import OCRResultsWidget, OCRImageViewer
 # Import custom item database modules
-from item_database import ItemDatabase
+from item_database import ItemDatabase, LEXICON_MIN_SCORE
 from item_ui import RecentlyLoggedWidget, ItemDatabaseWidget
 # Import tooltip overlay
 from tooltip_overlay import TooltipOverlay
@@ -28,129 +35,460 @@ from tooltip_overlay import TooltipOverlay
 from inventory_ui import InventoryWidget
 # Import ledger UI
 from ledger_ui import LedgerWidget
+# Import change notifications
+from change_bus import (ChangeBus, ITEM_CHANGES, LOG_APPENDED, LOG_CORRECTED,
+                        LEDGER_APPENDED, LEDGER_DELETED, CASH_CHANGED)
+# Import hotkey handling
+from hotkeys import (HotkeyManager, CAPTURE_AND_SELL, REPEAT_LAST,
+                     ACTION_LABELS, DEFAULT_BINDINGS)
 
 class ScreenCaptureThread(QThread):
-    capture_complete = pyqtSignal(object, object)  # Send both image and cursor position
+    """Captures the screen near the cursor when a hotkey fires
     
-    def __init__(self, parent=None):
+    Hotkey callbacks only queue a request, so the keyboard hook returns
+    immediately; the capture itself happens on this thread, which sleeps
+    until a request arrives instead of polling the keyboard.
+    """
+    capture_complete = pyqtSignal(object, object, object)  # BGRA frame, cursor position, capture info
+    hotkey_triggered = pyqtSignal(str, object)  # Non-capture hotkey action, cursor position
+    
+    # Default region, relative to the cursor; large enough for long item
+    # names, since auto-crop trims it to the tooltip before OCR
+    DEFAULT_WIDTH = 480
+    DEFAULT_HEIGHT = 160
+    DEFAULT_OFFSET_X = 0
+    DEFAULT_OFFSET_Y = 0
+    
+    def __init__(self, parent=None, bindings=None, hotkey_backend=None):
         super().__init__(parent)
         self.running = False
-        self.capture_width = 300
-        self.capture_height = 50
+        self.capture_width = self.DEFAULT_WIDTH
+        self.capture_height = self.DEFAULT_HEIGHT
+        self.offset_x = self.DEFAULT_OFFSET_X
+        self.offset_y = self.DEFAULT_OFFSET_Y
+        self.auto_crop = True  # Crop each capture to the tooltip's dark box
+        self.requests = queue.Queue()
+        self.hotkeys = HotkeyManager(self.request, bindings, hotkey_backend)
+        self.grabber = None  # Created by the first capture
+    
+    def request(self, action, pressed_at=None):
+        """Queue a hotkey action (called on the hotkey backend's thread)
+        
+        Args:
+            action: Hotkey action name
+            pressed_at: time.perf_counter() timestamp of the key press
+        """
+        if pressed_at is None:
+            pressed_at = time.perf_counter()
+        self.requests.put((action, pressed_at))
+    
+    def set_capture_region(self, width, height, offset_x=0, offset_y=0):
+        """Set the region captured around the cursor
         
+        Args:
+            width: Region width in pixels
+            height: Region height in pixels
+            offset_x: Horizontal offset of the region's left edge from the cursor
+            offset_y: Vertical offset of the region's top edge from the cursor
+        """
+        self.capture_width = max(1, width)
+        self.capture_height = max(1, height)
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+    
+    def set_auto_crop(self, enabled):
+        """Enable or disable cropping captures to the tooltip"""
+        self.auto_crop = enabled
+    
+    def get_cursor_position(self):
+        """Get the current mouse position"""
+        try:
+            import pyautogui
+            return pyautogui.position()
+        except ImportError:
+            # Fallback if pyautogui is not available
+            from ctypes import windll, Structure, c_long, byref
+            
+            class POINT(Structure):
+                _fields_ = [("x", c_long), ("y", c_long)]
+            
+            pt = POINT()
+            windll.user32.GetCursorPos(byref(pt))
+            return pt.x, pt.y
+    
     def run(self):
         self.running = True
+        try:
+            self.hotkeys.start()
+        except Exception as e:
+            print(f"Error registering hotkeys: {e}")
+        
         while self.running:
-            # Check for hotkey press
-            if keyboard.is_pressed('f7'):  # Changed hotkey to F7
-                # Get mouse position
-                try:
-                    import pyautogui
-                    mouse_x, mouse_y = pyautogui.position()
-                except ImportError:
-                    # Fallback if pyautogui is not available
-                    from ctypes import windll, Structure, c_long, byref
-                    
-                    class POINT(Structure):
-                        _fields_ = [("x", c_long), ("y", c_long)]
-                    
-                    pt = POINT()
-                    windll.user32.GetCursorPos(byref(pt))
-                    mouse_x, mouse_y = pt.x, pt.y
+            try:
+                action, pressed_at = self.requests.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if action is None:
+                break
+            
+            try:
+                mouse_x, mouse_y = self.get_cursor_position()
                 
-                # Define the capture region (to the bottom right of cursor)
-                region = {
-                    'left': mouse_x,
-                    'top': mouse_y,
-                    'width': self.capture_width,
-                    'height': self.capture_height
-                }
+                # Actions that do not need a new capture go straight to the UI
+                if action == REPEAT_LAST:
+                    self.hotkey_triggered.emit(action, (mouse_x, mouse_y))
+                    continue
                 
-                # Capture the screen
-                with mss.mss() as sct:
-                    screenshot = sct.grab(region)
-                    img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
-                    
-                    # Emit the captured image along with cursor position for the tooltip
-                    self.capture_complete.emit(img, (mouse_x, mouse_y))
+                # Capture the configured region next to the cursor
+                if self.grabber is None:
+                    self.grabber = screen_capture.ScreenGrabber()
+                img = self.grabber.grab(mouse_x + self.offset_x, mouse_y + self.offset_y,
+                                        self.capture_width, self.capture_height)
                 
-                # Sleep to prevent multiple captures from a single press
-                time.sleep(0.5)
-            
-            # Small sleep to reduce CPU usage
-            time.sleep(0.01)
+                hotkey_latency = time.perf_counter() - pressed_at
+                self.hotkeys.record_latency(hotkey_latency)
+                
+                # Trim the background around the tooltip so OCR sees fewer pixels
+                grab_pixels = img.shape[0] * img.shape[1]
+                crop_bounds = None
+                crop_start = time.perf_counter()
+                if self.auto_crop:
+                    img, crop_bounds = screen_capture.crop_to_tooltip(img)
+                crop_time = time.perf_counter() - crop_start
+                
+                # Emit the captured image along with cursor position for the tooltip
+                capture_info = {
+                    'action': action,
+                    'hotkey_latency': hotkey_latency,
+                    'grab_pixels': grab_pixels,
+                    'crop_bounds': crop_bounds,
+                    'crop_time': crop_time
+                }
+                self.capture_complete.emit(img, (mouse_x, mouse_y), capture_info)
+            except Exception as e:
+                print(f"Screen capture error: {e}")
+        
+        self.hotkeys.stop()
+        if self.grabber is not None:
+            self.grabber.close()
     
     def stop(self):
         self.running = False
+        self.requests.put((None, None))
+
+
+class CaptureQueue:
+    """Bounded, thread-safe queue of captures waiting for OCR
+    
+    Sits between the capture stage and the OCR worker. When the queue is
+    full (or when coalescing) older captures are discarded so rapid F7
+    presses never build up a backlog of stale work.
+    """
+    
+    DROP_OLDEST = 'drop_oldest'  # Keep the newest captures up to maxsize
+    COALESCE = 'coalesce'        # Keep only the most recent capture
+    
+    def __init__(self, maxsize=4, policy=DROP_OLDEST):
+        """Initialize the queue
+        
+        Args:
+            maxsize: Maximum number of queued captures
+            policy: Overflow policy (DROP_OLDEST or COALESCE)
+        """
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+    
+    def set_policy(self, policy):
+        """Set the overflow policy"""
+        with self._condition:
+            self.policy = policy
+    
+    def put(self, job):
+        """Add a capture job, discarding stale jobs according to the policy
+        
+        Returns:
+            Number of jobs that were discarded to make room
+        """
+        with self._condition:
+            limit = 1 if self.policy == self.COALESCE else self.maxsize
+            discarded = 0
+            while len(self._items) >= limit:
+                self._items.popleft()
+                discarded += 1
+            self._items.append(job)
+            self.dropped += discarded
+            self._condition.notify()
+            return discarded
+    
+    def get(self, timeout=None):
+        """Wait for the next job
+        
+        Returns:
+            The oldest queued job, or None on timeout or after close()
+        """
+        with self._condition:
+            if not self._items and not self._closed:
+                self._condition.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+    
+    def depth(self):
+        """Get the number of queued jobs"""
+        with self._condition:
+            return len(self._items)
+    
+    def close(self):
+        """Wake up any waiting consumer so it can exit"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
 
 
 class OCRThread(QThread):
-    """Thread for running OCR processing in the background"""
+    """Persistent worker that drains the capture queue and runs OCR and matching"""
     processing_complete = pyqtSignal(object, object)  # Results, stats
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.ocr_processor = OCRProcessor(use_gpu=False, check_models=True)  # CPU-only mode with model check
-        self.image = None
+        self.ocr_processor = None  # Shared CPU-only engine, imported by the first capture
+        self.fast_mode = True
+        self.engine = DEFAULT_OCR_ENGINE  # One of OCR_ENGINES
+        self.queue = CaptureQueue()
+        self.running = False
         self.preprocess = True  # Default to use preprocessing
+        self.capture_dir = None  # Folder captures are saved to for benchmarking (None to disable)
         self.item_db = None  # Reference to the item database
         self.match_threshold = 70  # Minimum score for matching
+        self.name_candidates = 2  # Lines of a capture sent to the matcher
+        self.lexicon_decoding = False  # Decode candidate lines straight to item names
+        self.lexicon_min_score = LEXICON_MIN_SCORE  # Decoded names below this fall back to matching
+    
+    def enqueue(self, image, cursor_pos=None, capture_info=None):
+        """Queue a captured image for OCR
+        
+        Args:
+            image: The captured image
+            cursor_pos: The cursor position at time of capture (x, y)
+            capture_info: Hotkey action and latency reported by the capture thread
+        
+        Returns:
+            Number of older captures discarded by the queue policy
+        """
+        job = {
+            'image': image,
+            'cursor_pos': cursor_pos,
+            'capture_info': capture_info or {},
+            'enqueued_at': time.perf_counter()
+        }
+        return self.queue.put(job)
     
-    def set_image(self, image):
-        """Set the image to process"""
-        self.image = image
+    def set_queue_policy(self, policy):
+        """Set the overflow policy used for rapid captures"""
+        self.queue.set_policy(policy)
     
     def set_preprocess(self, enabled):
         """Enable or disable preprocessing"""
         self.preprocess = enabled
     
+    def set_fast_mode(self, enabled):
+        """Enable or disable recognition without text detection"""
+        self.fast_mode = enabled
+        if self.ocr_processor is not None:
+            self.ocr_processor.set_fast_mode(enabled)
+    
+    def set_lexicon_decoding(self, enabled):
+        """Enable or disable decoding candidate lines against the item names"""
+        self.lexicon_decoding = enabled
+    
+    def set_engine(self, engine):
+        """Choose the OCR engine; it loads on the next capture if not loaded already"""
+        self.engine = engine
+        if self.ocr_processor is not None:
+            self.ocr_processor.set_engine(engine)
+    
+    def get_processor(self):
+        """Get the shared OCR processor, importing the OCR modules on first use"""
+        if self.ocr_processor is None:
+            processor = ocr_utils.get_ocr_processor(self.engine)
+            processor.set_engine(self.engine)
+            processor.set_fast_mode(self.fast_mode)
+            self.ocr_processor = processor
+        return self.ocr_processor
+    
+    def set_capture_dir(self, capture_dir):
+        """Save every capture to a folder (None to stop saving)"""
+        if capture_dir:
+            os.makedirs(capture_dir, exist_ok=True)
+        self.capture_dir = capture_dir
+    
     def set_item_database(self, item_db):
         """Set the item database reference"""
+        if self.item_db is not None:
+            self.item_db.remove_listener(self.on_items_changed)
         self.item_db = item_db
+        if item_db is not None:
+            item_db.add_listener(self.on_items_changed)
+    
+    def on_items_changed(self, change, item_names):
+        """Drop cached matches that an item database change made stale"""
+        if self.ocr_processor is None:
+            return  # Nothing has been captured, so nothing is cached
+        if change == 'added':
+            # A new item may now be the best match for any cached capture
+            self.ocr_processor.cache.invalidate_matches()
+        elif change in ('updated', 'renamed', 'deleted'):
+            self.ocr_processor.cache.invalidate_matches(item_names)
     
     def set_match_threshold(self, threshold):
         """Set the minimum match threshold"""
         self.match_threshold = threshold
     
     def run(self):
-        """Run OCR processing on the image"""
-        if self.image is None:
-            return
+        """Process queued captures until stop() is called"""
+        self.running = True
+        while self.running:
+            job = self.queue.get(timeout=0.5)
+            if job is None:
+                continue
+            
+            try:
+                formatted_results, stats = self.process_job(job)
+            except Exception as e:
+                print(f"OCR worker error: {e}")
+                formatted_results = []
+                stats = {'status': 'error', 'message': str(e)}
             
+            # Emit the results back to the UI thread
+            self.processing_complete.emit(formatted_results, stats)
+    
+    def stop(self):
+        """Stop the worker after the current capture"""
+        self.running = False
+        self.queue.close()
+    
+    def process_job(self, job):
+        """Run OCR and matching for a single queued capture
+        
+        Args:
+            job: Capture job created by enqueue()
+        
+        Returns:
+            Tuple of (formatted results, stats dictionary)
+        """
+        started_at = time.perf_counter()
+        queue_wait = started_at - job['enqueued_at']
+        
+        # Keep a copy of the capture for the OCR benchmark corpus
+        if self.capture_dir:
+            import cv2
+            file_name = time.strftime("capture_%Y%m%d_%H%M%S") + f"_{int(started_at * 1000) % 1000:03d}.png"
+            cv2.imwrite(os.path.join(self.capture_dir, file_name), job['image'])
+        
         # Process the image with or without preprocessing
-        results = self.ocr_processor.process_image(self.image, preprocess=self.preprocess)
-        stats = self.ocr_processor.get_processing_stats()
+        self.get_processor()
+        results = self.ocr_processor.process_image(job['image'], preprocess=self.preprocess)
+        ocr_done_at = time.perf_counter()
         
-        # Convert results to the expected format if needed
-        formatted_results = []
-        for result in results:
+        stats = dict(self.ocr_processor.get_processing_stats())
+        
+        # A repeated capture reuses its earlier matches unless items changed since
+        formatted_results = None
+        if self.item_db:
+            formatted_results = self.ocr_processor.get_cached_matches(self.match_threshold)
+        
+        cached = formatted_results is not None
+        if formatted_results is None:
+            # Convert results to the expected format if needed
             # Format depends on the OCR processor's output
             # Make sure we use consistent field names
-            formatted_result = {
+            formatted_results = [{
                 'ocr_text': result.get('text', ''),
                 'confidence': result.get('confidence', 0)
-            }
+            } for result in results]
             
-            # Try to match the OCR text against the database
+            # Only the lines laid out like an item name go to the matcher
             if self.item_db:
-                match_result = self.item_db.match_item(formatted_result['ocr_text'], min_score=self.match_threshold)
-                if match_result:
-                    formatted_result['matched_item'] = match_result['name']
-                    formatted_result['price'] = match_result.get('price', 0)
-                    formatted_result['match_score'] = match_result.get('match_score', 0)
+                candidates = ocr_utils.rank_tooltip_lines(results, self.name_candidates)
+                stats['candidates'] = len(candidates)
+                
+                # Decode straight to an item name, repairing the greedy text if that fails
+                decoder = self.ocr_processor.get_lexicon_decoder() if self.lexicon_decoding else None
+                
+                # Match and cache under the database lock, so an item edit lands either
+                # before matching or after the cached matches it invalidates
+                with self.item_db.lock:
+                    index, match_result = None, None
+                    if decoder is not None:
+                        index, match_result = self.item_db.decode_ranked(
+                            [results[i].get('char_probs') for i in candidates],
+                            decoder, min_score=max(self.match_threshold, self.lexicon_min_score)
+                        )
+                    stats['match_method'] = 'lexicon' if match_result else 'fuzzy'
+                    if match_result is None:
+                        index, match_result = self.item_db.match_ranked(
+                            [formatted_results[i]['ocr_text'] for i in candidates],
+                            min_score=self.match_threshold
+                        )
+                    if match_result:
+                        formatted_result = formatted_results[candidates[index]]
+                        formatted_result['matched_item'] = match_result['name']
+                        formatted_result['price'] = match_result.get('price', 0)
+                        formatted_result['match_score'] = match_result.get('match_score', 0)
                     
-                    # Log the successful match
-                    self.item_db.add_to_log(
-                        formatted_result['ocr_text'], 
-                        match_result['name'], 
-                        match_result.get('price', 0), 
-                        match_result.get('match_score', 0)
-                    )
-            
-            formatted_results.append(formatted_result)
-        
-        # Emit the results
-        self.processing_complete.emit(formatted_results, stats)
+                    self.ocr_processor.store_matches(formatted_results, self.match_threshold)
+        match_done_at = time.perf_counter()
+        
+        # Log the matched item name line with a single save
+        if self.item_db:
+            self.item_db.add_many_to_log([formatted_result for formatted_result in formatted_results
+                                          if formatted_result.get('matched_item')])
+        
+        finished_at = time.perf_counter()
+        
+        # Per-stage latency for this capture
+        stats['cursor_pos'] = job['cursor_pos']
+        stats['action'] = job['capture_info'].get('action')
+        stats['hotkey_latency'] = job['capture_info'].get('hotkey_latency', 0)
+        stats['queue_wait'] = queue_wait
+        stats['grab_pixels'] = job['capture_info'].get('grab_pixels', 0)
+        stats['crop_time'] = job['capture_info'].get('crop_time', 0)
+        stats['cropped'] = job['capture_info'].get('crop_bounds') is not None
+        stats['ocr_size'] = job['image'].shape[1::-1]
+        stats['ocr_pixels'] = job['image'].shape[0] * job['image'].shape[1]
+        stats['ocr_time'] = ocr_done_at - started_at
+        stats['match_time'] = match_done_at - ocr_done_at
+        stats['match_cached'] = cached
+        stats['lines'] = len(formatted_results)
+        stats.setdefault('candidates', 0)
+        stats.setdefault('match_method', 'cache' if cached else None)
+        stats['log_time'] = finished_at - match_done_at
+        stats['total_latency'] = finished_at - job['enqueued_at']
+        stats['queue_depth'] = self.queue.depth()
+        stats['dropped'] = self.queue.dropped
+        
+        return formatted_results, stats
+
+
+class EngineLoadThread(QThread):
+    """Thread for loading the shared OCR engine in the background"""
+    progress_update = pyqtSignal(str)
+    load_complete = pyqtSignal(bool)
+    
+    def __init__(self, engine=DEFAULT_OCR_ENGINE, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+    
+    def run(self):
+        """Load the OCR models unless they are already loaded"""
+        processor = ocr_utils.get_ocr_processor(self.engine)
+        processor.set_engine(self.engine)
+        success = processor.ensure_engine(callback=self.progress_update.emit)
+        self.load_complete.emit(success)
 
 
 class ModelDownloadThread(QThread):
@@ -379,11 +717,13 @@ class MainWindow(QMainWindow):
         self.match_threshold = 0  # Default match threshold - 0% to allow new matches
         self.logs = []
         
-        # Initialize OCR processor to check for models
-        self.ocr_processor = OCRProcessor(use_gpu=False, check_models=True)
+        self.settings = QSettings("ShopHelper", "ShopHelperv4")
+        self.ocr_engine = self.settings.value("ocr/engine", DEFAULT_OCR_ENGINE)
+        if self.ocr_engine not in OCR_ENGINES:
+            self.ocr_engine = DEFAULT_OCR_ENGINE
         
         # Check if models exist and show download dialog if needed
-        if not self.ocr_processor.models_exist:
+        if not engine_models_exist(self.ocr_engine):
             self.show_model_download_dialog()
         
         # Create central widget and layout
@@ -392,19 +732,30 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.central_widget)
         
         # Create matched item display frame in the top left
-        self.create_matched_item_display()
+        with startup_profile.section("Matched item display"):
+            self.create_matched_item_display()
         
         # Create the tab widget - only Database and Logs tabs
         self.tab_widget = QTabWidget()
         
         # Create item database before creating tabs
-        self.item_database = ItemDatabase()
+        self.storage = None
+        with startup_profile.section("Item database"):
+            if self.settings.value("storage/backend", "json") == "sqlite":
+                from sqlite_storage import SQLiteStorage
+                self.storage = SQLiteStorage()
+            self.item_database = ItemDatabase(storage=self.storage,
+                                              codec=self.settings.value("storage/codec", "json"))
         
         # Create Database and Logs tabs (removed Capture and OCR tabs)
-        self.create_database_tab()
-        self.create_log_tab()
-        self.create_inventory_tab()
-        self.create_ledger_tab()
+        with startup_profile.section("Database tab"):
+            self.create_database_tab()
+        with startup_profile.section("Log tab"):
+            self.create_log_tab()
+        with startup_profile.section("Inventory tab"):
+            self.create_inventory_tab()
+        with startup_profile.section("Ledger tab"):
+            self.create_ledger_tab()
         
         # Add tab widget to main layout
         self.main_layout.addWidget(self.tab_widget)
@@ -414,19 +765,29 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready - Press F7 to capture and identify items")
         
+        # Permanent OCR queue indicator
+        self.queue_label = QLabel("OCR queue: 0")
+        self.status_bar.addPermanentWidget(self.queue_label)
+        
         # Create menu bar
-        self.create_menu_bar()
+        with startup_profile.section("Menu bar"):
+            self.create_menu_bar()
         
         # Create tooltip overlay
-        self.tooltip_overlay = TooltipOverlay()
+        with startup_profile.section("Tooltip overlay"):
+            self.tooltip_overlay = TooltipOverlay()
         
-        # Create screen capture thread
-        self.capture_thread = ScreenCaptureThread()
+        # Create screen capture thread with the saved hotkey bindings
+        self.capture_thread = ScreenCaptureThread(bindings=self.get_hotkey_bindings())
+        self.capture_thread.set_capture_region(*self.get_capture_region())
+        self.capture_thread.set_auto_crop(self.auto_crop_action.isChecked())
         self.capture_thread.capture_complete.connect(self.process_screen_capture)
+        self.capture_thread.hotkey_triggered.connect(self.handle_hotkey_action)
         self.capture_thread.start()
         
         # Create OCR processing thread
         self.ocr_thread = OCRThread()
+        self.ocr_thread.set_engine(self.ocr_engine)
         self.ocr_thread.processing_complete.connect(self.handle_ocr_results)
         
         # Connect item database to OCR thread
@@ -435,8 +796,61 @@ class MainWindow(QMainWindow):
         # Set the match threshold
         self.ocr_thread.set_match_threshold(self.match_threshold)
         
+        # Start the persistent OCR worker
+        self.ocr_thread.start()
+        
+        # Deliver database and cash changes to the widgets that show them
+        self.change_bus = ChangeBus(parent=self)
+        self.item_database.add_listener(self.change_bus.post)
+        self.ledger_widget.cash_manager.add_listener(self.change_bus.post)
+        self.change_bus.subscribe(ITEM_CHANGES, self.database_widget.item_changed)
+        self.change_bus.subscribe(ITEM_CHANGES, self.refresh_inventory_rows)
+        self.change_bus.subscribe(ITEM_CHANGES, self.refresh_log_stock)
+        self.change_bus.subscribe(LOG_APPENDED, self.refresh_log_rows)
+        self.change_bus.subscribe(LOG_CORRECTED, self.update_log)
+        self.change_bus.subscribe(LEDGER_APPENDED, self.refresh_ledger_rows)
+        self.change_bus.subscribe(LEDGER_DELETED, self.update_ledger)
+        self.change_bus.subscribe(CASH_CHANGED, self.ledger_widget.cash_changed)
+        
         # Update database UI
-        self.update_database_ui()
+        with startup_profile.section("Initial data refresh"):
+            self.update_database_ui()
+        
+        # Load the OCR engine once the event loop is idle after the window appears
+        QTimer.singleShot(0, self.start_engine_loading)
+    
+    @property
+    def ocr_processor(self):
+        """Shared OCR processor, importing the OCR modules on first use"""
+        return ocr_utils.get_ocr_processor(self.ocr_engine)
+    
+    def start_engine_loading(self):
+        """Import the OCR modules and load the shared engine in the background"""
+        # The window is up; with --profile-startup, report before background loading starts
+        startup_profile.report()
+        
+        if not engine_models_exist(self.ocr_engine):
+            return
+        if (ocr_utils.loaded and self.ocr_processor.engine_loaded
+                and self.ocr_processor.engine_name == self.ocr_engine):
+            return
+        
+        self.engine_load_thread = EngineLoadThread(self.ocr_engine, self)
+        self.engine_load_thread.progress_update.connect(self.status_bar.showMessage)
+        self.engine_load_thread.load_complete.connect(self.engine_loading_finished)
+        self.engine_load_thread.start()
+    
+    def engine_loading_finished(self, success):
+        """Report when the OCR engine is ready"""
+        if success:
+            warmup_time = self.ocr_processor.warmup_time
+            warmup_note = f" (warmed up in {warmup_time:.1f}s)" if warmup_time is not None else ""
+            self.status_bar.showMessage(
+                f"OCR engine ready in {self.ocr_processor.engine_load_time:.1f}s{warmup_note} - "
+                "Press F7 to capture and identify items")
+        else:
+            self.status_bar.showMessage(
+                f"OCR engine failed to load: {self.ocr_processor.initialization_error}")
     
     def create_matched_item_display(self):
         """Create the matched item display frame"""
@@ -584,9 +998,6 @@ class MainWindow(QMainWindow):
         self.ledger_widget = LedgerWidget(self, self.item_database)
         self.ledger_layout.addWidget(self.ledger_widget)
         
-        # Connect cash balance changes to ledger refresh
-        self.ledger_widget.cash_balance_changed.connect(self.refresh_ledger)
-        
         # Add to tabs
         self.tab_widget.addTab(self.ledger_tab, "Ledger")
         
@@ -632,6 +1043,130 @@ class MainWindow(QMainWindow):
         self.preprocess_action.triggered.connect(self.toggle_preprocessing)
         self.options_menu.addAction(self.preprocess_action)
         
+        # Recognition-only fast path
+        self.fast_ocr_action = QAction("Fast Recognition (Skip Text Detection)", self)
+        self.fast_ocr_action.setCheckable(True)
+        self.fast_ocr_action.setChecked(True)  # Default to enabled
+        self.fast_ocr_action.triggered.connect(self.toggle_fast_ocr)
+        self.options_menu.addAction(self.fast_ocr_action)
+        
+        # Lexicon-constrained decoding of item names
+        self.lexicon_action = QAction("Decode Item Names Against Database", self)
+        self.lexicon_action.setCheckable(True)
+        self.lexicon_action.setChecked(False)
+        self.lexicon_action.triggered.connect(self.toggle_lexicon_decoding)
+        self.options_menu.addAction(self.lexicon_action)
+        
+        # OCR engine submenu
+        self.engine_menu = self.options_menu.addMenu("OCR Engine")
+        
+        engines = [
+            ("PaddlePaddle", "paddle"),
+            ("ONNX Runtime (CPU)", "onnx"),
+            ("ONNX Runtime INT8 (Quantized)", "onnx-int8")
+        ]
+        for label, engine in engines:
+            engine_action = QAction(label, self)
+            engine_action.setCheckable(True)
+            engine_action.setChecked(engine == self.ocr_engine)
+            engine_action.setData(engine)
+            engine_action.triggered.connect(lambda checked, e=engine: self.set_ocr_engine(e))
+            self.engine_menu.addAction(engine_action)
+        
+        # Save captures for the OCR benchmark
+        self.save_captures_action = QAction("Save Captures for Benchmarking", self)
+        self.save_captures_action.setCheckable(True)
+        self.save_captures_action.setChecked(False)
+        self.save_captures_action.triggered.connect(self.toggle_save_captures)
+        self.options_menu.addAction(self.save_captures_action)
+        
+        # Capture region submenu
+        self.capture_menu = self.options_menu.addMenu("Capture Region")
+        
+        self.auto_crop_action = QAction("Auto-Crop to Tooltip", self)
+        self.auto_crop_action.setCheckable(True)
+        self.auto_crop_action.setChecked(self.settings.value("capture/auto_crop", True, type=bool))
+        self.auto_crop_action.triggered.connect(self.toggle_auto_crop)
+        self.capture_menu.addAction(self.auto_crop_action)
+        
+        self.capture_region_action = QAction(self.capture_region_label(), self)
+        self.capture_region_action.triggered.connect(self.change_capture_region)
+        self.capture_menu.addAction(self.capture_region_action)
+        
+        # Rapid capture handling submenu
+        self.queue_policy_menu = self.options_menu.addMenu("Rapid Capture Handling")
+        
+        queue_policies = [
+            ("Queue (Drop Oldest)", CaptureQueue.DROP_OLDEST),
+            ("Latest Only (Coalesce)", CaptureQueue.COALESCE)
+        ]
+        for label, policy in queue_policies:
+            policy_action = QAction(label, self)
+            policy_action.setCheckable(True)
+            policy_action.setChecked(policy == CaptureQueue.DROP_OLDEST)
+            policy_action.setData(policy)
+            policy_action.triggered.connect(lambda checked, p=policy: self.set_queue_policy(p))
+            self.queue_policy_menu.addAction(policy_action)
+        
+        # Fuzzy matching backend submenu
+        self.fuzzy_backend_menu = self.options_menu.addMenu("Matching Engine")
+        
+        fuzzy_backends = [
+            ("Auto (Fastest Available)", "auto"),
+            ("RapidFuzz", "rapidfuzz"),
+            ("FuzzyWuzzy", "fuzzywuzzy")
+        ]
+        for label, backend in fuzzy_backends:
+            backend_action = QAction(label, self)
+            backend_action.setCheckable(True)
+            backend_action.setChecked(backend == "auto")
+            backend_action.setData(backend)
+            backend_action.triggered.connect(lambda checked, b=backend: self.set_fuzzy_backend(b))
+            self.fuzzy_backend_menu.addAction(backend_action)
+        
+        # Hotkey bindings submenu
+        self.hotkey_menu = self.options_menu.addMenu("Hotkeys")
+        
+        for action_name, combo in self.get_hotkey_bindings().items():
+            hotkey_action = QAction(f"{ACTION_LABELS[action_name]}: {combo.upper()}", self)
+            hotkey_action.setData(action_name)
+            hotkey_action.triggered.connect(lambda checked, a=action_name: self.change_hotkey(a))
+            self.hotkey_menu.addAction(hotkey_action)
+        
+        # Storage backend submenu
+        self.storage_menu = self.options_menu.addMenu("Storage Engine")
+        
+        current_storage = self.settings.value("storage/backend", "json")
+        storage_backends = [
+            ("JSON Files", "json"),
+            ("SQLite Database", "sqlite")
+        ]
+        for label, backend in storage_backends:
+            storage_action = QAction(label, self)
+            storage_action.setCheckable(True)
+            storage_action.setChecked(backend == current_storage)
+            storage_action.setData(backend)
+            storage_action.triggered.connect(lambda checked, b=backend: self.set_storage_backend(b))
+            self.storage_menu.addAction(storage_action)
+        
+        # Data file format submenu (JSON file storage only)
+        self.codec_menu = self.options_menu.addMenu("Data File Format")
+        
+        current_codec = self.item_database.codec.name
+        codecs = [
+            ("Compact JSON", "json"),
+            ("Indented JSON (readable)", "json-indent"),
+            ("orjson (fast JSON)", "orjson"),
+            ("MessagePack (smallest)", "msgpack")
+        ]
+        for label, codec in codecs:
+            codec_action = QAction(label, self)
+            codec_action.setCheckable(True)
+            codec_action.setChecked(codec == current_codec)
+            codec_action.setData(codec)
+            codec_action.triggered.connect(lambda checked, c=codec: self.set_data_file_format(c))
+            self.codec_menu.addAction(codec_action)
+        
         # Confidence threshold submenu
         self.confidence_menu = self.options_menu.addMenu("Match Confidence Threshold")
         
@@ -718,27 +1253,234 @@ class MainWindow(QMainWindow):
         else:
             self.status_bar.showMessage("Game text preprocessing disabled")
     
-    def process_screen_capture(self, img, cursor_pos=None):
+    def toggle_fast_ocr(self, checked):
+        """Toggle recognition without text detection"""
+        self.ocr_thread.set_fast_mode(checked)
+        if checked:
+            self.status_bar.showMessage("Fast recognition enabled - full detection is used when unsure")
+        else:
+            self.status_bar.showMessage("Fast recognition disabled")
+    
+    def toggle_lexicon_decoding(self, checked):
+        """Toggle decoding item names against the database"""
+        self.ocr_thread.set_lexicon_decoding(checked)
+        if checked:
+            self.status_bar.showMessage("Item names are decoded against the database - "
+                                        "fuzzy matching is used when no name fits")
+        else:
+            self.status_bar.showMessage("Item names are fuzzy matched")
+    
+    def toggle_save_captures(self, checked):
+        """Toggle saving captures to the captures folder"""
+        self.ocr_thread.set_capture_dir("captures" if checked else None)
+        if checked:
+            self.status_bar.showMessage("Saving captures to the 'captures' folder")
+        else:
+            self.status_bar.showMessage("Stopped saving captures")
+    
+    def process_screen_capture(self, img, cursor_pos=None, capture_info=None):
         """Process captured screen image by immediately running OCR
         
         Args:
             img: The captured image
             cursor_pos: The cursor position at time of capture (x, y)
+            capture_info: Hotkey action and latency for the capture
         """
         # If we have a valid image
-        if img:
+        if img is not None:
             # Store the current image
             self.current_image = img
             
-            # Process OCR directly (no UI needed anymore)
-            self.ocr_thread.set_image(img)
-            self.ocr_thread.item_db = self.item_database  # Ensure item database is connected
+            # Hand the capture to the OCR worker; it travels with its cursor position
+            dropped = self.ocr_thread.enqueue(img, cursor_pos, capture_info)
+            self.update_queue_label()
             
-            # Store cursor position for tooltip
-            self.last_cursor_pos = cursor_pos
+            if dropped:
+                self.status_bar.showMessage(f"Skipped {dropped} older capture(s) - processing latest")
+    
+    def get_capture_region(self):
+        """Get the saved capture region as (width, height, offset_x, offset_y)"""
+        return (
+            self.settings.value("capture/width", ScreenCaptureThread.DEFAULT_WIDTH, type=int),
+            self.settings.value("capture/height", ScreenCaptureThread.DEFAULT_HEIGHT, type=int),
+            self.settings.value("capture/offset_x", ScreenCaptureThread.DEFAULT_OFFSET_X, type=int),
+            self.settings.value("capture/offset_y", ScreenCaptureThread.DEFAULT_OFFSET_Y, type=int)
+        )
+    
+    def capture_region_label(self):
+        """Menu text describing the capture region"""
+        width, height, offset_x, offset_y = self.get_capture_region()
+        return f"Region: {width}x{height} at {offset_x:+d},{offset_y:+d}..."
+    
+    def change_capture_region(self):
+        """Ask for a new capture region size and offset from the cursor"""
+        width, height, offset_x, offset_y = self.get_capture_region()
+        text, ok = QInputDialog.getText(
+            self, "Capture Region",
+            "Region size and offset from the cursor as WIDTHxHEIGHT+X+Y (e.g. 480x160+0+0):",
+            text=f"{width}x{height}{offset_x:+d}{offset_y:+d}")
+        if not ok or not text.strip():
+            return
+        
+        match = re.fullmatch(r"\s*(\d+)\s*x\s*(\d+)\s*(?:([+-]\d+)\s*([+-]\d+))?\s*", text.lower())
+        if not match or not int(match.group(1)) or not int(match.group(2)):
+            self.status_bar.showMessage(f"Invalid capture region: {text}")
+            return
+        width, height = int(match.group(1)), int(match.group(2))
+        offset_x, offset_y = int(match.group(3) or 0), int(match.group(4) or 0)
+        
+        self.settings.setValue("capture/width", width)
+        self.settings.setValue("capture/height", height)
+        self.settings.setValue("capture/offset_x", offset_x)
+        self.settings.setValue("capture/offset_y", offset_y)
+        self.capture_thread.set_capture_region(width, height, offset_x, offset_y)
+        self.capture_region_action.setText(self.capture_region_label())
+        self.status_bar.showMessage(f"Capture region set to {width}x{height} at {offset_x:+d},{offset_y:+d}")
+    
+    def toggle_auto_crop(self, checked):
+        """Toggle cropping captures to the tooltip before OCR"""
+        self.settings.setValue("capture/auto_crop", checked)
+        self.capture_thread.set_auto_crop(checked)
+        if checked:
+            self.status_bar.showMessage("Auto-crop enabled - OCR only reads the tooltip")
+        else:
+            self.status_bar.showMessage("Auto-crop disabled - OCR reads the whole capture region")
+    
+    def get_hotkey_bindings(self):
+        """Get the hotkey bindings saved in the settings"""
+        return {action_name: self.settings.value(f"hotkeys/{action_name}", combo)
+                for action_name, combo in DEFAULT_BINDINGS.items()}
+    
+    def change_hotkey(self, action_name):
+        """Ask for a new key combination for a hotkey action"""
+        current = self.capture_thread.hotkeys.bindings[action_name]
+        combo, ok = QInputDialog.getText(
+            self, "Change Hotkey",
+            f"Key combination for {ACTION_LABELS[action_name]} (e.g. f7, shift+f7, ctrl+alt+c):",
+            text=current)
+        combo = combo.strip().lower()
+        if not ok or not combo or combo == current:
+            return
+        
+        try:
+            self.capture_thread.hotkeys.set_binding(action_name, combo)
+        except ValueError as e:
+            self.status_bar.showMessage(str(e))
+            return
+        
+        self.settings.setValue(f"hotkeys/{action_name}", combo)
+        for action in self.hotkey_menu.actions():
+            if action.data() == action_name:
+                action.setText(f"{ACTION_LABELS[action_name]}: {combo.upper()}")
+        self.status_bar.showMessage(f"{ACTION_LABELS[action_name]} hotkey set to {combo.upper()}")
+    
+    def handle_hotkey_action(self, action_name, cursor_pos):
+        """Handle hotkey actions that do not capture the screen
+        
+        Args:
+            action_name: Hotkey action name
+            cursor_pos: The cursor position when the hotkey was pressed (x, y)
+        """
+        if action_name == REPEAT_LAST:
+            last_match = getattr(self, 'last_match', None)
+            if not last_match:
+                self.status_bar.showMessage("No previous match to repeat")
+                return
             
-            # Run OCR processing
-            self.ocr_thread.run()
+            item_name, price = last_match
+            QApplication.clipboard().setText(str(price))
+            if self.show_tooltips and cursor_pos:
+                from PyQt6.QtCore import QPoint
+                self.tooltip_overlay.show_tooltip(item_name, price, QPoint(cursor_pos[0], cursor_pos[1]))
+            self.status_bar.showMessage(f"Copied price to clipboard: {price} for {item_name}")
+    
+    def update_queue_label(self, depth=None):
+        """Update the OCR queue depth indicator in the status bar"""
+        if depth is None:
+            depth = self.ocr_thread.queue.depth()
+        dropped = self.ocr_thread.queue.dropped
+        self.queue_label.setText(f"OCR queue: {depth} | Dropped: {dropped}")
+    
+    def set_fuzzy_backend(self, backend):
+        """Select the fuzzy matching backend used by the item database"""
+        try:
+            active = self.item_database.set_fuzzy_backend(backend)
+        except ImportError:
+            self.status_bar.showMessage(f"Matching engine '{backend}' is not installed")
+            return
+        
+        for action in self.fuzzy_backend_menu.actions():
+            action.setChecked(action.data() == backend)
+        
+        self.status_bar.showMessage(f"Matching engine set to {active}")
+    
+    def set_storage_backend(self, backend):
+        """Choose where items, logs, the ledger and cash are stored
+        
+        The change takes effect on the next start. The first start with
+        SQLite imports the existing JSON files.
+        """
+        self.settings.setValue("storage/backend", backend)
+        
+        for action in self.storage_menu.actions():
+            action.setChecked(action.data() == backend)
+        
+        self.status_bar.showMessage(f"Storage engine will switch to {backend} after restart")
+    
+    def set_ocr_engine(self, engine):
+        """Switch the OCR engine and load it in the background"""
+        loading = getattr(self, 'engine_load_thread', None)
+        if engine != self.ocr_engine and loading is not None and loading.isRunning():
+            self.status_bar.showMessage("The OCR engine is still loading - try again when it is ready")
+            engine = self.ocr_engine
+        
+        for action in self.engine_menu.actions():
+            action.setChecked(action.data() == engine)
+        if engine == self.ocr_engine:
+            return
+        
+        self.ocr_engine = engine
+        self.settings.setValue("ocr/engine", engine)
+        self.ocr_thread.set_engine(engine)
+        if not engine_models_exist(engine):
+            self.status_bar.showMessage("OCR models are missing - download them from the Help menu")
+            return
+        self.start_engine_loading()
+    
+    def set_data_file_format(self, codec):
+        """Choose the format the JSON storage writes its data files in
+        
+        Files are read in whatever format they were written in, so the
+        switch happens immediately by rewriting them.
+        """
+        try:
+            active = self.item_database.set_codec(codec)
+        except ImportError:
+            self.status_bar.showMessage(f"Data file format '{codec}' is not installed")
+            for action in self.codec_menu.actions():
+                action.setChecked(action.data() == self.item_database.codec.name)
+            return
+        
+        if self.storage is None:
+            self.ledger_widget.cash_manager.set_codec(self.item_database.codec)
+        self.settings.setValue("storage/codec", active)
+        
+        for action in self.codec_menu.actions():
+            action.setChecked(action.data() == active)
+        
+        self.status_bar.showMessage(f"Data files are now written as {active}")
+    
+    def set_queue_policy(self, policy):
+        """Set how rapid captures are handled while OCR is busy"""
+        for action in self.queue_policy_menu.actions():
+            action.setChecked(action.data() == policy)
+        
+        self.ocr_thread.set_queue_policy(policy)
+        
+        if policy == CaptureQueue.COALESCE:
+            self.status_bar.showMessage("Rapid captures: only the latest capture is processed")
+        else:
+            self.status_bar.showMessage("Rapid captures: queued, oldest dropped when full")
     
     def export_database(self):
         """Export the database to a JSON file"""
@@ -757,7 +1499,6 @@ class MainWindow(QMainWindow):
         """Handle added item from the database widget"""
         self.item_database.add_item(item_name, price)
         self.status_bar.showMessage(f"Added new item: {item_name} with price: {price:,}")
-        self.update_database_ui()
     
     def handle_item_edited(self, original_name, new_name, price):
         """Handle edited item from the database widget"""
@@ -768,14 +1509,11 @@ class MainWindow(QMainWindow):
             self.status_bar.showMessage(f"Renamed '{original_name}' to '{new_name}' with price: {price:,}")
         else:
             self.status_bar.showMessage(f"Updated price for '{original_name}' to: {price:,}")
-            
-        self.update_database_ui()
     
     def handle_item_deleted(self, item_name):
         """Handle deleted item from the database widget"""
         self.item_database.delete_item(item_name)
         self.status_bar.showMessage(f"Deleted item: {item_name}")
-        self.update_database_ui()
     
     def handle_search_request(self, query):
         """Handle fuzzy search request from the database widget"""
@@ -819,9 +1557,6 @@ class MainWindow(QMainWindow):
                     
                     if reply == QMessageBox.StandardButton.Yes:
                         self.item_database.add_item(item_name, price)
-                
-                # Update the UI
-                self.update_database_ui()
             else:
                 self.status_bar.showMessage("Failed to correct log entry")
     
@@ -834,9 +1569,6 @@ class MainWindow(QMainWindow):
             
             # Update the stock
             if self.item_database.update_stock(item_name, new_stock):
-                # Update all UI components
-                self.update_database_ui()
-                
                 # Show appropriate status message
                 if new_stock > current_stock:
                     self.status_bar.showMessage(f"Added {new_stock - current_stock} to stock of '{item_name}' (now {new_stock})")
@@ -865,16 +1597,10 @@ class MainWindow(QMainWindow):
             
             # Mark as sold
             if self.item_database.mark_as_sold(item_name, quantity, selling_price):
-                # Update all UI components
-                self.update_database_ui()
-                
                 # Show success message
                 sale_value = quantity * (selling_price if selling_price is not None else default_price)
                 price_info = f" at {selling_price:,} each" if selling_price is not None and selling_price != default_price else ""
                 self.status_bar.showMessage(f"Sold {quantity} of '{item_name}'{price_info} for {sale_value:,} (stock now {current_stock - quantity})")
-                
-                # Update the ledger
-                self.update_ledger()
             else:
                 self.status_bar.showMessage(f"Failed to mark '{item_name}' as sold")
         else:
@@ -899,27 +1625,28 @@ class MainWindow(QMainWindow):
             
             # Update inventory widget
             self.inventory_widget.update_inventory(inventory_data, stats)
-            
-    def update_ledger(self):
-        """Update the ledger display"""
+    
+    def update_ledger(self, change=None, item_names=None):
+        """Update the ledger display
+        
+        Args:
+            change: Change type when called by the change bus (unused)
+            item_names: Changed item names when called by the change bus (unused)
+        """
         # Get ledger entries from the database
         entries = self.item_database.get_ledger_entries(limit=1000)  # Get more entries
         stats = self.item_database.get_ledger_stats()
         
         # Update the ledger widget
         self.ledger_widget.update_data(entries, stats)
+    
+    def update_log(self, change=None, item_names=None):
+        """Reload the recently logged items
         
-    def refresh_ledger(self):
-        """Refresh the ledger display - called when cash transactions are made"""
-        # Update the ledger
-        self.update_ledger()
-        
-        # Update inventory UI since cash affects total assets
-        self.update_inventory_ui()
-        
-    def update_database_ui(self):
-        """Update all database-related UI components"""
-        # Update recently logged items
+        Args:
+            change: Change type when called by the change bus (unused)
+            item_names: Changed item names when called by the change bus (unused)
+        """
         recently_logged_data = self.item_database.get_recent_logs(limit=100)
         # Enhance log data with stock information
         for entry in recently_logged_data:
@@ -928,6 +1655,11 @@ class MainWindow(QMainWindow):
                 entry['stock'] = self.item_database.items[matched_item].get('stock', 0)
                 
         self.log_widget.update_log(recently_logged_data)
+    
+    def update_database_ui(self):
+        """Update all database-related UI components"""
+        # Update recently logged items
+        self.update_log()
         
         # Update database view
         self.database_widget.update_items(self.item_database.items)
@@ -938,21 +1670,61 @@ class MainWindow(QMainWindow):
         # Update ledger
         self.update_ledger()
     
+    def refresh_inventory_rows(self, change, item_names):
+        """Update the inventory rows of changed items
+        
+        Args:
+            change: Change type reported by the item database
+            item_names: Names of the changed items
+        """
+        records = [self.item_database.get_inventory_item(name) for name in item_names]
+        self.inventory_widget.update_items([record for record in records if record])
+        # Deleted items and the old names of renamed items no longer have a record
+        self.inventory_widget.remove_items([name for name, record in zip(item_names, records) if not record])
+    
+    def refresh_log_stock(self, change, item_names):
+        """Update the stock shown next to log entries of changed items"""
+        for name in item_names:
+            item = self.item_database.get_item(name)
+            self.log_widget.update_stock(name, item.get('stock', 0) if isinstance(item, dict) else 0)
+    
+    def refresh_log_rows(self, change, item_names):
+        """Add newly logged captures to the top of the recent logs"""
+        self.log_widget.add_entries(self.item_database.get_recent_logs(limit=100))
+    
+    def refresh_ledger_rows(self, change, item_names):
+        """Add newly appended ledger entries and update the ledger statistics"""
+        self.ledger_widget.add_entries(self.item_database.get_ledger_entries(limit=100),
+                                       self.item_database.get_ledger_stats())
+    
     def handle_ocr_results(self, results, stats):
         """Handle OCR results from the OCR thread"""
         if stats.get('status') == 'error':
             self.status_bar.showMessage(f"OCR error: {stats.get('message', 'Unknown error')}")
             return
         
-        # Store the OCR results
+        # Store the OCR results and the cursor position of their capture
         self.ocr_results = results
+        self.last_cursor_pos = stats.get('cursor_pos')
         
         # Update matched item display immediately
         self.update_ui_with_ocr_results()
         
-        # Show processing time in status bar
-        proc_time = stats.get('processing_time', 0)
-        self.status_bar.showMessage(f"OCR completed in {proc_time:.2f} seconds")
+        # Show per-stage latency in status bar
+        self.update_queue_label(stats.get('queue_depth'))
+        self.status_bar.showMessage(
+            f"OCR completed in {stats.get('total_latency', 0):.2f} seconds "
+            f"(hotkey {stats.get('hotkey_latency', 0) * 1000:.0f} ms, "
+            f"wait {stats.get('queue_wait', 0) * 1000:.0f} ms, "
+            f"crop {stats.get('crop_time', 0) * 1000:.1f} ms{'' if stats.get('cropped') else ' [no tooltip]'}, "
+            f"OCR {stats.get('ocr_time', 0) * 1000:.0f} ms [{stats.get('ocr_engine')} {stats.get('ocr_mode')}"
+            f"{' cold' if stats.get('cold_start') else ''}] "
+            f"on {stats.get('ocr_pixels', 0):,} px, "
+            f"match {stats.get('match_time', 0) * 1000:.1f} ms for {stats.get('candidates', 0)}/{stats.get('lines', 0)} lines"
+            f"{' [cached]' if stats.get('match_cached') else ''}"
+            f"{' [lexicon]' if stats.get('match_method') == 'lexicon' else ''}, "
+            f"log {stats.get('log_time', 0) * 1000:.1f} ms)"
+        )
         
         # Check if we should copy a price to clipboard
         if self.copy_price_to_clipboard:
@@ -975,6 +1747,15 @@ class MainWindow(QMainWindow):
                     formatted_price = f"{price:,}"
                     self.status_bar.showMessage(f"Copied price to clipboard: {price} for {item_name}")
                     break  # Only copy the first match
+        
+        # Capture-and-sell records one sale of the best match
+        if stats.get('action') == CAPTURE_AND_SELL:
+            matched = [result for result in results if result.get('matched_item')]
+            if matched:
+                best_match = max(matched, key=lambda result: result.get('match_score', 0))
+                self.handle_item_sold(best_match['matched_item'], 1)
+            else:
+                self.status_bar.showMessage("Capture and sell: no item matched")
     
     def process_ocr_results(self, results):
         """Process OCR results and check for item matches"""
@@ -986,9 +1767,6 @@ class MainWindow(QMainWindow):
         # Switch to Recent Logs tab to show the results
         self.tab_widget.setCurrentIndex(1)  # Recent Logs tab
         
-        # Update database UI
-        self.update_database_ui()
-        
         # Update matched item display
         if self.ocr_results and len(self.ocr_results) > 0:
             # Find the best match (highest confidence)
@@ -1006,6 +1784,9 @@ class MainWindow(QMainWindow):
                 match_score = best_match.get('match_score', 0)
                 ocr_text = best_match.get('ocr_text', '')
                 
+                # Remember the match for the repeat-last hotkey
+                self.last_match = (matched_item, price)
+                
                 # Update the display with detailed information
                 self.matched_item_info.setText(f"{matched_item}\nPrice: {price:,} mesos")
                 self.matched_item_info.setStyleSheet("color: #50C878; border: none;") # Green for price
@@ -1036,6 +1817,21 @@ class MainWindow(QMainWindow):
         self.capture_thread.stop()
         self.capture_thread.wait()
         
+        # Stop the OCR worker
+        self.ocr_thread.stop()
+        self.ocr_thread.wait()
+        
+        # Let a background engine load finish before exiting
+        if getattr(self, 'engine_load_thread', None) is not None:
+            self.engine_load_thread.wait()
+        
+        # Write any JSON changes still waiting on the persistence writer
+        self.item_database.close()
+        
+        # Close the SQLite storage if it is in use
+        if self.storage is not None:
+            self.storage.close()
+        
         # Accept the event
         event.accept()
     
@@ -1106,31 +1902,11 @@ class MainWindow(QMainWindow):
         # Update the price in the database
         if self.item_database.update_price(item_name, new_price):
             self.status_bar.showMessage(f"Updated price of {item_name} to {new_price:,}", 5000)
-            
-            # Refresh inventory display - use the same method as update_inventory_ui
-            inventory_data = self.item_database.get_inventory_data()
-            
-            # Calculate statistics
-            total_items = len(inventory_data)
-            items_with_stock = sum(1 for item in inventory_data if item['stock'] > 0)
-            total_value = sum(item['value'] for item in inventory_data)
-            
-            stats = {
-                'total_items': total_items,
-                'items_with_stock': items_with_stock,
-                'total_value': total_value
-            }
-            
-            # Update inventory widget
-            self.inventory_widget.update_inventory(inventory_data, stats)
-            
-            # Refresh ledger if it exists
-            if hasattr(self, 'ledger_widget'):
-                self.update_ledger()
-    
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = MainWindow()
+    with startup_profile.section("Main window"):
+        window = MainWindow()
     window.show()
     sys.exit(app.exec())
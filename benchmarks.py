@@ -0,0 +1,1020 @@
+"""
+Microbenchmarks for MapleLegends ShopHelper
+Run with: python benchmarks.py <benchmark> [options]
+"""
+
+import os
+import glob
+import json
+import time
+import argparse
+import statistics
+
+
+def summarize(samples):
+    """Summarize timing samples in milliseconds"""
+    samples = sorted(samples)
+    return {
+        'median': statistics.median(samples) * 1000,
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'min': samples[0] * 1000
+    }
+
+
+def print_row(label, samples):
+    """Print one benchmark result row"""
+    result = summarize(samples)
+    print(f"  {label:<28} median {result['median']:8.3f} ms   "
+          f"p95 {result['p95']:8.3f} ms   min {result['min']:8.3f} ms")
+
+
+def parse_size(text):
+    """Parse a WIDTHxHEIGHT region size"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def bench_capture(args):
+    """Capture-to-array latency: per-press mss session + PIL versus the persistent grabber"""
+    import mss
+    import cv2
+    import numpy as np
+    from PIL import Image
+    from screen_capture import ScreenGrabber
+    
+    grabber = ScreenGrabber()
+    for width, height in args.sizes:
+        print(f"Region {width}x{height} ({args.iterations} iterations)")
+        
+        # Previous path: new session, RGB conversion, PIL image, then NumPy again
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            with mss.mss() as sct:
+                screenshot = sct.grab({'left': args.left, 'top': args.top,
+                                       'width': width, 'height': height})
+                img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
+            gray = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY)
+            samples.append(time.perf_counter() - start)
+        print_row("mss session + PIL", samples)
+        
+        # Persistent grabber handing over a BGRA array
+        grabber.grab(args.left, args.top, width, height)  # Open the session first
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            frame = grabber.grab(args.left, args.top, width, height)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+            samples.append(time.perf_counter() - start)
+        print_row("persistent grabber", samples)
+    grabber.close()
+
+
+def normalize_text(text):
+    """Normalize OCR text for comparison"""
+    return " ".join(text.lower().split())
+
+
+def load_corpus(corpus_dir):
+    """Load a capture corpus
+    
+    A corpus is a folder of PNG captures, such as the 'captures' folder
+    written by Options > Save Captures for Benchmarking. An optional
+    labels.json maps file names to the expected item text.
+    
+    Returns:
+        List of (file name, RGB or BGRA array) and the labels dictionary
+    """
+    import cv2
+    
+    images = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.png"))):
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            continue
+        if len(image.shape) == 3 and image.shape[2] == 3:
+            # Saved three-channel images are BGR; the OCR stage expects RGB
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        images.append((os.path.basename(path), image))
+    
+    labels = {}
+    labels_path = os.path.join(corpus_dir, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path, 'r') as f:
+            labels = json.load(f)
+    return images, labels
+
+
+def bench_ocr(args):
+    """OCR latency and accuracy: full text detection versus the recognition-only fast path"""
+    from ocr_utils import OCRProcessor
+    
+    images, labels = load_corpus(args.corpus)
+    if not images:
+        print(f"No PNG captures found in {args.corpus}")
+        return
+    
+    processor = OCRProcessor(use_gpu=False)
+    if not processor.ocr:
+        print("OCR engine is not available - download the models first")
+        return
+    processor.cache.maxsize = 0  # Measure recognition, not the capture cache
+    
+    print(f"{len(images)} captures, {len(labels)} labelled")
+    reference = {}
+    for mode in ('full', 'fast'):
+        processor.set_fast_mode(mode == 'fast')
+        processor.process_image(images[0][1], preprocess=not args.no_preprocess)  # Warm up
+        
+        samples = []
+        correct = 0
+        fallbacks = 0
+        for name, image in images:
+            start = time.perf_counter()
+            results = processor.process_image(image, preprocess=not args.no_preprocess)
+            samples.append(time.perf_counter() - start)
+            
+            texts = [normalize_text(result['text']) for result in results]
+            if processor.get_processing_stats()['ocr_mode'] == 'fast_fallback':
+                fallbacks += 1
+            if mode == 'full':
+                reference[name] = texts
+            
+            # Labelled captures are scored against their label, the rest
+            # against what full detection read
+            if name in labels:
+                correct += normalize_text(labels[name]) in texts
+            else:
+                correct += texts == reference.get(name)
+        
+        print_row(f"{mode} ({fallbacks} fallbacks)", samples)
+        print(f"  {'':<28} accuracy {correct / len(images) * 100:.1f}%")
+
+
+def bench_crop(args):
+    """Tooltip auto-crop: scan time, pixels left for OCR and OCR latency with and without it"""
+    from screen_capture import crop_to_tooltip
+    
+    images, _ = load_corpus(args.corpus)
+    if not images:
+        print(f"No PNG captures found in {args.corpus}")
+        return
+    
+    samples = []
+    cropped = []
+    found = 0
+    pixels_before = 0
+    pixels_after = 0
+    for name, image in images:
+        start = time.perf_counter()
+        crop, bounds = crop_to_tooltip(image)
+        samples.append(time.perf_counter() - start)
+        found += bounds is not None
+        pixels_before += image.shape[0] * image.shape[1]
+        pixels_after += crop.shape[0] * crop.shape[1]
+        cropped.append((name, crop))
+    
+    print(f"{len(images)} captures, tooltip found in {found}")
+    print_row("crop scan", samples)
+    print(f"  {'':<28} OCR input {pixels_after / len(images):,.0f} px per capture, "
+          f"{pixels_after / pixels_before * 100:.1f}% of {pixels_before / len(images):,.0f}")
+    
+    if args.no_ocr:
+        return
+    from ocr_utils import OCRProcessor
+    processor = OCRProcessor(use_gpu=False)
+    if not processor.ocr:
+        print("OCR engine is not available - skipping the OCR comparison")
+        return
+    processor.cache.maxsize = 0  # Measure recognition, not the capture cache
+    
+    for label, corpus in (("whole region", images), ("cropped", cropped)):
+        processor.process_image(corpus[0][1])  # Warm up
+        samples = []
+        for name, image in corpus:
+            start = time.perf_counter()
+            processor.process_image(image)
+            samples.append(time.perf_counter() - start)
+        print_row(f"OCR {label}", samples)
+
+
+def current_rss_mb():
+    """Get the resident set size of this process in MB (peak RSS where only that is available)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+        
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize / (1024 * 1024)
+    
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_engine(engine, corpus_dir, preprocess=True, warmup=True):
+    """Measure one OCR engine in this process
+    
+    Load time includes the warm-up unless it is turned off.
+    
+    Returns:
+        Dictionary of timings in seconds, RSS in MB and the text read from
+        each capture, or {'error': message} if the engine did not load
+    """
+    images, _ = load_corpus(corpus_dir)
+    result = {'engine': engine, 'rss_start': current_rss_mb()}
+    
+    start = time.perf_counter()
+    from ocr_utils import OCRProcessor
+    processor = OCRProcessor(use_gpu=False, load_engine=False, engine=engine, warmup=warmup)
+    result['import_time'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    if not processor.ensure_engine():
+        return {'engine': engine, 'error': processor.initialization_error}
+    result['load_time'] = time.perf_counter() - start
+    result['warmup_time'] = processor.warmup_time
+    result['warmup_cold'] = processor.warmup_cold_latency
+    result['warmup_warm'] = processor.warmup_warm_latency
+    result['rss_loaded'] = current_rss_mb()
+    
+    processor.cache.maxsize = 0  # Measure recognition, not the capture cache
+    result['texts'] = {}
+    for mode in ('full', 'fast'):
+        processor.set_fast_mode(mode == 'fast')
+        samples = []
+        for name, image in images:
+            start = time.perf_counter()
+            results = processor.process_image(image, preprocess=preprocess)
+            samples.append(time.perf_counter() - start)
+            if mode == 'full':
+                result['texts'][name] = [normalize_text(line['text']) for line in results]
+        # Without the warm-up, the first capture pays the one-off costs
+        result[f'{mode}_first'] = samples[0] if samples else None
+        result[f'{mode}_samples'] = samples[1:] or samples
+    result['rss_end'] = current_rss_mb()
+    return result
+
+
+def bench_engines(args):
+    """OCR engines side by side: cold start, per-capture latency and RSS, each in a fresh process"""
+    import sys
+    import subprocess
+    
+    if args.engine:
+        # Child process: measure one engine and hand the results back as JSON
+        print(json.dumps(measure_engine(args.engine, args.corpus, not args.no_preprocess, not args.no_warmup)))
+        return
+    
+    results = []
+    for engine in args.engines:
+        command = [sys.executable, os.path.abspath(__file__), 'engines', '--engine', engine,
+                   '--corpus', args.corpus]
+        if args.no_preprocess:
+            command.append('--no-preprocess')
+        if args.no_warmup:
+            command.append('--no-warmup')
+        process = subprocess.run(command, capture_output=True, text=True)
+        lines = [line for line in process.stdout.splitlines() if line.startswith('{')]
+        if not lines:
+            print(f"{engine}: failed\n{process.stderr[-2000:]}")
+            continue
+        results.append(json.loads(lines[-1]))
+    
+    reference = None
+    for result in results:
+        print(f"Engine {result['engine']}")
+        if 'error' in result:
+            print(f"  {result['error']}")
+            continue
+        print(f"  cold start                   import {result['import_time']:6.2f} s   "
+              f"load {result['load_time']:6.2f} s")
+        if result['warmup_time'] is not None:
+            print(f"  warm-up                      {result['warmup_time']:6.2f} s   "
+                  f"first pass {result['warmup_cold'] * 1000:7.1f} ms   "
+                  f"repeat {result['warmup_warm'] * 1000:7.1f} ms")
+        print(f"  RSS                          start {result['rss_start']:7.1f} MB   "
+              f"loaded {result['rss_loaded']:7.1f} MB   end {result['rss_end']:7.1f} MB")
+        if not result['texts']:
+            print(f"  No PNG captures found in {args.corpus}")
+            continue
+        for mode in ('full', 'fast'):
+            print(f"  {'first ' + mode + ' capture':<28} {result[f'{mode}_first'] * 1000:8.1f} ms")
+            print_row(mode, result[f'{mode}_samples'])
+        
+        # Agreement with the first engine's full-detection text
+        if reference is None:
+            reference = result['texts']
+        else:
+            same = sum(texts == reference.get(name) for name, texts in result['texts'].items())
+            print(f"  {'':<28} same text as {results[0]['engine']} on {same} of {len(result['texts'])} captures")
+
+
+def bench_quantize(args):
+    """INT8 versus FP32 ONNX models: top-1 item match accuracy and per-capture latency"""
+    from ocr_utils import OCRProcessor, rank_tooltip_lines
+    from item_database import ItemDatabase
+    
+    images, labels = load_corpus(args.corpus)
+    if not images:
+        print(f"No PNG captures found in {args.corpus}")
+        return
+    preprocess = not args.no_preprocess
+    
+    processor = OCRProcessor(use_gpu=False, load_engine=False, engine='onnx')
+    if args.method:
+        processor.quantize_models(args.method, args.calibration or args.corpus, preprocess, callback=print)
+    processor.cache.maxsize = 0  # Measure recognition, not the capture cache
+    item_db = ItemDatabase(args.database)
+    
+    print(f"{len(images)} captures, {len(labels)} labelled, {len(item_db.items)} items")
+    matched = {}
+    medians = {}
+    for engine in ('onnx', 'onnx-int8'):
+        processor.set_engine(engine)
+        if not processor.ensure_engine():
+            print(f"{engine}: {processor.initialization_error}")
+            break
+        processor.process_image(images[0][1], preprocess=preprocess)  # Warm up
+        
+        samples = []
+        matched[engine] = {}
+        for name, image in images:
+            start = time.perf_counter()
+            results = processor.process_image(image, preprocess=preprocess)
+            samples.append(time.perf_counter() - start)
+            
+            # Top-1 match the way the OCR worker picks it
+            candidates = rank_tooltip_lines(results)
+            _, match = item_db.match_ranked([results[i]['text'] for i in candidates], args.threshold)
+            matched[engine][name] = match['name'] if match else None
+        
+        medians[engine] = summarize(samples)['median']
+        print_row(engine, samples)
+        
+        # Labelled captures are scored against their label, the rest against the FP32 match
+        correct = 0
+        for name, item_name in matched[engine].items():
+            if name in labels:
+                correct += normalize_text(item_name or '') == normalize_text(labels[name])
+            else:
+                correct += item_name == matched['onnx'].get(name)
+        print(f"  {'':<28} top-1 match accuracy {correct / len(images) * 100:.1f}%")
+    
+    if len(medians) == 2:
+        changed = sum(matched['onnx'][name] != matched['onnx-int8'][name] for name, _ in images)
+        print(f"INT8 is {medians['onnx'] / medians['onnx-int8']:.2f}x the speed of FP32 "
+              f"and matches a different item on {changed} of {len(images)} captures")
+    item_db.close()
+
+
+def bench_lexicon(args):
+    """Item identification by lexicon-constrained decoding versus fuzzy matching of the greedy text"""
+    import shutil
+    import tempfile
+    from ocr_utils import OCRProcessor, rank_tooltip_lines
+    from item_database import ItemDatabase
+    
+    images, labels = load_corpus(args.corpus)
+    if not images:
+        print(f"No PNG captures found in {args.corpus}")
+        return
+    preprocess = not args.no_preprocess
+    
+    processor = OCRProcessor(use_gpu=False, load_engine=False, engine=args.engine)
+    if not processor.ensure_engine():
+        print(f"{args.engine}: {processor.initialization_error}")
+        return
+    decoder = processor.get_lexicon_decoder()
+    
+    # Recognize once; only the matching step is compared
+    processor.cache.maxsize = 0
+    lines = {}
+    for name, image in images:
+        results = processor.process_image(image, preprocess=preprocess)
+        candidates = rank_tooltip_lines(results)
+        lines[name] = ([results[i]['text'] for i in candidates],
+                       [results[i].get('char_probs') for i in candidates])
+    if not any(probs is not None for _, probs_list in lines.values() for probs in probs_list):
+        print(f"The {args.engine} recognizer does not provide character probabilities")
+        return
+    
+    database_path = os.path.abspath(args.database)
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Work on a copy, so extra items and log files stay out of the real data
+        os.chdir(temp_dir)
+        try:
+            if os.path.exists(database_path):
+                shutil.copyfile(database_path, "items_database.json")
+            item_db = ItemDatabase("items_database.json")
+            for i in range(args.extra_items):
+                item_db.add_item(f"Synthetic Item {i} of {('Strength', 'Luck', 'Intelligence')[i % 3]}", 1000)
+            
+            start = time.perf_counter()
+            item_db.name_index.get_trie()
+            trie_time = time.perf_counter() - start
+            print(f"{len(images)} captures, {len(labels)} labelled, {len(item_db.items)} items "
+                  f"(trie built in {trie_time * 1000:.1f} ms)")
+            
+            # Like the app, decoded names below the lexicon threshold fall back to fuzzy matching
+            lexicon_threshold = max(args.threshold, args.lexicon_threshold)
+            matched = {}
+            for method in ('fuzzy', 'lexicon'):
+                samples = []
+                matched[method] = {}
+                fallbacks = 0
+                for name, (texts, probs_list) in lines.items():
+                    for _ in range(args.repeats):
+                        start = time.perf_counter()
+                        match = None
+                        if method == 'lexicon':
+                            _, match = item_db.decode_ranked(probs_list, decoder, lexicon_threshold)
+                            fell_back = match is None
+                        if match is None:
+                            _, match = item_db.match_ranked(texts, args.threshold)
+                        samples.append(time.perf_counter() - start)
+                    matched[method][name] = match['name'] if match else None
+                    fallbacks += method == 'lexicon' and fell_back
+                print_row(method, samples)
+                
+                # Labelled captures are scored against their label, the rest against the fuzzy match
+                correct = 0
+                for name, item_name in matched[method].items():
+                    if name in labels:
+                        correct += normalize_text(item_name or '') == normalize_text(labels[name])
+                    else:
+                        correct += item_name == matched['fuzzy'].get(name)
+                note = f", fell back to fuzzy matching on {fallbacks}" if method == 'lexicon' else ""
+                print(f"  {'':<28} top-1 match accuracy {correct / len(images) * 100:.1f}%{note}")
+            item_db.close()
+        finally:
+            os.chdir(previous_dir)
+
+
+def corrupt_text(text, rng, errors):
+    """Apply OCR-like character substitutions, drops and insertions to text"""
+    chars = list(text)
+    for _ in range(errors):
+        i = rng.randrange(len(chars))
+        roll = rng.random()
+        if roll < 0.5:
+            chars[i] = rng.choice('il1|oO0rnmvwcea ')
+        elif roll < 0.75 and len(chars) > 1:
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+    return ''.join(chars)
+
+
+def bench_matching(args):
+    """Shortlisted fuzzy matching of corrupted item names versus scoring the whole catalogue"""
+    import random
+    import shutil
+    import tempfile
+    from item_database import ItemDatabase, tokenize_name
+    
+    rng = random.Random(args.seed)
+    database_path = os.path.abspath(args.database)
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Work on a copy, so extra items stay out of the real data
+        os.chdir(temp_dir)
+        try:
+            if os.path.exists(database_path):
+                shutil.copyfile(database_path, "items_database.json")
+            item_db = ItemDatabase("items_database.json")
+            
+            # Extra names recombine the words of the real ones, sharing their common tokens
+            words = sorted({word for name in item_db.items for word in name.split()})
+            while words and len(item_db.items) < args.items:
+                name = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+                item_db.items.setdefault(name, {'price': 1000, 'stock': 0})
+            item_db.name_index.rebuild(item_db.items)
+            names = list(item_db.items)
+            if not names:
+                print("The item database is empty")
+                return
+            
+            queries = [corrupt_text(rng.choice(names), rng, rng.randint(1, args.max_errors))
+                       for _ in range(args.queries)]
+            print(f"{len(queries)} corrupted names, {len(names)} items, "
+                  f"{item_db.fuzzy.name} backend, threshold {args.threshold}")
+            
+            samples = []
+            expected = []
+            for query in queries:
+                start = time.perf_counter()
+                expected.append(item_db.fuzzy.extract_one(query, names, score_cutoff=args.threshold)[1])
+                samples.append(time.perf_counter() - start)
+            print_row("full scan", samples)
+            
+            for full_scan_below in args.full_scan_below:
+                item_db.name_index.full_scan_below = full_scan_below
+                samples = []
+                worse = scans = 0
+                for query, expected_score in zip(queries, expected):
+                    start = time.perf_counter()
+                    match = item_db.match_item(query, args.threshold)
+                    samples.append(time.perf_counter() - start)
+                    worse += (match['match_score'] if match else 0) < expected_score
+                    # Recount, untimed, whether the shortlist alone was trusted
+                    if item_db.name_index.find_exact(query) is None:
+                        shortlist = item_db.name_index.shortlist(tokenize_name(query))
+                        scans += item_db.name_index.needs_full_scan(*item_db.fuzzy.extract_one(
+                            query, shortlist, token_sets=item_db.name_index.tokens), args.threshold)
+                print_row(f"shortlist, full scan < {full_scan_below}", samples)
+                print(f"  {'':<28} worse than the full scan on {worse} of {len(queries)}, "
+                      f"fell back to it on {scans}")
+            item_db.close()
+        finally:
+            os.chdir(previous_dir)
+
+
+def bench_tune(args):
+    """Auto-tune the OCR engine's CPU settings on a capture corpus and save them for this machine"""
+    from ocr_utils import OCRProcessor
+    from ocr_tuning import autotune, save_tuning, machine_fingerprint, DEFAULT_TUNING
+    
+    images, labels = load_corpus(args.corpus)
+    if not images:
+        print(f"No PNG captures found in {args.corpus}")
+        return
+    
+    fingerprint, description = machine_fingerprint()
+    print(f"Tuning {args.engine} on {description} ({fingerprint}): "
+          f"{len(images)} captures, {len(labels)} labelled")
+    processor = OCRProcessor(use_gpu=False, load_engine=False, engine=args.engine, tuning=DEFAULT_TUNING)
+    settings, best, baseline = autotune(processor, images, labels, args.repeats, args.tolerance / 100,
+                                        not args.no_preprocess, callback=lambda message: print(f"  {message}"))
+    if settings is None:
+        print(f"The {args.engine} engine did not load: {processor.initialization_error}")
+        return
+    
+    print(f"Best: {settings}")
+    print(f"  {baseline['latency_ms']:.1f} ms -> {best['latency_ms']:.1f} ms per capture, "
+          f"accuracy {baseline['accuracy'] * 100:.0f}% -> {best['accuracy'] * 100:.0f}%")
+    if args.dry_run:
+        return
+    save_tuning(args.engine, settings, {
+        'latency_ms': best['latency_ms'],
+        'default_latency_ms': baseline['latency_ms'],
+        'accuracy': best['accuracy'],
+        'captures': len(images)
+    })
+    print("Saved; the app loads the engine with these settings on this machine")
+
+
+def bench_startup(args):
+    """Time to first window and memory use, before and after the OCR engine loads"""
+    start = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    app = QApplication([])
+    
+    import app as shophelper
+    if args.eager:
+        # Load the engine before building the window, as startup used to
+        shophelper.ocr_utils.get_ocr_processor().ensure_engine()
+    
+    window = shophelper.MainWindow()
+    window.show()
+    app.processEvents()
+    window_time = time.perf_counter() - start
+    window_rss = current_rss_mb()
+    
+    # Let the background load run to completion
+    processor = shophelper.ocr_utils.get_ocr_processor()
+    deadline = time.perf_counter() + args.timeout
+    while (not processor.engine_loaded and not processor.initialization_error
+           and processor.models_exist and time.perf_counter() < deadline):
+        app.processEvents()
+        time.sleep(0.01)
+    ready_time = time.perf_counter() - start
+    
+    print(f"Startup ({'eager' if args.eager else 'lazy'} engine)")
+    print(f"  first window        {window_time:8.2f} s   RSS {window_rss:8.1f} MB")
+    print(f"  OCR engine ready    {ready_time:8.2f} s   RSS {current_rss_mb():8.1f} MB"
+          f"   (loaded: {processor.engine_loaded})")
+    
+    window.close()
+    QTimer.singleShot(0, app.quit)
+    app.exec()
+
+
+def bench_persistence(args):
+    """UI-thread cost of a bulk restock: a JSON rewrite per change versus write-behind"""
+    import tempfile
+    from item_database import ItemDatabase
+    
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # The log and ledger files live next to the working directory
+        os.chdir(temp_dir)
+        try:
+            database = ItemDatabase(db_path="items_database.json")
+            for i in range(args.items):
+                database.add_item(f"Benchmark Item {i}", 1000 + i)
+            database.flush()
+            names = list(database.items)
+            
+            print(f"{args.changes} stock changes over {len(names)} items")
+            for mode in ('per change', 'write-behind'):
+                before = database.get_persistence_stats()
+                samples = []
+                for i in range(args.changes):
+                    name = names[i % len(names)]
+                    start = time.perf_counter()
+                    database.update_stock(name, database.items[name]['stock'] + 1)
+                    if mode == 'per change':
+                        database.flush()  # What every save used to cost
+                    samples.append(time.perf_counter() - start)
+                database.flush()
+                
+                after = database.get_persistence_stats()
+                print_row(mode, samples)
+                print(f"  {'':<28} {after['writes'] - before['writes']} writes, "
+                      f"{(after['bytes_written'] - before['bytes_written']) / 1024:.1f} KB")
+            database.close()
+        finally:
+            os.chdir(previous_dir)
+
+
+def synthetic_data(item_count, ledger_count, seed=1):
+    """Build item, ledger and cash documents shaped like the real data files"""
+    import random
+    
+    rng = random.Random(seed)
+    now = time.time()
+    items = {}
+    for i in range(item_count):
+        items[f"Synthetic Item {i} of {rng.choice(['Strength', 'Luck', 'Intelligence'])}"] = {
+            'price': rng.randint(1000, 50000000),
+            'added_date': now - rng.random() * 1e7,
+            'last_updated': now - rng.random() * 1e6,
+            'stock': rng.randint(0, 200)
+        }
+    
+    names = list(items)
+    types = ['sale', 'purchase', 'adjustment', 'price_update']
+    ledger = []
+    for i in range(ledger_count):
+        old_stock = rng.randint(0, 200)
+        quantity = rng.randint(1, 20)
+        price = rng.randint(1000, 50000000)
+        ledger.append({
+            'timestamp': now - (ledger_count - i) * 60.0,
+            'item_name': rng.choice(names),
+            'old_stock': old_stock,
+            'new_stock': old_stock - quantity,
+            'quantity': quantity,
+            'price': price,
+            'selling_price': price if rng.random() < 0.3 else None,
+            'value': quantity * price,
+            'transaction_type': rng.choice(types)
+        })
+    
+    cash = {
+        'cash_balance': rng.randint(0, 10 ** 10),
+        'transactions': [{
+            'timestamp': entry['timestamp'], 'item_name': 'Cash transaction', 'old_stock': 0,
+            'new_stock': 0, 'quantity': 0, 'price': 0, 'selling_price': None,
+            'value': entry['value'], 'transaction_type': 'cash'
+        } for entry in ledger[::10]],
+        'last_updated': now
+    }
+    return {
+        'items': {'items': items, 'last_updated': now},
+        'ledger': {'ledger': ledger},
+        'cash': cash
+    }
+
+
+def bench_codecs(args):
+    """Save/load time and file size of each data file codec on synthetic data"""
+    import tempfile
+    from data_codecs import CODECS, create_codec
+    from persistence import save_document, load_document
+    from ledger_journal import LedgerJournal
+    
+    documents = synthetic_data(args.items, args.ledger)
+    print(f"Synthetic data: {args.items} items, {args.ledger} ledger entries, "
+          f"{len(documents['cash']['transactions'])} cash transactions")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in CODECS:
+            try:
+                codec = create_codec(name)
+            except ImportError:
+                print(f"{name}: not installed")
+                continue
+            
+            print(name)
+            for label, document in documents.items():
+                path = os.path.join(temp_dir, f"{label}.{name}")
+                save_samples = []
+                load_samples = []
+                for _ in range(args.iterations):
+                    start = time.perf_counter()
+                    size = save_document(path, document, backups=0, codec=codec)
+                    save_samples.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    load_document(path, backups=0)
+                    load_samples.append(time.perf_counter() - start)
+                
+                save_ms = summarize(save_samples)['median']
+                load_ms = summarize(load_samples)['median']
+                print(f"  {label:<10} save {save_ms:9.1f} ms   load {load_ms:9.1f} ms   "
+                      f"size {size / 1024:9.1f} KB")
+        
+        # The JSON storage keeps the ledger as a journal rather than one document
+        path = os.path.join(temp_dir, "ledger.jsonl")
+        journal = LedgerJournal(path=path, legacy_path=None)
+        start = time.perf_counter()
+        journal.compact(documents['ledger']['ledger'])
+        save_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        journal.load()
+        load_ms = (time.perf_counter() - start) * 1000
+        print("ledger journal (JSON Lines)")
+        print(f"  {'ledger':<10} save {save_ms:9.1f} ms   load {load_ms:9.1f} ms   "
+              f"size {os.path.getsize(path) / 1024:9.1f} KB")
+
+
+class SimulatedCrash(Exception):
+    """Raised by the fault injection hook to stop a write part way"""
+
+
+def crash_at(stage):
+    """Fault injection hook that interrupts writes at one stage
+    
+    'partial_write' crashes before the fsync with only half of the data in
+    the temporary file, as if the system went down part way through writing.
+    """
+    import persistence
+    
+    def hook(current_stage, path):
+        if stage == 'partial_write' and current_stage == 'fsync':
+            temp_path = persistence.temp_path(path)
+            os.truncate(temp_path, os.path.getsize(temp_path) // 2)
+            raise SimulatedCrash(stage)
+        if current_stage == stage:
+            raise SimulatedCrash(stage)
+    return hook
+
+
+def interrupted(stage, write):
+    """Run a write with a simulated crash at the given stage"""
+    import persistence
+    
+    persistence.fault_hook = crash_at(stage)
+    try:
+        write()
+    except SimulatedCrash:
+        pass
+    finally:
+        persistence.fault_hook = None
+
+
+def bench_crash(args):
+    """Fault injection: interrupt saves at every write stage and check that loading recovers"""
+    import io
+    import tempfile
+    import contextlib
+    import persistence
+    from ledger_journal import LedgerJournal
+    
+    stages = ['partial_write', 'fsync', 'rotate', 'replace']
+    results = []
+    
+    def check(label, ok, detail):
+        results.append(ok)
+        print(f"  {label:<40} {'ok' if ok else 'FAILED'}   {detail}")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def fresh_path(name):
+            for file_name in os.listdir(temp_dir):
+                os.remove(os.path.join(temp_dir, file_name))
+            return os.path.join(temp_dir, name)
+        
+        def load(path):
+            # Recovery messages are expected here; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    return persistence.load_document(path)
+                except persistence.CorruptFileError:
+                    return 'corrupt'
+        
+        print("Data files (crash during a save)")
+        for stage in stages:
+            for versions in range(args.versions + 1):
+                path = fresh_path("store.json")
+                for version in range(versions):
+                    persistence.save_document(path, {'version': version})
+                previous = versions - 1 if versions else None
+                interrupted(stage, lambda: persistence.save_document(path, {'version': 'new'}))
+                
+                data = load(path)
+                loaded = data.get('version') if isinstance(data, dict) else data
+                # Either the old or the new document, never a torn one or nothing
+                ok = loaded in (previous, 'new') if versions else loaded in (None, 'new')
+                check(f"{stage}, {versions} earlier saves", ok, f"loaded version {loaded}")
+        
+        print("Data files (damaged file)")
+        for damage in ('truncated', 'bit flip', 'deleted'):
+            path = fresh_path("store.json")
+            for version in range(3):
+                persistence.save_document(path, {'version': version, 'payload': 'x' * 200})
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if damage == 'truncated':
+                raw = raw[:len(raw) // 2]
+            elif damage == 'bit flip':
+                raw = raw.replace(b'xxxx', b'xxyx', 1)
+            if damage == 'deleted':
+                os.remove(path)
+            else:
+                with open(path, 'wb') as f:
+                    f.write(raw)
+            
+            data = load(path)
+            loaded = data.get('version') if isinstance(data, dict) else data
+            check(damage, loaded == 1, f"loaded version {loaded}")
+        
+        print("Ledger journal (crash during compaction)")
+        for stage in stages:
+            path = fresh_path("ledger.jsonl")
+            journal = LedgerJournal(path=path, legacy_path=None)
+            entries = [{'timestamp': i, 'item_name': f"Item {i}"} for i in range(10)]
+            for entry in entries:
+                journal.append(entry)
+            interrupted(stage, lambda: journal.compact(entries[5:]))
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                loaded = LedgerJournal(path=path, legacy_path=None).load()
+            check(stage, len(loaded) in (10, 5), f"{len(loaded)} entries")
+        
+        path = fresh_path("ledger.jsonl")
+        journal = LedgerJournal(path=path, legacy_path=None)
+        journal.append({'timestamp': 1, 'item_name': "Item 1"})
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "add", "entry": {"timest')  # Torn append
+        journal = LedgerJournal(path=path, legacy_path=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            journal.load()
+        journal.append({'timestamp': 2, 'item_name': "Item 2"})
+        with contextlib.redirect_stdout(io.StringIO()):
+            loaded = LedgerJournal(path=path, legacy_path=None).load()
+        check("append after a torn line", len(loaded) == 2, f"{len(loaded)} entries")
+    
+    print(f"{sum(results)} of {len(results)} scenarios recovered")
+
+
+BENCHMARKS = {
+    'capture': bench_capture,
+    'ocr': bench_ocr,
+    'crop': bench_crop,
+    'engines': bench_engines,
+    'quantize': bench_quantize,
+    'tune': bench_tune,
+    'lexicon': bench_lexicon,
+    'matching': bench_matching,
+    'startup': bench_startup,
+    'persistence': bench_persistence,
+    'crash': bench_crash,
+    'codecs': bench_codecs
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ShopHelper microbenchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    capture_parser = subparsers.add_parser('capture', help=bench_capture.__doc__)
+    capture_parser.add_argument('--sizes', type=parse_size, nargs='+',
+                                default=[(300, 50), (600, 150), (1280, 720)],
+                                help="Region sizes as WIDTHxHEIGHT (default: 300x50 600x150 1280x720)")
+    capture_parser.add_argument('--iterations', type=int, default=200)
+    capture_parser.add_argument('--left', type=int, default=0)
+    capture_parser.add_argument('--top', type=int, default=0)
+    
+    ocr_parser = subparsers.add_parser('ocr', help=bench_ocr.__doc__)
+    ocr_parser.add_argument('--corpus', default='captures',
+                            help="Folder of PNG captures with optional labels.json (default: captures)")
+    ocr_parser.add_argument('--no-preprocess', action='store_true',
+                            help="Skip game text preprocessing")
+    
+    crop_parser = subparsers.add_parser('crop', help=bench_crop.__doc__)
+    crop_parser.add_argument('--corpus', default='captures',
+                             help="Folder of PNG captures saved with auto-crop off (default: captures)")
+    crop_parser.add_argument('--no-ocr', action='store_true',
+                             help="Only time the crop scan")
+    
+    engines_parser = subparsers.add_parser('engines', help=bench_engines.__doc__)
+    engines_parser.add_argument('--engines', nargs='+', default=['paddle', 'onnx'],
+                                help="Engines to compare (default: paddle onnx)")
+    engines_parser.add_argument('--corpus', default='captures',
+                                help="Folder of PNG captures with optional labels.json (default: captures)")
+    engines_parser.add_argument('--no-preprocess', action='store_true',
+                                help="Skip game text preprocessing")
+    engines_parser.add_argument('--no-warmup', action='store_true',
+                                help="Load the engines without warm-up, so the first capture runs cold")
+    engines_parser.add_argument('--engine', help=argparse.SUPPRESS)  # Set for the per-engine child process
+    
+    quantize_parser = subparsers.add_parser('quantize', help=bench_quantize.__doc__)
+    quantize_parser.add_argument('--corpus', default='captures',
+                                 help="Folder of PNG captures with optional labels.json (default: captures)")
+    quantize_parser.add_argument('--method', choices=['dynamic', 'static'],
+                                 help="Quantize the models first (default: use the existing INT8 models)")
+    quantize_parser.add_argument('--calibration',
+                                 help="Captures to calibrate static quantization on (default: the corpus)")
+    quantize_parser.add_argument('--database', default='items_database.json',
+                                 help="Item database to match against (default: items_database.json)")
+    quantize_parser.add_argument('--threshold', type=int, default=70,
+                                 help="Minimum match score (default: 70)")
+    quantize_parser.add_argument('--no-preprocess', action='store_true',
+                                 help="Skip game text preprocessing")
+    
+    tune_parser = subparsers.add_parser('tune', help=bench_tune.__doc__)
+    tune_parser.add_argument('--engine', default='paddle', choices=['paddle', 'onnx', 'onnx-int8'])
+    tune_parser.add_argument('--corpus', default='captures',
+                             help="Folder of PNG captures with optional labels.json (default: captures)")
+    tune_parser.add_argument('--repeats', type=int, default=3, help="Runs per capture (default: 3)")
+    tune_parser.add_argument('--tolerance', type=float, default=0,
+                             help="Accuracy in percent a faster setting may lose (default: 0)")
+    tune_parser.add_argument('--no-preprocess', action='store_true',
+                             help="Skip game text preprocessing")
+    tune_parser.add_argument('--dry-run', action='store_true',
+                             help="Report the best settings without saving them")
+    
+    lexicon_parser = subparsers.add_parser('lexicon', help=bench_lexicon.__doc__)
+    lexicon_parser.add_argument('--engine', default='onnx', choices=['paddle', 'onnx', 'onnx-int8'])
+    lexicon_parser.add_argument('--corpus', default='captures',
+                                help="Folder of PNG captures with optional labels.json (default: captures)")
+    lexicon_parser.add_argument('--database', default='items_database.json',
+                                help="Item database to match against (default: items_database.json)")
+    lexicon_parser.add_argument('--extra-items', type=int, default=0,
+                                help="Synthetic items added to a copy of the database, for large catalogues")
+    lexicon_parser.add_argument('--threshold', type=int, default=70,
+                                help="Minimum match score (default: 70)")
+    lexicon_parser.add_argument('--lexicon-threshold', type=int, default=80,
+                                help="Minimum decoding score before falling back to fuzzy matching (default: 80)")
+    lexicon_parser.add_argument('--repeats', type=int, default=5,
+                                help="Matching runs per capture (default: 5)")
+    lexicon_parser.add_argument('--no-preprocess', action='store_true',
+                                help="Skip game text preprocessing")
+    
+    matching_parser = subparsers.add_parser('matching', help=bench_matching.__doc__)
+    matching_parser.add_argument('--database', default='items_database.json',
+                                 help="Item database to match against (default: items_database.json)")
+    matching_parser.add_argument('--items', type=int, default=5000,
+                                 help="Catalogue size, padded with recombined item names (default: 5000)")
+    matching_parser.add_argument('--queries', type=int, default=300)
+    matching_parser.add_argument('--max-errors', type=int, default=3,
+                                 help="Most character errors per query (default: 3)")
+    matching_parser.add_argument('--threshold', type=int, default=70,
+                                 help="Minimum match score (default: 70)")
+    matching_parser.add_argument('--full-scan-below', type=int, nargs='+', default=[0, 90, 100],
+                                 help="Shortlist scores that fall back to a full scan (default: 0 90 100)")
+    matching_parser.add_argument('--seed', type=int, default=1)
+    
+    startup_parser = subparsers.add_parser('startup', help=bench_startup.__doc__)
+    startup_parser.add_argument('--eager', action='store_true',
+                                help="Load the OCR engine before the window, like earlier versions")
+    startup_parser.add_argument('--timeout', type=float, default=120,
+                                help="Seconds to wait for the OCR engine (default: 120)")
+    
+    persistence_parser = subparsers.add_parser('persistence', help=bench_persistence.__doc__)
+    persistence_parser.add_argument('--items', type=int, default=500)
+    persistence_parser.add_argument('--changes', type=int, default=300)
+    
+    crash_parser = subparsers.add_parser('crash', help=bench_crash.__doc__)
+    crash_parser.add_argument('--versions', type=int, default=4,
+                              help="Most earlier saves to make before each interrupted one (default: 4)")
+    
+    codecs_parser = subparsers.add_parser('codecs', help=bench_codecs.__doc__)
+    codecs_parser.add_argument('--items', type=int, default=10000)
+    codecs_parser.add_argument('--ledger', type=int, default=100000)
+    codecs_parser.add_argument('--iterations', type=int, default=3)
+    
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
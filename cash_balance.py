@@ -3,43 +3,81 @@ Cash balance tracking for MapleLegends ShopHelper
 Handles persistence of cash transactions and balance
 """
 
-import json
 import time
 from datetime import datetime
 from pathlib import Path
+from persistence import CorruptFileError, load_document, save_document
+from data_codecs import JsonCodec
 
 class CashManager:
     """Manages cash balance and transactions with persistence"""
     
-    def __init__(self, cash_file_path='cash_data.json'):
+    def __init__(self, cash_file_path='cash_data.json', storage=None, codec=None):
         """Initialize the cash manager
         
         Args:
-            cash_file_path: Path to the cash data JSON file
+            cash_file_path: Path to the cash data file
+            storage: Optional SQLiteStorage to use instead of the file
+            codec: Codec from data_codecs for the file (compact JSON by default)
         """
         self.cash_path = Path(cash_file_path)
+        self.storage = storage
+        self.codec = codec or JsonCodec()
         self.cash_balance = 0
         self.cash_transactions = []
+        self.listeners = []  # Callbacks notified when the balance or transactions change
         
         # Load cash data if file exists
         self.load_cash_data()
-            
+    
+    def add_listener(self, callback):
+        """Register a callback for cash changes
+        
+        The callback is called as callback('cash', []) on the thread that
+        made the change, after a transaction is added or deleted.
+        """
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Unregister a cash change callback"""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def _notify_change(self):
+        """Tell listeners that the cash balance or transactions changed"""
+        for callback in list(self.listeners):
+            try:
+                callback('cash', [])
+            except Exception as e:
+                print(f"Error in cash change listener: {e}")
+    
     def load_cash_data(self):
         """Load cash data from the cash file"""
-        if self.cash_path.exists():
+        if self.storage is not None:
+            self.cash_balance = self.storage.get_cash_balance()
+            self.cash_transactions = self.storage.load_cash_transactions()
+        else:
             try:
-                with open(self.cash_path, 'r') as f:
-                    cash_data = json.load(f)
-                self.cash_balance = cash_data.get('cash_balance', 0)
-                self.cash_transactions = cash_data.get('transactions', [])
-            except (json.JSONDecodeError, IOError) as e:
+                # Falls back to the newest backup if the file is torn or corrupt
+                cash_data = load_document(self.cash_path)
+            except CorruptFileError as e:
                 print(f"Error loading cash file: {e}")
-                # Initialize with default values if file can't be read
+                # Initialize with default values if no copy can be read
                 self.reset_cash_data()
-        else:
-            # Create a new cash file with default values
-            self.reset_cash_data()
-            self.save_cash_data()
+                return
+            
+            if cash_data is None:
+                # Create a new cash file with default values
+                self.reset_cash_data()
+                self.save_cash_data()
+            else:
+                self.cash_balance = cash_data.get('cash_balance', 0)
+                self.cash_transactions = cash_data.get('transactions', [])
+    
+    def set_codec(self, codec):
+        """Rewrite the cash file in a different format"""
+        self.codec = codec
+        self.save_cash_data()
     
     def reset_cash_data(self):
         """Reset cash data to default values"""
@@ -48,6 +86,11 @@ class CashManager:
     
     def save_cash_data(self):
         """Save cash data to the cash file"""
+        if self.storage is not None:
+            # Transactions are stored as they happen, only the balance needs writing
+            self.storage.set_cash_balance(self.cash_balance)
+            return
+        
         cash_data = {
             'cash_balance': self.cash_balance,
             'transactions': self.cash_transactions,
@@ -55,9 +98,8 @@ class CashManager:
         }
         
         try:
-            with open(self.cash_path, 'w') as f:
-                json.dump(cash_data, f, indent=2)
-        except IOError as e:
+            save_document(self.cash_path, cash_data, codec=self.codec)
+        except OSError as e:
             print(f"Error saving cash file: {e}")
     
     def add_transaction(self, transaction_data):
@@ -89,8 +131,14 @@ class CashManager:
         self.cash_transactions.append(ledger_entry)
         
         # Save changes
-        self.save_cash_data()
+        if self.storage is not None:
+            with self.storage.batch():
+                self.storage.add_cash_transactions([ledger_entry])
+                self.save_cash_data()
+        else:
+            self.save_cash_data()
         
+        self._notify_change()
         return ledger_entry
     
     def get_cash_balance(self):
@@ -164,6 +212,13 @@ class CashManager:
         self.cash_transactions.pop(transaction_index)
         
         # Save changes
-        self.save_cash_data()
+        if self.storage is not None:
+            with self.storage.batch():
+                self.storage.delete_cash_transaction(transaction_to_delete.get('timestamp', 0),
+                                                     description)
+                self.save_cash_data()
+        else:
+            self.save_cash_data()
         
+        self._notify_change()
         return True
@@ -0,0 +1,95 @@
+"""
+Change notification bus for MapleLegends ShopHelper
+Coalesces item database and cash changes and hands them to the widgets that show them
+"""
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Change types reported by ItemDatabase
+ITEM_CHANGES = ('added', 'updated', 'stock', 'renamed', 'deleted')
+LOG_APPENDED = 'logged'
+LOG_CORRECTED = 'log_corrected'
+LEDGER_APPENDED = 'ledger'
+LEDGER_DELETED = 'ledger_deleted'
+# Change type reported by CashManager
+CASH_CHANGED = 'cash'
+
+DEFAULT_DELAY_MS = 50
+
+
+class ChangeBus(QObject):
+    """Debounced fan-out of data change notifications on the UI thread
+    
+    Pass `post` to ItemDatabase.add_listener and CashManager.add_listener.
+    Posts from any thread are queued to the thread the bus lives on, then
+    collected for `delay_ms` after the first one. Each subscriber is
+    called once per change type it subscribed to, with the names from every
+    post of that type, so a burst of captures or a sale that touches stock
+    and the ledger costs one refresh per affected table.
+    
+    Subscribers should read the current state of the named items rather than
+    replaying the changes: a renamed item's old name is simply a name that no
+    longer exists.
+    """
+    
+    _posted = pyqtSignal(str, object)
+    
+    def __init__(self, delay_ms=DEFAULT_DELAY_MS, parent=None):
+        """Initialize the bus
+        
+        Args:
+            delay_ms: How long changes are collected before they are delivered
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self._subscribers = {}  # Change type -> callbacks in subscription order
+        self._pending = {}  # Change type -> item names, in first-posted order
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.flush)
+        
+        self._posted.connect(self._queue)
+    
+    def subscribe(self, changes, callback):
+        """Call a function when any of the given change types is delivered
+        
+        Args:
+            changes: Change type or tuple of change types
+            callback: Function called as callback(change, item_names)
+        """
+        if isinstance(changes, str):
+            changes = (changes,)
+        for change in changes:
+            self._subscribers.setdefault(change, []).append(callback)
+    
+    def post(self, change, item_names):
+        """Report a change; safe to call from any thread
+        
+        Args:
+            change: Change type
+            item_names: Names of the items involved
+        """
+        self._posted.emit(change, list(item_names))
+    
+    def _queue(self, change, item_names):
+        """Add a posted change to the pending batch"""
+        if change not in self._subscribers:
+            return
+        pending = self._pending.setdefault(change, {})
+        for name in item_names:
+            pending[name] = None
+        if not self._timer.isActive():
+            self._timer.start()
+    
+    def flush(self):
+        """Deliver the pending changes now"""
+        self._timer.stop()
+        pending, self._pending = self._pending, {}
+        for change, item_names in pending.items():
+            for callback in self._subscribers.get(change, []):
+                try:
+                    callback(change, list(item_names))
+                except Exception as e:
+                    print(f"Error handling {change} change: {e}")
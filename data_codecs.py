@@ -0,0 +1,124 @@
+"""
+On-disk encodings for MapleLegends ShopHelper data files
+Compact JSON by default, with optional orjson and MessagePack codecs
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(raw):
+    """Parse JSON text or bytes, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class JsonCodec:
+    """Compact standard-library JSON (the default)"""
+    
+    name = "json"
+    binary = False
+    
+    def encode(self, data):
+        """Encode a document to bytes"""
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+    
+    def decode(self, raw):
+        """Decode bytes written by encode"""
+        return json_loads(raw)
+
+
+class IndentedJsonCodec(JsonCodec):
+    """Indented JSON, as the data files were written before; easiest to read by hand"""
+    
+    name = "json-indent"
+    
+    def encode(self, data):
+        """Encode a document to bytes"""
+        return json.dumps(data, indent=2).encode('utf-8')
+
+
+class OrjsonCodec:
+    """Compact JSON through orjson, several times faster than the standard library
+    
+    The files are plain JSON, readable without orjson installed.
+    """
+    
+    name = "orjson"
+    binary = False
+    
+    def __init__(self):
+        """Import orjson, raising ImportError if it is not installed"""
+        import orjson
+        self.orjson = orjson
+    
+    def encode(self, data):
+        """Encode a document to bytes"""
+        return self.orjson.dumps(data)
+    
+    def decode(self, raw):
+        """Decode bytes written by encode"""
+        return self.orjson.loads(raw)
+
+
+class MsgpackCodec:
+    """MessagePack, the smallest files; needs msgpack installed to read them back"""
+    
+    name = "msgpack"
+    binary = True
+    
+    def __init__(self):
+        """Import msgpack, raising ImportError if it is not installed"""
+        import msgpack
+        self.msgpack = msgpack
+    
+    def encode(self, data):
+        """Encode a document to bytes"""
+        return self.msgpack.packb(data, use_bin_type=True)
+    
+    def decode(self, raw):
+        """Decode bytes written by encode"""
+        return self.msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+CODECS = {
+    'json': JsonCodec,
+    'json-indent': IndentedJsonCodec,
+    'orjson': OrjsonCodec,
+    'msgpack': MsgpackCodec
+}
+
+
+def create_codec(name="json"):
+    """Create a data file codec by name
+    
+    Args:
+        name: 'json', 'json-indent', 'orjson' or 'msgpack'
+    
+    Returns:
+        Codec instance
+    
+    Raises:
+        ValueError: Unknown codec name
+        ImportError: The codec's library is not installed
+    """
+    if name not in CODECS:
+        raise ValueError(f"Unknown data file codec: {name}")
+    return CODECS[name]()
+
+
+def available_codecs():
+    """Get the names of the codecs whose libraries are installed"""
+    names = []
+    for name in CODECS:
+        try:
+            create_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
@@ -0,0 +1,184 @@
+"""
+Hotkey handling for MapleLegends ShopHelper
+Dispatches key presses to actions through callbacks instead of polling the keyboard
+"""
+
+import time
+import threading
+from collections import deque
+
+CAPTURE = 'capture'
+CAPTURE_AND_SELL = 'capture_and_sell'
+REPEAT_LAST = 'repeat_last'
+
+ACTION_LABELS = {
+    CAPTURE: "Capture",
+    CAPTURE_AND_SELL: "Capture and Sell",
+    REPEAT_LAST: "Repeat Last Match"
+}
+
+DEFAULT_BINDINGS = {
+    CAPTURE: 'f7',
+    CAPTURE_AND_SELL: 'shift+f7',
+    REPEAT_LAST: 'f8'
+}
+
+
+class KeyboardBackend:
+    """Registers global hotkeys with the `keyboard` package"""
+    
+    def __init__(self):
+        import keyboard
+        self.keyboard = keyboard
+    
+    def add_hotkey(self, combo, callback):
+        """Register a callback for a key combination and return its handle"""
+        return self.keyboard.add_hotkey(combo, callback, suppress=False)
+    
+    def remove_hotkey(self, handle):
+        """Unregister a hotkey by handle"""
+        self.keyboard.remove_hotkey(handle)
+
+
+class SyntheticBackend:
+    """In-process event source for driving hotkeys without a keyboard hook
+    
+    Useful on Linux, where the `keyboard` package needs root, and for
+    scripted checks: press() fires the callbacks bound to a combination on
+    the calling thread.
+    """
+    
+    def __init__(self):
+        self.hotkeys = {}
+        self.next_handle = 0
+    
+    def add_hotkey(self, combo, callback):
+        """Register a callback for a key combination and return its handle"""
+        self.next_handle += 1
+        self.hotkeys[self.next_handle] = (combo.lower(), callback)
+        return self.next_handle
+    
+    def remove_hotkey(self, handle):
+        """Unregister a hotkey by handle"""
+        self.hotkeys.pop(handle, None)
+    
+    def press(self, combo):
+        """Simulate pressing a key combination
+        
+        Returns:
+            Number of callbacks fired
+        """
+        fired = 0
+        for bound_combo, callback in list(self.hotkeys.values()):
+            if bound_combo == combo.lower():
+                callback()
+                fired += 1
+        return fired
+
+
+class HotkeyManager:
+    """Maps key combinations to named actions and reports presses to a callback
+    
+    Presses arrive on the backend's thread. Each one is reported as
+    callback(action, pressed_at) where pressed_at is a time.perf_counter()
+    timestamp, so consumers can measure how long the capture took to start.
+    Repeats of the same action inside the debounce window (key auto-repeat
+    while held) are ignored.
+    """
+    
+    def __init__(self, callback, bindings=None, backend=None, debounce=0.3):
+        """Initialize the hotkey manager
+        
+        Args:
+            callback: Function called as callback(action, pressed_at)
+            bindings: Dictionary of action to key combination (defaults to DEFAULT_BINDINGS)
+            backend: Hotkey backend (defaults to KeyboardBackend)
+            debounce: Seconds during which repeated presses of one action are ignored
+        """
+        self.callback = callback
+        self.bindings = dict(DEFAULT_BINDINGS)
+        if bindings:
+            self.bindings.update(bindings)
+        self.backend = backend
+        self.debounce = debounce
+        self.handles = {}
+        self.last_press = {}
+        self.latencies = deque(maxlen=100)
+        self.lock = threading.Lock()
+    
+    def start(self):
+        """Register all bindings with the backend"""
+        if self.backend is None:
+            self.backend = KeyboardBackend()
+        for action in self.bindings:
+            self._register(action)
+    
+    def stop(self):
+        """Unregister all bindings"""
+        for action in list(self.handles):
+            self._unregister(action)
+    
+    def set_binding(self, action, combo):
+        """Change the key combination of an action
+        
+        Raises:
+            ValueError: If the action is unknown or the combination is invalid
+        """
+        if action not in self.bindings:
+            raise ValueError(f"Unknown hotkey action: {action}")
+        
+        old_combo = self.bindings[action]
+        was_registered = action in self.handles
+        self._unregister(action)
+        self.bindings[action] = combo
+        if was_registered:
+            try:
+                self._register(action)
+            except Exception:
+                # Restore the previous binding if the new one is rejected
+                self.bindings[action] = old_combo
+                self._register(action)
+                raise ValueError(f"Invalid hotkey: {combo}")
+    
+    def _register(self, action):
+        """Register one action's binding"""
+        self.handles[action] = self.backend.add_hotkey(
+            self.bindings[action], lambda a=action: self._on_press(a))
+    
+    def _unregister(self, action):
+        """Unregister one action's binding"""
+        handle = self.handles.pop(action, None)
+        if handle is not None:
+            self.backend.remove_hotkey(handle)
+    
+    def _on_press(self, action):
+        """Debounce a press and pass it on"""
+        pressed_at = time.perf_counter()
+        with self.lock:
+            last = self.last_press.get(action)
+            if last is not None and pressed_at - last < self.debounce:
+                return
+            self.last_press[action] = pressed_at
+        self.callback(action, pressed_at)
+    
+    def record_latency(self, seconds):
+        """Record the time from a key press to its capture"""
+        with self.lock:
+            self.latencies.append(seconds)
+    
+    def get_latency_stats(self):
+        """Get hotkey-to-capture latency statistics over recent presses
+        
+        Returns:
+            Dictionary with count, mean, p95 and max latency in seconds
+        """
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return {'count': 0, 'mean': 0, 'p95': 0, 'max': 0}
+        return {
+            'count': len(samples),
+            'mean': sum(samples) / len(samples),
+            'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'max': samples[-1]
+        }
@@ -5,27 +5,15 @@ Provides UI elements for inventory management and value tracking
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter, 
-    QTableWidget, QTableWidgetItem, QHeaderView,
+    QTableView, QAbstractItemView, QHeaderView,
     QPushButton, QLineEdit, QDialog, QFormLayout,
     QMessageBox, QSpinBox, QFrame, QSplitter,
     QDialogButtonBox, QMenu, QLabel, QComboBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QDate
+from PyQt6.QtCore import Qt, pyqtSignal, QDate, QSortFilterProxyModel
 from PyQt6.QtGui import QColor, QFont, QIntValidator, QAction
 
-
-class NumericSortItem(QTableWidgetItem):
-    """Custom table widget item that sorts correctly for large numeric values"""
-    
-    def __init__(self, text_value='', sort_value=0):
-        super().__init__(text_value)
-        self.sort_value = sort_value
-        
-    def __lt__(self, other):
-        """Override less than operator for correct numeric sorting"""
-        if isinstance(other, NumericSortItem):
-            return self.sort_value < other.sort_value
-        return super().__lt__(other)
+from table_models import InventoryTableModel, ButtonDelegate, SORT_ROLE
 
 
 class SetStockDialog(QDialog):
@@ -336,24 +324,32 @@ class InventoryWidget(QWidget):
         # Add filter layout to main layout
         self.layout.addLayout(filter_layout)
         
+        # Inventory model; the proxy filters by name and sorts on the raw values
+        self.model = InventoryTableModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SORT_ROLE)
+        self.proxy.setFilterRole(SORT_ROLE)
+        self.proxy.setFilterKeyColumn(0)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        
         # Create inventory table with dark mode styling
-        self.inventory_table = QTableWidget()
-        self.inventory_table.setColumnCount(6)  # Increased from 5 to 6 for Last Sold column
-        self.inventory_table.setHorizontalHeaderLabels(["Item Name", "Price", "Stock", "Value", "Last Sold", "Actions"])
+        self.inventory_table = QTableView()
+        self.inventory_table.setModel(self.proxy)
         
         # Dark mode styling for the table
         self.inventory_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #2D2D2D;
                 color: #E0E0E0;
                 gridline-color: #555555;
                 alternate-background-color: #353535;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 4px;
                 border-bottom: 1px solid #3D3D3D;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #505050;
                 color: #FFFFFF;
             }
@@ -387,15 +383,24 @@ class InventoryWidget(QWidget):
         self.inventory_table.setColumnWidth(5, 100)  # Actions
         
         # Set table properties
-        self.inventory_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.inventory_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.inventory_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.inventory_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.inventory_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.inventory_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.inventory_table.setAlternatingRowColors(True)
-        # Initially disable sorting - will be enabled after data is loaded
-        self.inventory_table.setSortingEnabled(False)
+        self.inventory_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.inventory_table.verticalHeader().setDefaultSectionSize(31)
         self.inventory_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         self.inventory_table.horizontalHeader().setSortIndicatorShown(True)
         
+        # Sort by value (highest first) until the user picks another column
+        self.inventory_table.setSortingEnabled(True)
+        self.inventory_table.sortByColumn(3, Qt.SortOrder.DescendingOrder)
+        
+        # Sell buttons are painted by a delegate instead of one widget per row
+        self.sell_delegate = ButtonDelegate("Sell", "#006600", self.inventory_table)
+        self.sell_delegate.clicked.connect(lambda index: self.show_mark_as_sold_dialog(self.source_row(index)))
+        self.inventory_table.setItemDelegateForColumn(5, self.sell_delegate)
+        
         # Connect double-click handler
         self.inventory_table.doubleClicked.connect(self.on_table_double_clicked)
         
@@ -405,185 +410,54 @@ class InventoryWidget(QWidget):
         
         # Add table to layout
         self.layout.addWidget(self.inventory_table)
-        
-        # Store data
-        self.all_data = []
-        self.filtered_data = []
     
     def update_inventory(self, inventory_data, stats):
-        """Update the inventory table with new data"""
-        # Store the original data
-        self.all_data = inventory_data
-        self.filtered_data = list(inventory_data)  # Make a copy for filtering
-        
-        # Update stats
-        self.update_stats(stats)
+        """Replace the inventory table contents"""
+        self.model.set_records(inventory_data)
         
-        # Reapply any current filter
-        self.filter_changed()
+        # Stats are shown for the filtered items
+        self.update_visible_stats()
+    
+    def update_items(self, items):
+        """Update or add the rows of the given inventory records"""
+        self.model.upsert(items)
+        self.update_visible_stats()
+    
+    def remove_items(self, item_names):
+        """Remove the rows of the given items"""
+        self.model.remove_keys(item_names)
+        self.update_visible_stats()
     
     def filter_changed(self):
         """Filter items based on the search text"""
-        filter_text = self.filter_edit.text().lower()
-        
-        # First filter by text
-        if filter_text:
-            self.filtered_data = [
-                item for item in self.all_data
-                if filter_text in item['name'].lower()
-            ]
-        else:
-            self.filtered_data = list(self.all_data)
-        
-        # Update display
-        self.update_table()
+        self.proxy.setFilterFixedString(self.filter_edit.text())
+        self.update_visible_stats()
     
-    def update_table(self):
-        """Update the table with filtered data"""
-        self.inventory_table.setSortingEnabled(False)  # Disable sorting while updating
-        self.inventory_table.setRowCount(len(self.filtered_data))
-        
-        total_value = 0
+    def source_row(self, index):
+        """Get the model row shown at a view index"""
+        return self.proxy.mapToSource(index).row()
+    
+    def update_visible_stats(self):
+        """Update the statistics for the items that pass the filter"""
+        filter_text = self.filter_edit.text().lower()
+        total_items = 0
         items_with_stock = 0
+        total_value = 0
         
-        for i, item in enumerate(self.filtered_data):
-            name = item.get('name', '')
-            price = item.get('price', 0)
+        for item in self.model.records:
+            if filter_text and filter_text not in item.get('name', '').lower():
+                continue
             stock = item.get('stock', 0)
-            value = price * stock
-            total_value += value
-            
+            total_items += 1
+            total_value += item.get('price', 0) * stock
             if stock > 0:
                 items_with_stock += 1
-                
-            # Check if price reduction is recommended
-            price_adjustment = item.get('price_adjustment', {})
-            price_reduction_recommended = price_adjustment.get('recommended', False)
-            
-            # Item name column
-            name_item = QTableWidgetItem(name)
-            
-            # Store the original index in the filtered_data list as user data
-            name_item.setData(Qt.ItemDataRole.UserRole, i)
-            
-            # Mark item name if price adjustment is recommended
-            if price_reduction_recommended:
-                name_item.setForeground(QColor(255, 200, 0))  # Amber color for items that need price adjustment
-                # Add a small indicator
-                name_with_indicator = f"⚠ {name}"  
-                name_item.setText(name_with_indicator)
-                
-                # Set tooltip with recommendation details
-                reason = price_adjustment.get('reason', '')
-                suggested_price = price_adjustment.get('suggested_price', price)
-                days = int(price_adjustment.get('last_sale_days', 0))
-                
-                tooltip = (f"Price reduction recommended: {reason}\n"
-                          f"Current price: {format(price, ',')}\n"
-                          f"Suggested price: {format(suggested_price, ',')}\n"
-                          f"Days since last sale: {days}")
-                name_item.setToolTip(tooltip)
-            
-            self.inventory_table.setItem(i, 0, name_item)
-            
-            # Price column with number formatting using custom sorting item
-            price_text = format(price, ",")
-            if price_reduction_recommended:
-                # Display just the current price, but keep the yellow highlighting
-                price_item = NumericSortItem(price_text, price)
-                price_item.setForeground(QColor(255, 200, 0))  # Amber color
-                font = QFont()
-                font.setBold(True)
-                price_item.setFont(font)
-            else:
-                price_item = NumericSortItem(price_text, price)
-                price_item.setForeground(QColor(150, 200, 255))  # Light blue for prices
-                
-            price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.inventory_table.setItem(i, 1, price_item)
-            
-            # Stock column using custom sorting item
-            stock_text = str(stock)
-            stock_item = NumericSortItem(stock_text, stock)
-            stock_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            
-            # Color code stock values
-            if stock > 0:
-                if price_reduction_recommended:
-                    stock_item.setForeground(QColor(255, 200, 0))  # Amber
-                else:
-                    stock_item.setForeground(QColor(80, 200, 120))  # Bright green
-                
-                font = QFont()
-                font.setBold(True)
-                stock_item.setFont(font)
-            
-            self.inventory_table.setItem(i, 2, stock_item)
-            
-            # Value column with number formatting using custom sorting item
-            value_text = format(value, ",")
-            value_item = NumericSortItem(value_text, value)
-            value_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            
-            # Style based on stock
-            if stock > 0:
-                if price_reduction_recommended:
-                    # Show value in amber for price reduction items
-                    value_item.setForeground(QColor(255, 200, 0))  # Amber
-                else:
-                    value_item.setForeground(QColor(150, 255, 150))  # Light green for normal value
-                
-                font = QFont()
-                font.setBold(True)
-                value_item.setFont(font)
-            
-            self.inventory_table.setItem(i, 3, value_item)
-            
-            # Last Sold column
-            last_sold_text = item.get('last_sold', '')
-            last_sold_item = QTableWidgetItem(last_sold_text)
-            last_sold_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.inventory_table.setItem(i, 4, last_sold_item)
-            
-            # Add sell button to Actions column
-            widget = QWidget()
-            layout = QHBoxLayout(widget)
-            layout.setContentsMargins(2, 2, 2, 2)
-            
-            # Create sell button with dark mode styling
-            sell_button = QPushButton("Sell")
-            sell_button.setStyleSheet("""
-                background-color: #006600; 
-                color: white; 
-                font-weight: bold; 
-                padding: 3px;
-                border: none;
-                border-radius: 3px;
-            """)
-            sell_button.setFixedSize(60, 25)
-            
-            # Connect button to function with row information
-            sell_button.clicked.connect(lambda checked=False, row=i: self.show_mark_as_sold_dialog(row))
-            
-            # Add button to layout and layout to widget
-            layout.addWidget(sell_button)
-            layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            widget.setLayout(layout)
-            
-            # Set the widget in the table
-            self.inventory_table.setCellWidget(i, 5, widget)
         
-        # Update stats
-        stats = {
-            'total_items': len(self.filtered_data),
+        self.update_stats({
+            'total_items': total_items,
             'items_with_stock': items_with_stock,
             'total_value': total_value
-        }
-        self.update_stats(stats)
-        
-        # Re-enable sorting and set default sort to value column (descending)
-        self.inventory_table.setSortingEnabled(True)
-        self.inventory_table.horizontalHeader().setSortIndicator(3, Qt.SortOrder.DescendingOrder)
+        })
     
     def update_stats(self, stats):
         """Update the inventory statistics display"""
@@ -601,17 +475,9 @@ class InventoryWidget(QWidget):
         index = self.inventory_table.indexAt(position)
         if not index.isValid():
             return
-            
-        # Get the row index in the table
-        row = index.row()
         
-        # Get the original index from the UserRole data in the first column
-        item = self.inventory_table.item(row, 0)
-        if not item:
-            return
-            
-        # Get the original index in filtered_data that we stored in UserRole
-        original_index = item.data(Qt.ItemDataRole.UserRole)
+        # Get the model row of the item
+        original_index = self.source_row(index)
         
         # Create menu
         menu = QMenu(self)
@@ -630,9 +496,9 @@ class InventoryWidget(QWidget):
         """)
         
         # Add actions if we have a valid row
-        if original_index is not None and original_index >= 0 and original_index < len(self.filtered_data):
+        if original_index >= 0 and original_index < len(self.model.records):
             # Get stock
-            stock = self.filtered_data[original_index].get('stock', 0)
+            stock = self.model.records[original_index].get('stock', 0)
             
             # Set stock action
             set_stock_action = QAction("Set Stock Level...", self)
@@ -658,8 +524,8 @@ class InventoryWidget(QWidget):
     
     def open_set_stock_dialog(self, row):
         """Open dialog to set stock for an item"""
-        if row >= 0 and row < len(self.filtered_data):
-            item = self.filtered_data[row]
+        if row >= 0 and row < len(self.model.records):
+            item = self.model.records[row]
             item_name = item.get('name', '')
             current_stock = item.get('stock', 0)
             price = item.get('price', 0)
@@ -674,8 +540,8 @@ class InventoryWidget(QWidget):
     
     def show_mark_as_sold_dialog(self, row):
         """Show dialog to mark item as sold"""
-        if row >= 0 and row < len(self.filtered_data):
-            item = self.filtered_data[row]
+        if row >= 0 and row < len(self.model.records):
+            item = self.model.records[row]
             item_name = item.get('name', '')
             current_stock = item.get('stock', 0)
             price = item.get('price', 0)
@@ -792,8 +658,8 @@ class InventoryWidget(QWidget):
                 
     def mark_as_sold(self, row, quantity, selling_price=None):
         """Mark item as sold, reducing stock by the given quantity"""
-        if row >= 0 and row < len(self.filtered_data):
-            item = self.filtered_data[row]
+        if row >= 0 and row < len(self.model.records):
+            item = self.model.records[row]
             item_name = item.get('name', '')
             current_stock = item.get('stock', 0)
             default_price = item.get('price', 0)
@@ -806,22 +672,14 @@ class InventoryWidget(QWidget):
             quantity = min(current_stock, max(1, quantity))
             
             if quantity > 0 and quantity <= current_stock:
-                # Calculate new stock
-                new_stock = current_stock - quantity
-                
-                # Update the filtered data
-                self.filtered_data[row]['stock'] = new_stock
-                
-                # Emit signal with item name, quantity and selling price
+                # Emit signal with item name, quantity and selling price; the row
+                # updates when the database reports the new stock
                 self.item_sold.emit(item_name, quantity, selling_price)
-                
-                # Refresh the table to ensure correct display
-                self.update_table()
-
+    
     def show_decrease_price_dialog(self, row):
         """Show dialog to decrease item price by percentage"""
-        if row >= 0 and row < len(self.filtered_data):
-            item = self.filtered_data[row]
+        if row >= 0 and row < len(self.model.records):
+            item = self.model.records[row]
             item_name = item.get('name', '')
             current_price = item.get('price', 0)
             
@@ -835,15 +693,8 @@ class InventoryWidget(QWidget):
 
     def on_table_double_clicked(self, index):
         """Handle double-click on an inventory item"""
-        row = index.row()
-        
-        # Get the original index from the UserRole data in the first column
-        item = self.inventory_table.item(row, 0)
-        if not item:
+        # The Actions column has its own button
+        if index.column() == 5:
             return
-            
-        # Get the original index in filtered_data that we stored in UserRole
-        original_index = item.data(Qt.ItemDataRole.UserRole)
         
-        if original_index is not None and original_index >= 0 and original_index < len(self.filtered_data):
-            self.open_set_stock_dialog(original_index)
+        self.open_set_stock_dialog(self.source_row(index))
@@ -7,28 +7,457 @@ Provides fuzzy matching capabilities for OCR results
 import os
 import json
 import time
+import threading
 from difflib import SequenceMatcher
-from fuzzywuzzy import fuzz, process
+from fuzzywuzzy import fuzz, process, utils
+from ledger_journal import LedgerJournal, find_entry
+from persistence import PersistenceManager, CorruptFileError, load_document
+from data_codecs import create_codec
+
+LOG_PATH = "recent_logs.json"
+
+# Lowest lexicon decoding score a name is accepted at. One misread letter in
+# a six letter name scores 83 and two in a ten letter name 80, while tooltip
+# lines that are not item names decode to the nearest name at 75 or less
+LEXICON_MIN_SCORE = 80
+
+
+def tokenize_name(text):
+    """Split text into the same tokens fuzz.token_set_ratio uses
+    
+    Args:
+        text: Item name or OCR text
+    
+    Returns:
+        Set of lowercase alphanumeric tokens
+    """
+    return set(utils.full_process(text, force_ascii=True).split())
+
+
+def token_set_score(query_tokens, item_tokens):
+    """Score two pre-tokenized strings exactly like fuzz.token_set_ratio
+    
+    Args:
+        query_tokens: Token set of the query text
+        item_tokens: Token set of the item name
+    
+    Returns:
+        Integer score from 0 to 100
+    """
+    if not query_tokens or not item_tokens:
+        return 0
+    
+    intersection = query_tokens & item_tokens
+    sorted_sect = " ".join(sorted(intersection))
+    combined_1to2 = (sorted_sect + " " + " ".join(sorted(query_tokens - item_tokens))).strip()
+    combined_2to1 = (sorted_sect + " " + " ".join(sorted(item_tokens - query_tokens))).strip()
+    
+    return max(
+        fuzz.ratio(sorted_sect, combined_1to2),
+        fuzz.ratio(sorted_sect, combined_2to1),
+        fuzz.ratio(combined_1to2, combined_2to1)
+    )
+
+
+class FuzzywuzzyBackend:
+    """Fuzzy scoring through fuzzywuzzy's token_set_ratio (the original matcher)"""
+    
+    name = "fuzzywuzzy"
+    
+    def extract_one(self, query, choices, score_cutoff=0, token_sets=None):
+        """Find the best scoring choice for a query
+        
+        Args:
+            query: Text to match
+            choices: Candidate names
+            score_cutoff: Minimum score to accept
+            token_sets: Optional name -> token set map to skip re-tokenizing choices
+        
+        Returns:
+            Tuple of (name, score), or (None, 0) if nothing reaches the cutoff
+        """
+        if not choices:
+            return None, 0
+        
+        if token_sets is not None:
+            query_tokens = tokenize_name(query)
+            best_name, best_score = None, 0
+            for choice in choices:
+                score = token_set_score(query_tokens, token_sets[choice])
+                if score > best_score:
+                    best_name, best_score = choice, score
+        else:
+            best_name, best_score = process.extractOne(query, choices, scorer=fuzz.token_set_ratio)
+        
+        if best_name is None or best_score < score_cutoff:
+            return None, 0
+        return best_name, best_score
+    
+    def extract_one_batch(self, queries, choices, score_cutoff=0, token_sets=None):
+        """Find the best scoring choice for every query
+        
+        Returns:
+            List of (name, score) tuples in the order of queries
+        """
+        return [self.extract_one(query, choices, score_cutoff, token_sets) for query in queries]
+    
+    def extract(self, query, choices, limit=10):
+        """Get the top scoring choices for a query
+        
+        Returns:
+            List of (name, score) tuples, best first
+        """
+        return process.extract(query, choices, scorer=fuzz.token_set_ratio, limit=limit)
+
+
+class RapidfuzzBackend:
+    """Fuzzy scoring through rapidfuzz's compiled token_set_ratio
+    
+    Scores are rounded to integers and agree with FuzzywuzzyBackend (with
+    python-Levenshtein installed, as pinned in requirements.txt) to within
+    1 point. fuzzywuzzy's pure-Python difflib fallback can differ by a few
+    points more on heavily garbled text.
+    """
+    
+    name = "rapidfuzz"
+    
+    def __init__(self):
+        """Import rapidfuzz, raising ImportError if it is not installed"""
+        from rapidfuzz import fuzz as rf_fuzz, process as rf_process, utils as rf_utils
+        self.scorer = rf_fuzz.token_set_ratio
+        self.process = rf_process
+        self.processor = rf_utils.default_process
+    
+    def extract_one(self, query, choices, score_cutoff=0, token_sets=None):
+        """Find the best scoring choice for a query (see FuzzywuzzyBackend.extract_one)"""
+        if not choices:
+            return None, 0
+        
+        result = self.process.extractOne(
+            query, choices, scorer=self.scorer,
+            processor=self.processor, score_cutoff=score_cutoff
+        )
+        if result is None:
+            return None, 0
+        return result[0], int(round(result[1]))
+    
+    def extract_one_batch(self, queries, choices, score_cutoff=0, token_sets=None):
+        """Score every query against every choice in one compiled call
+        
+        Returns:
+            List of (name, score) tuples in the order of queries
+        """
+        if not queries:
+            return []
+        if not choices:
+            return [(None, 0) for _ in queries]
+        
+        choices = list(choices)
+        scores = self.process.cdist(
+            queries, choices, scorer=self.scorer,
+            processor=self.processor, score_cutoff=score_cutoff, workers=-1
+        )
+        
+        results = []
+        for row in scores:
+            best = int(row.argmax())
+            score = int(round(float(row[best])))
+            if score > 0 and score >= score_cutoff:
+                results.append((choices[best], score))
+            else:
+                results.append((None, 0))
+        return results
+    
+    def extract(self, query, choices, limit=10):
+        """Get the top scoring choices for a query (see FuzzywuzzyBackend.extract)"""
+        matches = self.process.extract(
+            query, choices, scorer=self.scorer,
+            processor=self.processor, limit=limit
+        )
+        return [(match[0], int(round(match[1]))) for match in matches]
+
+
+FUZZY_BACKENDS = {
+    'fuzzywuzzy': FuzzywuzzyBackend,
+    'rapidfuzz': RapidfuzzBackend
+}
+
+
+def create_fuzzy_backend(name="auto"):
+    """Create a fuzzy matching backend by name
+    
+    Args:
+        name: 'rapidfuzz', 'fuzzywuzzy', or 'auto' to prefer rapidfuzz when installed
+    
+    Returns:
+        Backend instance
+    """
+    if name == "auto":
+        try:
+            return RapidfuzzBackend()
+        except ImportError:
+            return FuzzywuzzyBackend()
+    
+    if name not in FUZZY_BACKENDS:
+        raise ValueError(f"Unknown fuzzy backend: {name}")
+    return FUZZY_BACKENDS[name]()
+
+
+class ItemNameIndex:
+    """Incrementally maintained lookup structures over the item names
+    
+    Keeps a lowercase name map for exact hits, the token set of every name
+    so it is never re-tokenized per query, and a token -> names inverted
+    index used to shortlist candidates before full fuzzy scoring. The
+    prefix trie for lexicon decoding is built on first use and kept up to
+    date from then on.
+    
+    The shortlist can miss the best name when the query's only correct
+    tokens are common ones, so a shortlist result scoring below
+    `full_scan_below` (or the caller's minimum score, if higher) is checked
+    against every name. By default only a perfect score is trusted, which
+    keeps match scores equal to scoring the whole catalogue; a lower value
+    skips more full scans at the cost of sometimes settling for a worse
+    name (`python benchmarks.py matching` measures both).
+    """
+    
+    def __init__(self, shortlist_size=50, full_scan_below=100):
+        """Initialize an empty index
+        
+        Args:
+            shortlist_size: Maximum number of candidates scored per query
+            full_scan_below: Shortlist scores below this fall back to scoring every name
+        """
+        self.shortlist_size = shortlist_size
+        self.full_scan_below = full_scan_below
+        self.exact = {}      # lowercase name -> [names]
+        self.tokens = {}     # name -> frozenset of tokens
+        self.postings = {}   # token -> set of names
+        self.trie = None     # NameTrie, once lexicon decoding has used it
+    
+    def rebuild(self, names):
+        """Rebuild the index from scratch"""
+        self.exact = {}
+        self.tokens = {}
+        self.postings = {}
+        if self.trie is not None:
+            from ocr_lexicon import NameTrie
+            self.trie = NameTrie()
+        for name in names:
+            self.add(name)
+    
+    def add(self, name):
+        """Add a name to the index"""
+        if name in self.tokens:
+            return
+        
+        self.exact.setdefault(name.lower(), []).append(name)
+        
+        tokens = frozenset(tokenize_name(name))
+        self.tokens[name] = tokens
+        for token in tokens:
+            self.postings.setdefault(token, set()).add(name)
+        
+        if self.trie is not None:
+            self.trie.add(name)
+    
+    def remove(self, name):
+        """Remove a name from the index"""
+        tokens = self.tokens.pop(name, None)
+        if tokens is None:
+            return
+        
+        if self.trie is not None:
+            self.trie.remove(name)
+        
+        key = name.lower()
+        names = self.exact.get(key, [])
+        if name in names:
+            names.remove(name)
+        if not names:
+            self.exact.pop(key, None)
+        
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.discard(name)
+                if not posting:
+                    del self.postings[token]
+    
+    def rename(self, old_name, new_name):
+        """Move an index entry to a new name"""
+        self.remove(old_name)
+        self.add(new_name)
+    
+    def get_trie(self):
+        """Get the prefix trie of the names, building it on first use"""
+        if self.trie is None:
+            # Imported on first use, keeping numpy out of startup
+            from ocr_lexicon import NameTrie
+            self.trie = NameTrie(self.tokens)
+        return self.trie
+    
+    def find_exact(self, text):
+        """Find a name equal to text ignoring case, or None"""
+        names = self.exact.get(text.lower())
+        return names[0] if names else None
+    
+    def shortlist(self, query_tokens):
+        """Pick the candidate names worth fully scoring for a query
+        
+        Rare tokens are consulted first. Very common tokens ("scroll", "for")
+        are only used when nothing rarer matched, so the work per query
+        stays bounded as the catalogue grows.
+        
+        Args:
+            query_tokens: Token set of the query text
+        
+        Returns:
+            List of candidate names, best token overlap first
+        """
+        total = len(self.tokens)
+        common_limit = max(self.shortlist_size, total // 5)
+        
+        postings = [self.postings[token] for token in query_tokens if token in self.postings]
+        postings.sort(key=len)
+        
+        overlap = {}
+        for posting in postings:
+            if overlap and len(posting) > common_limit:
+                break
+            weight = 1.0 / len(posting)
+            for name in posting:
+                overlap[name] = overlap.get(name, 0) + weight
+        
+        ranked = sorted(overlap, key=overlap.get, reverse=True)
+        return ranked[:self.shortlist_size]
+    
+    def needs_full_scan(self, match, score, min_score=0):
+        """Check whether a shortlist result should be confirmed against every name"""
+        return match is None or score < max(min_score, self.full_scan_below)
+    
+    def best_match(self, text, backend, min_score=0):
+        """Find the best fuzzy match for text, shortlisting names first
+        
+        Args:
+            text: Query text
+            backend: Fuzzy backend used for scoring
+            min_score: Minimum score the caller accepts
+        
+        Returns:
+            Tuple of (name, score), or (None, 0) if the index is empty
+        """
+        candidates = self.shortlist(tokenize_name(text))
+        match, score = backend.extract_one(text, candidates, token_sets=self.tokens)
+        if self.needs_full_scan(match, score, min_score):
+            full_match, full_score = backend.extract_one(text, list(self.tokens), token_sets=self.tokens)
+            if full_match is not None and (match is None or full_score > score):
+                match, score = full_match, full_score
+        return match, score
+
+
+def summarize_sales(entries):
+    """Build per-item sales totals in a single pass over ledger entries
+    
+    Args:
+        entries: Iterable of ledger entries
+    
+    Returns:
+        Dictionary of item name to {'last_sale', 'sales', 'units', 'revenue'}
+    """
+    summary = {}
+    for entry in entries:
+        if entry.get('transaction_type') == 'sale':
+            record_sale(summary, entry)
+    return summary
+
+
+def record_sale(summary, entry):
+    """Add one sale ledger entry to a sales summary"""
+    item_summary = summary.get(entry.get('item_name'))
+    if item_summary is None:
+        item_summary = {'last_sale': None, 'sales': 0, 'units': 0, 'revenue': 0}
+        summary[entry.get('item_name')] = item_summary
+    
+    timestamp = entry.get('timestamp', 0)
+    if item_summary['last_sale'] is None or timestamp > item_summary['last_sale']:
+        item_summary['last_sale'] = timestamp
+    item_summary['sales'] += 1
+    item_summary['units'] += entry.get('quantity') or 0
+    item_summary['revenue'] += entry.get('value') or 0
+
 
 class ItemDatabase:
     """Manages a local database of items and provides fuzzy matching capabilities"""
     
-    def __init__(self, db_path="items_database.json"):
-        """Initialize the item database with the given path"""
+    def __init__(self, db_path="items_database.json", fuzzy_backend="auto", storage=None, codec="json"):
+        """Initialize the item database with the given path
+        
+        Args:
+            db_path: Path to the items data file
+            fuzzy_backend: Fuzzy matching backend ('auto', 'rapidfuzz' or 'fuzzywuzzy')
+            storage: Optional SQLiteStorage to use instead of the data files
+            codec: Data file format ('json', 'json-indent', 'orjson' or 'msgpack');
+                files are read in whatever format they were written in
+        """
         self.db_path = db_path
+        self.storage = storage
         self.items = {}
         self.recently_logged = []
-        self.ledger_entries = []  # Track all stock changes
+        self.ledger_entries = []  # Track all stock changes, oldest first
+        self.sales_summary = {}  # Per-item sales totals, kept in step with the ledger
+        self.listeners = []  # Callbacks notified of item changes
+        # The OCR worker matches and logs while the UI thread edits, and the
+        # persistence writer snapshots, so every access to the data holds this
+        self.lock = threading.RLock()
+        self.ledger_journal = LedgerJournal()
+        self.name_index = ItemNameIndex()  # Lookup structures for match_item
+        self.fuzzy = create_fuzzy_backend(fuzzy_backend)
+        
+        try:
+            self.codec = create_codec(codec)
+        except ImportError:
+            print(f"Data file format '{codec}' is not installed, using JSON")
+            self.codec = create_codec("json")
+        
+        # Data files are written behind the changes; SQLite commits each change itself
+        self.persistence = PersistenceManager(codec=self.codec)
+        self.persistence.register('items', db_path, self._items_snapshot)
+        self.persistence.register('logs', LOG_PATH, self._logs_snapshot)
+        
+        if self.storage is not None:
+            # Import the JSON files the first time the SQLite database is used
+            counts = self.storage.migrate_from_json(items_path=db_path)
+            if counts:
+                print(f"Migrated JSON data to {self.storage.db_path}: {counts}")
+        
         self.load_database()
         self.load_logs()
         self.load_ledger()
     
     def load_database(self):
-        """Load the database from the JSON file"""
-        if os.path.exists(self.db_path):
-            try:
-                with open(self.db_path, 'r') as f:
-                    data = json.load(f)
+        """Load the database from the JSON file or the SQLite storage"""
+        with self.lock:
+            if self.storage is not None:
+                self.items = self.storage.load_items()
+                if not self.items and not self.storage.get_meta('items_seeded'):
+                    self.items = self._load_template_items()
+                    self.save_items()
+                    self.storage.set_meta('items_seeded', 1)
+            else:
+                try:
+                    # Falls back to the newest backup if the file is torn or corrupt
+                    data = load_document(self.db_path)
+                except CorruptFileError as e:
+                    print(f"Error loading database: {e}")
+                    # Start empty rather than from the template; the file is kept as .corrupt
+                    data = {'items': {}}
+                
+                if data is None:
+                    # If main database doesn't exist, try to load from template
+                    self.items = self._load_template_items()
+                    self.save_items()
+                else:
                     items_data = data.get('items', {})
                     
                     # Handle both old and new database formats
@@ -47,75 +476,111 @@ class ItemDatabase:
                                 'added_date': time.time(),
                                 'stock': 0
                             }
-            except Exception as e:
-                print(f"Error loading database: {e}")
-                # Create empty database if loading fails
-                self.items = {}
-        else:
-            # If main database doesn't exist, try to load from template
-            template_path = "items_database_template.json"
-            if os.path.exists(template_path):
-                try:
-                    print(f"Main database not found. Loading from template: {template_path}")
-                    with open(template_path, 'r') as f:
-                        data = json.load(f)
-                        self.items = data.get('items', {})
-                    # Save to the main database file
-                    self.save_items()
-                    print(f"Created new database from template.")
-                except Exception as e:
-                    print(f"Error loading template database: {e}")
-                    # Create empty database if loading template fails
-                    self.items = {}
-                    self.save_items()
-            else:
-                # Create empty database if neither file exists
-                print("Creating new empty database.")
-                self.items = {}
-                self.save_items()
-    
-    def save_items(self):
-        """Save the database to the JSON file"""
-        data = {
-            'items': self.items,
-            'last_updated': time.time()
-        }
+            
+            # Index the loaded names for matching
+            self.name_index.rebuild(self.items)
+    
+    def _load_template_items(self, template_path="items_database_template.json"):
+        """Load the starter items from the template database
+        
+        Returns:
+            Dictionary of template items, empty if the template is missing or unreadable
+        """
+        if not os.path.exists(template_path):
+            # Create empty database if neither file exists
+            print("Creating new empty database.")
+            return {}
         try:
-            with open(self.db_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            print(f"Main database not found. Loading from template: {template_path}")
+            with open(template_path, 'r') as f:
+                data = json.load(f)
+            print(f"Created new database from template.")
+            return data.get('items', {})
         except Exception as e:
-            print(f"Error saving database: {e}")
+            print(f"Error loading template database: {e}")
+            # Create empty database if loading template fails
+            return {}
+    
+    def save_items(self, changed=None):
+        """Save the database
+        
+        Args:
+            changed: Names of the items that were added, updated or removed.
+                The SQLite storage only writes these rows; the JSON file is
+                rewritten in full by the persistence writer once edits settle.
+        """
+        with self.lock:
+            if self.storage is not None:
+                try:
+                    if changed is None:
+                        self.storage.replace_items(self.items)
+                    else:
+                        with self.storage.batch():
+                            self.storage.save_items({name: self.items[name] for name in changed
+                                                     if name in self.items})
+                            self.storage.delete_items([name for name in changed
+                                                       if name not in self.items])
+                except Exception as e:
+                    print(f"Error saving database: {e}")
+                return
+            
+            self.persistence.mark_dirty('items')
+    
+    def _items_snapshot(self):
+        """Copy the items for the persistence writer thread"""
+        with self.lock:
+            items = {name: dict(item) if isinstance(item, dict) else item
+                     for name, item in self.items.items()}
+            return {
+                'items': items,
+                'last_updated': time.time()
+            }
+    
+    def flush(self):
+        """Write any JSON changes that are still waiting to be saved"""
+        self.persistence.flush()
+    
+    def close(self):
+        """Save pending changes and stop the persistence writer; call on shutdown"""
+        self.persistence.close()
+    
+    def get_persistence_stats(self):
+        """Get write counts and bytes written by the JSON persistence"""
+        return self.persistence.get_stats()
     
     def add_item(self, item_name, price, stock=0):
         """Add a new item to the database"""
-        if not item_name:
-            return None
+        with self.lock:
+            if not item_name:
+                return None
             
-        # Ensure price is a number
-        try:
-            price = int(price) if isinstance(price, str) and price.isdigit() else int(price)
-        except (TypeError, ValueError):
-            # Default to 0 if conversion fails
-            price = 0
+            # Ensure price is a number
+            try:
+                price = int(price) if isinstance(price, str) and price.isdigit() else int(price)
+            except (TypeError, ValueError):
+                # Default to 0 if conversion fails
+                price = 0
             
-        # Ensure stock is a number
-        try:
-            stock = int(stock) if isinstance(stock, str) and stock.isdigit() else int(stock)
-        except (TypeError, ValueError):
-            # Default to 0 if conversion fails
-            stock = 0
+            # Ensure stock is a number
+            try:
+                stock = int(stock) if isinstance(stock, str) and stock.isdigit() else int(stock)
+            except (TypeError, ValueError):
+                # Default to 0 if conversion fails
+                stock = 0
             
-        # Add to the database with the original structure
-        self.items[item_name] = {
-            'price': price,
-            'added_date': time.time(),
-            'stock': stock
-        }
-        
-        # Save the database
-        self.save_items()
-        
-        return item_name
+            # Add to the database with the original structure
+            self.items[item_name] = {
+                'price': price,
+                'added_date': time.time(),
+                'stock': stock
+            }
+            self.name_index.add(item_name)
+            
+            # Save the database
+            self.save_items([item_name])
+            self._notify_change('added', [item_name])
+            
+            return item_name
     
     def update_item(self, item_name, price, new_name=None, stock=None):
         """Update an existing item's price and optionally rename it
@@ -129,126 +594,317 @@ class ItemDatabase:
         Returns:
             True if successful, False otherwise
         """
-        if item_name in self.items:
-            # Ensure price is a number
-            try:
-                price = int(price) if isinstance(price, str) and price.isdigit() else int(price)
-            except (TypeError, ValueError):
-                # Default to 0 if conversion fails
-                price = 0
-            
-            # If we're renaming the item
-            if new_name and new_name != item_name:
-                # Create a new entry with the old item's data
-                item_data = self.items[item_name].copy()
-                item_data['price'] = price
-                item_data['last_updated'] = time.time()
-                
-                # Update stock if provided
-                if stock is not None:
-                    try:
-                        item_data['stock'] = int(stock)
-                    except (TypeError, ValueError):
-                        pass  # Keep existing stock value
+        with self.lock:
+            if item_name in self.items:
+                # Ensure price is a number
+                try:
+                    price = int(price) if isinstance(price, str) and price.isdigit() else int(price)
+                except (TypeError, ValueError):
+                    # Default to 0 if conversion fails
+                    price = 0
                 
-                # Add the new item
-                self.items[new_name] = item_data
+                # If we're renaming the item
+                if new_name and new_name != item_name:
+                    # Create a new entry with the old item's data
+                    item_data = self.items[item_name].copy()
+                    item_data['price'] = price
+                    item_data['last_updated'] = time.time()
+                    
+                    # Update stock if provided
+                    if stock is not None:
+                        try:
+                            item_data['stock'] = int(stock)
+                        except (TypeError, ValueError):
+                            pass  # Keep existing stock value
+                    
+                    # Add the new item
+                    self.items[new_name] = item_data
+                    
+                    # Remove the old item
+                    del self.items[item_name]
+                    self.name_index.rename(item_name, new_name)
+                else:
+                    # Just update the price on the existing item
+                    self.items[item_name]['price'] = price
+                    self.items[item_name]['last_updated'] = time.time()
+                    
+                    # Update stock if provided
+                    if stock is not None:
+                        try:
+                            self.items[item_name]['stock'] = int(stock)
+                        except (TypeError, ValueError):
+                            pass  # Keep existing stock value
                 
-                # Remove the old item
-                del self.items[item_name]
-            else:
-                # Just update the price on the existing item
-                self.items[item_name]['price'] = price
-                self.items[item_name]['last_updated'] = time.time()
+                # Save the database
+                if new_name and new_name != item_name:
+                    self.save_items([item_name, new_name])
+                    self._notify_change('renamed', [item_name, new_name])
+                else:
+                    self.save_items([item_name])
+                    self._notify_change('updated', [item_name])
                 
-                # Update stock if provided
-                if stock is not None:
-                    try:
-                        self.items[item_name]['stock'] = int(stock)
-                    except (TypeError, ValueError):
-                        pass  # Keep existing stock value
-            
-            # Save the database
-            self.save_items()
-            
-            return True
-        return False
+                return True
+            return False
     
     def delete_item(self, item_name):
         """Delete an item from the database"""
-        if item_name in self.items:
-            del self.items[item_name]
-            self.save_items()
-            return True
-        return False
+        with self.lock:
+            if item_name in self.items:
+                del self.items[item_name]
+                self.name_index.remove(item_name)
+                self.save_items([item_name])
+                self._notify_change('deleted', [item_name])
+                return True
+            return False
+    
+    def add_listener(self, callback):
+        """Register a callback for item changes
+        
+        The callback is called as callback(change, item_names) on the thread
+        that made the change. change is one of 'added', 'updated', 'renamed'
+        (item_names holds the old and new name), 'deleted' or 'stock' for
+        items, 'logged' or 'log_corrected' for the recent logs, and 'ledger'
+        (an entry was appended) or 'ledger_deleted' for the ledger. The
+        database lock is held during the call, so the callback must not wait
+        on another thread that uses the database.
+        """
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Unregister an item change callback"""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def _notify_change(self, change, item_names):
+        """Tell listeners that items changed"""
+        for callback in list(self.listeners):
+            try:
+                callback(change, item_names)
+            except Exception as e:
+                print(f"Error in item change listener: {e}")
     
     def get_item(self, item_name):
         """Get an item by exact name"""
-        return self.items.get(item_name, None)
+        with self.lock:
+            return self.items.get(item_name, None)
+    
+    def set_codec(self, name):
+        """Switch the data file format; the files are rewritten on the next save
+        
+        Args:
+            name: 'json', 'json-indent', 'orjson' or 'msgpack'
+        
+        Returns:
+            Name of the format now in use
+        
+        Raises:
+            ImportError: The format's library is not installed
+        """
+        with self.lock:
+            self.codec = create_codec(name)
+            if self.storage is None:
+                self.persistence.set_codec(self.codec)
+            return self.codec.name
+    
+    def set_fuzzy_backend(self, name):
+        """Switch the fuzzy matching backend
+        
+        Args:
+            name: 'auto', 'rapidfuzz' or 'fuzzywuzzy'
+        
+        Returns:
+            Name of the backend now in use
+        """
+        with self.lock:
+            self.fuzzy = create_fuzzy_backend(name)
+            return self.fuzzy.name
+    
+    def _match_result(self, match, score):
+        """Build a match result dictionary for an item name"""
+        item_data = self.items[match].copy()
+        item_data['name'] = match
+        item_data['match_score'] = score
+        return item_data
     
     def match_item(self, text, min_score=70):
         """Match the given text against the database items"""
-        if not text or not self.items:
+        with self.lock:
+            if not text or not self.items:
+                return None
+            
+            # Check for exact match first
+            item_name = self.name_index.find_exact(text)
+            if item_name is not None:
+                return self._match_result(item_name, 100)
+            
+            # If no exact match, score the names that share tokens with the text,
+            # or the whole catalogue when none of them scores well
+            match, score = self.name_index.best_match(text, self.fuzzy, min_score)
+            
+            # Only return if score is above threshold
+            if match is not None and score >= min_score:
+                return self._match_result(match, score)
+            
             return None
+    
+    def match_many(self, texts, min_score=70):
+        """Match several OCR lines from one capture in a single call
+        
+        Exact hits are resolved through the index; the remaining lines are
+        scored together against the union of their shortlists so the backend
+        can batch the work. Lines without a confident shortlist match are
+        then scored together against the whole catalogue.
+        
+        Args:
+            texts: List of OCR text strings
+            min_score: Minimum score for a fuzzy match
+        
+        Returns:
+            List with a match result dictionary (or None) for each text
+        """
+        with self.lock:
+            results = [None] * len(texts)
+            if not self.items:
+                return results
             
-        # Import fuzzywuzzy here to avoid circular imports
-        from fuzzywuzzy import process, fuzz
+            pending = []
+            candidates = {}
+            for i, text in enumerate(texts):
+                if not text:
+                    continue
+                item_name = self.name_index.find_exact(text)
+                if item_name is not None:
+                    results[i] = self._match_result(item_name, 100)
+                    continue
+                pending.append(i)
+                candidates.update(dict.fromkeys(self.name_index.shortlist(tokenize_name(text))))
             
-        # Check for exact match first
-        for item_name in self.items:
-            if item_name.lower() == text.lower():
-                item_data = self.items[item_name].copy()
-                item_data['name'] = item_name
-                item_data['match_score'] = 100
-                return item_data
-                
-        # If no exact match, try fuzzy matching
-        # Get list of item names
-        item_names = list(self.items.keys())
-        
-        # Find best match
-        match, score = process.extractOne(
-            text, 
-            item_names,
-            scorer=fuzz.token_set_ratio  # Use token set ratio for better matching
-        )
+            token_sets = self.name_index.tokens
+            best = {}
+            if pending and candidates:
+                matches = self.fuzzy.extract_one_batch(
+                    [texts[i] for i in pending], list(candidates), token_sets=token_sets
+                )
+                best = dict(zip(pending, matches))
+            
+            # Lines the shortlists did not match confidently get a full scan
+            unsure = [i for i in pending if self.name_index.needs_full_scan(*best.get(i, (None, 0)), min_score)]
+            if unsure:
+                matches = self.fuzzy.extract_one_batch(
+                    [texts[i] for i in unsure], list(token_sets), token_sets=token_sets
+                )
+                for i, (match, score) in zip(unsure, matches):
+                    if match is not None and score > best.get(i, (None, -1))[1]:
+                        best[i] = (match, score)
+            
+            for i, (match, score) in best.items():
+                if match is not None and score >= min_score:
+                    results[i] = self._match_result(match, score)
+            
+            return results
+    
+    def match_ranked(self, texts, min_score=70):
+        """Match the candidate name lines of a capture, most likely first
         
-        # Only return if score is above threshold
-        if score >= min_score:
-            item_data = self.items[match].copy()
-            item_data['name'] = match
-            item_data['match_score'] = score
-            return item_data
-                    
-        return None
+        An exact hit ends the search straight away. Otherwise the candidates
+        are matched together with match_many and the best score wins, ties
+        going to the higher-ranked line.
+        
+        Args:
+            texts: Candidate OCR lines, ordered by rank_tooltip_lines()
+            min_score: Minimum score for a fuzzy match
+        
+        Returns:
+            Tuple of (index into texts, match result), or (None, None)
+        """
+        with self.lock:
+            if not self.items:
+                return None, None
+            
+            for i, text in enumerate(texts):
+                item_name = self.name_index.find_exact(text) if text else None
+                if item_name is not None:
+                    return i, self._match_result(item_name, 100)
+            
+            best_index, best_match = None, None
+            for i, match_result in enumerate(self.match_many(texts, min_score)):
+                if match_result and (best_match is None or
+                                     match_result['match_score'] > best_match['match_score']):
+                    best_index, best_match = i, match_result
+            return best_index, best_match
     
-    def search_items(self, query, limit=10):
-        """Search items by name, returning top matches"""
-        if not query or not self.items:
-            return []
+    def decode_item(self, char_probs, decoder, min_score=LEXICON_MIN_SCORE):
+        """Decode a recognized line straight to an item name
         
-        # Import fuzzywuzzy here to avoid circular imports
-        from fuzzywuzzy import process, fuzz
+        Instead of repairing the greedily decoded text, the recognizer's
+        character probabilities are searched for the most likely item name
+        (see ocr_lexicon.LexiconDecoder). Every line decodes to some name,
+        so the minimum score should stay at or above LEXICON_MIN_SCORE even
+        when fuzzy matching accepts any score.
         
-        # Get top matches
-        item_names = list(self.items.keys())
-        matches = process.extract(
-            query, 
-            item_names,
-            scorer=fuzz.token_set_ratio,
-            limit=limit
-        )
+        Args:
+            char_probs: Per-time-step character probabilities of the line
+            decoder: LexiconDecoder for the recognizer's character set
+            min_score: Minimum decoding score
         
-        # Convert to list of dictionaries
-        results = []
-        for match, score in matches:
-            item_data = self.items[match].copy()
-            # Add additional info
-            item_data['name'] = match
-            item_data['match_score'] = score
-            results.append(item_data)
+        Returns:
+            Match result dictionary, or None
+        """
+        with self.lock:
+            if char_probs is None or not self.items:
+                return None
+            
+            name, score = decoder.decode(char_probs, self.name_index.get_trie())
+            if name is None or score < min_score:
+                return None
+            return self._match_result(name, int(round(score)))
+    
+    def decode_ranked(self, char_probs_list, decoder, min_score=LEXICON_MIN_SCORE):
+        """Decode the candidate name lines of a capture, most likely first
+        
+        A line decoded with a score of 100 ends the search; otherwise the
+        best score wins, ties going to the higher-ranked line.
+        
+        Args:
+            char_probs_list: Character probabilities of each candidate line,
+                ordered by rank_tooltip_lines(); None for lines without them
+            decoder: LexiconDecoder for the recognizer's character set
+            min_score: Minimum decoding score
+        
+        Returns:
+            Tuple of (index into char_probs_list, match result), or (None, None)
+        """
+        with self.lock:
+            best_index, best_match = None, None
+            for i, char_probs in enumerate(char_probs_list):
+                match_result = self.decode_item(char_probs, decoder, min_score)
+                if match_result and (best_match is None or
+                                     match_result['match_score'] > best_match['match_score']):
+                    best_index, best_match = i, match_result
+                    if match_result['match_score'] >= 100:
+                        break
+            return best_index, best_match
+    
+    def search_items(self, query, limit=10):
+        """Search items by name, returning top matches"""
+        with self.lock:
+            if not query or not self.items:
+                return []
             
-        return results
+            # Get top matches
+            item_names = list(self.items.keys())
+            matches = self.fuzzy.extract(query, item_names, limit=limit)
+            
+            # Convert to list of dictionaries
+            results = []
+            for match, score in matches:
+                item_data = self.items[match].copy()
+                # Add additional info
+                item_data['name'] = match
+                item_data['match_score'] = score
+                results.append(item_data)
+            
+            return results
     
     def process_ocr_results(self, ocr_results):
         """Process OCR results and match them against the database
@@ -276,160 +932,202 @@ class ItemDatabase:
                 continue
             
             # Create result entry
-            entry = {
+            processed_results.append({
                 'ocr_text': ocr_text,
                 'confidence': confidence
-            }
-            
-            # Try to match item in database
-            match_result = self.match_item(ocr_text)
+            })
+        
+        # Match every line in one pass over the database
+        match_results = self.match_many([entry['ocr_text'] for entry in processed_results])
+        for entry, match_result in zip(processed_results, match_results):
             if match_result:
                 entry['matched_item'] = match_result['name']
                 entry['price'] = match_result.get('price', 0)
                 entry['match_score'] = match_result.get('match_score', 0)
-                
-                # Log it
-                self.add_to_log(ocr_text, match_result['name'], match_result.get('price', 0), match_result.get('match_score', 0))
             else:
                 entry['matched_item'] = None
                 entry['price'] = None
                 entry['match_score'] = None
-            
-            processed_results.append(entry)
+        
+        # Log the matches with a single save
+        self.add_many_to_log([entry for entry in processed_results if entry['matched_item']])
         
         return processed_results
     
     def add_to_log(self, ocr_text, matched_item=None, price=None, match_score=None):
         """Add an item to the recent logs"""
-        # Get stock information if we have a matched item
-        stock = 0
-        if matched_item and matched_item in self.items:
-            stock = self.items[matched_item].get('stock', 0)
-            
-        log_entry = {
-            'timestamp': time.time(),
+        self.add_many_to_log([{
             'ocr_text': ocr_text,
             'matched_item': matched_item,
             'price': price,
-            'match_score': match_score,
-            'stock': stock  # Include stock in the log entry
-        }
-        
-        # Add to the beginning of the list
-        self.recently_logged.insert(0, log_entry)
-        
-        # Limit the log to 100 entries
-        if len(self.recently_logged) > 100:
-            self.recently_logged = self.recently_logged[:100]
+            'match_score': match_score
+        }])
+    
+    def add_many_to_log(self, results):
+        """Add the lines of one capture to the recent logs with a single save
         
-        # Save logs to file
-        self.save_logs()
+        Args:
+            results: Dictionaries with 'ocr_text', 'matched_item', 'price' and
+                'match_score', in capture order. The last one ends up on top,
+                as if each had been passed to add_to_log in turn.
+        """
+        with self.lock:
+            if not results:
+                return
+            
+            timestamp = time.time()
+            log_entries = []
+            for result in reversed(results):
+                # Get stock information if we have a matched item
+                matched_item = result.get('matched_item')
+                stock = 0
+                if matched_item and matched_item in self.items:
+                    stock = self.items[matched_item].get('stock', 0)
+                
+                log_entries.append({
+                    'timestamp': timestamp,
+                    'ocr_text': result.get('ocr_text', ''),
+                    'matched_item': matched_item,
+                    'price': result.get('price'),
+                    'match_score': result.get('match_score'),
+                    'stock': stock  # Include stock in the log entry
+                })
+            
+            # Add to the beginning of the list, limited to 100 entries
+            self.recently_logged = (log_entries + self.recently_logged)[:100]
+            
+            # Save logs to file
+            if self.storage is not None:
+                try:
+                    self.storage.add_logs(log_entries, keep=100)
+                except Exception as e:
+                    print(f"Error saving logs: {e}")
+            else:
+                self.save_logs()
+            
+            matched_items = [entry['matched_item'] for entry in log_entries if entry['matched_item']]
+            self._notify_change('logged', list(dict.fromkeys(matched_items)))
     
     def correct_log_entry(self, log_index, new_matched_item=None, new_price=None):
         """Correct a log entry with the right item and price"""
-        if 0 <= log_index < len(self.recently_logged):
-            if new_matched_item is not None:
-                self.recently_logged[log_index]['matched_item'] = new_matched_item
+        with self.lock:
+            if 0 <= log_index < len(self.recently_logged):
+                if new_matched_item is not None:
+                    self.recently_logged[log_index]['matched_item'] = new_matched_item
                 
-            if new_price is not None:
-                # Ensure price is a number
-                try:
-                    price = int(new_price) if isinstance(new_price, str) and new_price.isdigit() else int(new_price)
-                except (TypeError, ValueError):
-                    # Default to 0 if conversion fails
-                    price = 0
+                if new_price is not None:
+                    # Ensure price is a number
+                    try:
+                        price = int(new_price) if isinstance(new_price, str) and new_price.isdigit() else int(new_price)
+                    except (TypeError, ValueError):
+                        # Default to 0 if conversion fails
+                        price = 0
                     
-                self.recently_logged[log_index]['price'] = price
-            
-            # Save changes to logs file
-            self.save_logs()
-            return True
-        return False
+                    self.recently_logged[log_index]['price'] = price
+                
+                # Save changes to logs file
+                self.save_logs()
+                self._notify_change('log_corrected', [self.recently_logged[log_index]['matched_item']])
+                return True
+            return False
     
     def get_recent_logs(self, limit=10):
         """Get the most recent log entries with up-to-date stock information"""
-        # Update stock information in log entries from the current database
-        updated_logs = []
-        
-        for log in self.recently_logged[:limit]:
-            # Create a copy of the log entry to avoid modifying the original
-            updated_log = log.copy()
+        with self.lock:
+            # Update stock information in log entries from the current database
+            updated_logs = []
             
-            # Update stock information if we have a matched item
-            if 'matched_item' in log and log['matched_item'] in self.items:
-                updated_log['stock'] = self.items[log['matched_item']].get('stock', 0)
-            else:
-                updated_log['stock'] = 0
+            for log in self.recently_logged[:limit]:
+                # Create a copy of the log entry to avoid modifying the original
+                updated_log = log.copy()
+                
+                # Update stock information if we have a matched item
+                if 'matched_item' in log and log['matched_item'] in self.items:
+                    updated_log['stock'] = self.items[log['matched_item']].get('stock', 0)
+                else:
+                    updated_log['stock'] = 0
                 
-            updated_logs.append(updated_log)
+                updated_logs.append(updated_log)
             
-        return updated_logs
+            return updated_logs
     
     def clear_logs(self):
         """Clear the recently logged items list"""
-        self.recently_logged = []
-        
+        with self.lock:
+            self.recently_logged = []
+    
     def get_item_count(self):
         """Get the number of items in the database"""
         return len(self.items)
     
     def get_stats(self):
         """Get statistics about the database"""
-        total_items = len(self.items)
-        avg_price = 0
-        min_price = 0
-        max_price = 0
-        
-        if total_items > 0:
-            # Make sure we're only dealing with numeric price values
-            prices = []
-            for item_data in self.items.values():
-                if isinstance(item_data, dict) and 'price' in item_data:
-                    prices.append(item_data['price'])
-                elif isinstance(item_data, (int, float)):
-                    # Handle simple integer prices if they exist
-                    prices.append(item_data)
-            
-            if prices:
-                avg_price = sum(prices) / len(prices)
-                min_price = min(prices)
-                max_price = max(prices)
-        
-        return {
-            'total_items': total_items,
-            'avg_price': int(avg_price),
-            'min_price': min_price,
-            'max_price': max_price
-        }
+        with self.lock:
+            total_items = len(self.items)
+            avg_price = 0
+            min_price = 0
+            max_price = 0
+            
+            if total_items > 0:
+                # Make sure we're only dealing with numeric price values
+                prices = []
+                for item_data in self.items.values():
+                    if isinstance(item_data, dict) and 'price' in item_data:
+                        prices.append(item_data['price'])
+                    elif isinstance(item_data, (int, float)):
+                        # Handle simple integer prices if they exist
+                        prices.append(item_data)
+                
+                if prices:
+                    avg_price = sum(prices) / len(prices)
+                    min_price = min(prices)
+                    max_price = max(prices)
+            
+            return {
+                'total_items': total_items,
+                'avg_price': int(avg_price),
+                'min_price': min_price,
+                'max_price': max_price
+            }
     
     def save_logs(self):
-        """Save the recent logs to a file"""
-        log_path = "recent_logs.json"
-        log_data = {
-            'logs': self.recently_logged,
-            'last_updated': time.time()
-        }
-        try:
-            with open(log_path, 'w') as f:
-                json.dump(log_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving logs: {e}")
+        """Save the recent logs to a file (written behind for the JSON file)"""
+        with self.lock:
+            if self.storage is not None:
+                try:
+                    self.storage.replace_logs(self.recently_logged)
+                except Exception as e:
+                    print(f"Error saving logs: {e}")
+                return
+            
+            self.persistence.mark_dirty('logs')
+    
+    def _logs_snapshot(self):
+        """Copy the recent logs for the persistence writer thread"""
+        with self.lock:
+            return {
+                'logs': [dict(entry) for entry in self.recently_logged],
+                'last_updated': time.time()
+            }
     
     def load_logs(self):
         """Load the recent logs from file"""
-        log_path = "recent_logs.json"
-        if os.path.exists(log_path):
-            try:
-                with open(log_path, 'r') as f:
-                    data = json.load(f)
-                    self.recently_logged = data.get('logs', [])
-            except Exception as e:
-                print(f"Error loading logs: {e}")
-                # Create empty logs if loading fails
-                self.recently_logged = []
-        else:
-            # Create empty logs if file doesn't exist
-            self.recently_logged = []
+        with self.lock:
+            log_path = LOG_PATH
+            if self.storage is not None:
+                try:
+                    self.recently_logged = self.storage.load_logs(limit=100)
+                except Exception as e:
+                    print(f"Error loading logs: {e}")
+                    self.recently_logged = []
+            else:
+                try:
+                    data = load_document(log_path)
+                except CorruptFileError as e:
+                    print(f"Error loading logs: {e}")
+                    data = None
+                # Start with empty logs if the file is missing or unreadable
+                self.recently_logged = data.get('logs', []) if data else []
     
     def update_stock(self, item_name, stock, transaction_type="adjustment", use_cash=False, cash_manager=None):
         """Update the stock of an item
@@ -444,49 +1142,51 @@ class ItemDatabase:
         Returns:
             True if successful, False otherwise
         """
-        if item_name in self.items:
-            try:
-                stock = int(stock)
-                old_stock = self.items[item_name].get('stock', 0)
-                
-                # Don't do anything if stock is unchanged
-                if stock == old_stock:
-                    return True
-                
-                # Update the stock
-                self.items[item_name]['stock'] = stock
-                self.items[item_name]['last_updated'] = time.time()
-                
-                # Add to ledger
-                price = self.items[item_name].get('price', 0)
-                
-                # Handle cash transaction for purchases
-                if transaction_type == "purchase" and use_cash and cash_manager:
-                    # Calculate purchase value
-                    quantity = stock - old_stock
-                    purchase_value = quantity * price
+        with self.lock:
+            if item_name in self.items:
+                try:
+                    stock = int(stock)
+                    old_stock = self.items[item_name].get('stock', 0)
                     
-                    # Check if we have enough cash
-                    current_cash = cash_manager.get_cash_balance()
-                    if current_cash < purchase_value:
-                        return False  # Not enough cash
+                    # Don't do anything if stock is unchanged
+                    if stock == old_stock:
+                        return True
                     
-                    # Deduct cash for the purchase
-                    cash_manager.add_transaction({
-                        'timestamp': time.time(),
-                        'description': f"Purchase: {item_name} x{quantity}",
-                        'value': -purchase_value,
-                        'new_balance': current_cash - purchase_value
-                    })
-                
-                self.add_to_ledger(item_name, old_stock, stock, transaction_type, price)
-                
-                # Save the database
-                self.save_items()
-                return True
-            except (TypeError, ValueError):
-                return False
-        return False
+                    # Update the stock
+                    self.items[item_name]['stock'] = stock
+                    self.items[item_name]['last_updated'] = time.time()
+                    
+                    # Add to ledger
+                    price = self.items[item_name].get('price', 0)
+                    
+                    # Handle cash transaction for purchases
+                    if transaction_type == "purchase" and use_cash and cash_manager:
+                        # Calculate purchase value
+                        quantity = stock - old_stock
+                        purchase_value = quantity * price
+                        
+                        # Check if we have enough cash
+                        current_cash = cash_manager.get_cash_balance()
+                        if current_cash < purchase_value:
+                            return False  # Not enough cash
+                        
+                        # Deduct cash for the purchase
+                        cash_manager.add_transaction({
+                            'timestamp': time.time(),
+                            'description': f"Purchase: {item_name} x{quantity}",
+                            'value': -purchase_value,
+                            'new_balance': current_cash - purchase_value
+                        })
+                    
+                    self.add_to_ledger(item_name, old_stock, stock, transaction_type, price)
+                    
+                    # Save the database
+                    self.save_items([item_name])
+                    self._notify_change('stock', [item_name])
+                    return True
+                except (TypeError, ValueError):
+                    return False
+            return False
     
     def adjust_stock(self, item_name, adjustment, transaction_type="adjustment", use_cash=False, cash_manager=None):
         """Adjust the stock of an item by adding or subtracting
@@ -501,50 +1201,52 @@ class ItemDatabase:
         Returns:
             True if successful, False otherwise
         """
-        if item_name in self.items:
-            try:
-                adjustment = int(adjustment)
-                current_stock = self.items[item_name].get('stock', 0)
-                new_stock = max(0, current_stock + adjustment)  # Prevent negative stock
-                
-                # Don't do anything if stock is unchanged
-                if new_stock == current_stock:
-                    return True
-                
-                # Update the stock
-                self.items[item_name]['stock'] = new_stock
-                self.items[item_name]['last_updated'] = time.time()
-                
-                # Add to ledger
-                price = self.items[item_name].get('price', 0)
-                
-                # Handle cash transaction for purchases
-                if transaction_type == "purchase" and adjustment > 0 and use_cash and cash_manager:
-                    # Calculate purchase value
-                    purchase_value = adjustment * price
+        with self.lock:
+            if item_name in self.items:
+                try:
+                    adjustment = int(adjustment)
+                    current_stock = self.items[item_name].get('stock', 0)
+                    new_stock = max(0, current_stock + adjustment)  # Prevent negative stock
                     
-                    # Check if we have enough cash
-                    current_cash = cash_manager.get_cash_balance()
-                    if current_cash < purchase_value:
-                        return False  # Not enough cash
+                    # Don't do anything if stock is unchanged
+                    if new_stock == current_stock:
+                        return True
                     
-                    # Deduct cash for the purchase
-                    cash_manager.add_transaction({
-                        'timestamp': time.time(),
-                        'description': f"Purchase: {item_name} x{adjustment}",
-                        'value': -purchase_value,
-                        'new_balance': current_cash - purchase_value
-                    })
-                
-                self.add_to_ledger(item_name, current_stock, new_stock, transaction_type, price)
-                
-                # Save the database
-                self.save_items()
-                return True
-            except (TypeError, ValueError):
-                return False
-        return False
-        
+                    # Update the stock
+                    self.items[item_name]['stock'] = new_stock
+                    self.items[item_name]['last_updated'] = time.time()
+                    
+                    # Add to ledger
+                    price = self.items[item_name].get('price', 0)
+                    
+                    # Handle cash transaction for purchases
+                    if transaction_type == "purchase" and adjustment > 0 and use_cash and cash_manager:
+                        # Calculate purchase value
+                        purchase_value = adjustment * price
+                        
+                        # Check if we have enough cash
+                        current_cash = cash_manager.get_cash_balance()
+                        if current_cash < purchase_value:
+                            return False  # Not enough cash
+                        
+                        # Deduct cash for the purchase
+                        cash_manager.add_transaction({
+                            'timestamp': time.time(),
+                            'description': f"Purchase: {item_name} x{adjustment}",
+                            'value': -purchase_value,
+                            'new_balance': current_cash - purchase_value
+                        })
+                    
+                    self.add_to_ledger(item_name, current_stock, new_stock, transaction_type, price)
+                    
+                    # Save the database
+                    self.save_items([item_name])
+                    self._notify_change('stock', [item_name])
+                    return True
+                except (TypeError, ValueError):
+                    return False
+            return False
+    
     def mark_as_sold(self, item_name, quantity=1, selling_price=None):
         """Mark an item as sold, reducing its stock
         
@@ -556,43 +1258,45 @@ class ItemDatabase:
         Returns:
             True if successful, False otherwise
         """
-        if item_name in self.items:
-            try:
-                quantity = int(quantity)
-                if quantity <= 0:
-                    return False  # Cannot sell negative or zero quantity
+        with self.lock:
+            if item_name in self.items:
+                try:
+                    quantity = int(quantity)
+                    if quantity <= 0:
+                        return False  # Cannot sell negative or zero quantity
                     
-                current_stock = self.items[item_name].get('stock', 0)
-                
-                # Cannot sell more than we have
-                if quantity > current_stock:
-                    return False
+                    current_stock = self.items[item_name].get('stock', 0)
                     
-                new_stock = current_stock - quantity
-                
-                # Update the stock
-                self.items[item_name]['stock'] = new_stock
-                self.items[item_name]['last_updated'] = time.time()
-                
-                # Get default price if selling price is not specified
-                default_price = self.items[item_name].get('price', 0)
-                if selling_price is None:
-                    selling_price = default_price
-                
-                # Add to ledger
-                sale_value = selling_price * quantity
-                transaction_type = "sale"
-                self.add_to_ledger(item_name, current_stock, new_stock, transaction_type, 
-                                  default_price, quantity=quantity, value=sale_value, 
-                                  selling_price=selling_price)
-                
-                # Save the database
-                self.save_items()
-                return True
-            except (TypeError, ValueError):
-                return False
-        return False
-        
+                    # Cannot sell more than we have
+                    if quantity > current_stock:
+                        return False
+                    
+                    new_stock = current_stock - quantity
+                    
+                    # Update the stock
+                    self.items[item_name]['stock'] = new_stock
+                    self.items[item_name]['last_updated'] = time.time()
+                    
+                    # Get default price if selling price is not specified
+                    default_price = self.items[item_name].get('price', 0)
+                    if selling_price is None:
+                        selling_price = default_price
+                    
+                    # Add to ledger
+                    sale_value = selling_price * quantity
+                    transaction_type = "sale"
+                    self.add_to_ledger(item_name, current_stock, new_stock, transaction_type, 
+                                      default_price, quantity=quantity, value=sale_value, 
+                                      selling_price=selling_price)
+                    
+                    # Save the database
+                    self.save_items([item_name])
+                    self._notify_change('stock', [item_name])
+                    return True
+                except (TypeError, ValueError):
+                    return False
+            return False
+    
     def add_to_ledger(self, item_name, old_stock, new_stock, transaction_type, price, 
                      quantity=None, value=None, selling_price=None):
         """Add an entry to the transaction ledger
@@ -607,39 +1311,32 @@ class ItemDatabase:
             value: Total value of transaction (optional)
             selling_price: Price per unit at which the item was sold (optional)
         """
-        # Calculate quantity if not provided
-        if quantity is None:
-            quantity = abs(new_stock - old_stock)
+        with self.lock:
+            # Calculate quantity if not provided
+            if quantity is None:
+                quantity = abs(new_stock - old_stock)
             
-        # Use selling price if provided, otherwise use default price
-        actual_price = selling_price if selling_price is not None else price
+            # Use selling price if provided, otherwise use default price
+            actual_price = selling_price if selling_price is not None else price
             
-        # Calculate value if not provided
-        if value is None:
-            value = quantity * actual_price
+            # Calculate value if not provided
+            if value is None:
+                value = quantity * actual_price
             
-        ledger_entry = {
-            'timestamp': time.time(),
-            'item_name': item_name,
-            'old_stock': old_stock,
-            'new_stock': new_stock,
-            'quantity': quantity,
-            'price': price,  # Store the default price
-            'selling_price': selling_price,  # Store the actual selling price if different
-            'value': value,
-            'transaction_type': transaction_type
-        }
-        
-        # Add to the beginning of the list
-        self.ledger_entries.insert(0, ledger_entry)
-        
-        # Limit the ledger to 1000 entries
-        if len(self.ledger_entries) > 1000:
-            self.ledger_entries = self.ledger_entries[:1000]
+            ledger_entry = {
+                'timestamp': time.time(),
+                'item_name': item_name,
+                'old_stock': old_stock,
+                'new_stock': new_stock,
+                'quantity': quantity,
+                'price': price,  # Store the default price
+                'selling_price': selling_price,  # Store the actual selling price if different
+                'value': value,
+                'transaction_type': transaction_type
+            }
             
-        # Save the ledger
-        self.save_ledger()
-        
+            self._append_ledger_entry(ledger_entry)
+    
     def get_ledger_entries(self, limit=100, transaction_type=None, item_name=None):
         """Get ledger entries with optional filtering
         
@@ -649,24 +1346,26 @@ class ItemDatabase:
             item_name: Filter by item name (optional)
             
         Returns:
-            List of ledger entries
-        """
-        # Start with all entries
-        filtered_entries = list(self.ledger_entries)
-        
-        # Apply transaction type filter
-        if transaction_type:
-            filtered_entries = [entry for entry in filtered_entries 
-                              if entry.get('transaction_type') == transaction_type]
-                              
-        # Apply item name filter
-        if item_name:
-            filtered_entries = [entry for entry in filtered_entries 
-                              if entry.get('item_name') == item_name]
-                              
-        # Return limited results
-        return filtered_entries[:limit]
-        
+            List of ledger entries, newest first
+        """
+        with self.lock:
+            if self.storage is not None:
+                return self.storage.query_ledger(limit, transaction_type, item_name)
+            
+            filtered_entries = []
+            
+            # Walk from the newest entry and stop once the limit is reached
+            for entry in reversed(self.ledger_entries):
+                if transaction_type and entry.get('transaction_type') != transaction_type:
+                    continue
+                if item_name and entry.get('item_name') != item_name:
+                    continue
+                filtered_entries.append(entry)
+                if len(filtered_entries) >= limit:
+                    break
+            
+            return filtered_entries
+    
     def delete_ledger_entry(self, timestamp, item_name, reverse_transaction=True):
         """Delete a ledger entry and optionally reverse its effects
         
@@ -678,67 +1377,80 @@ class ItemDatabase:
         Returns:
             True if entry was found and deleted, False otherwise
         """
-        # Find the entry to delete
-        entry_to_delete = None
-        for i, entry in enumerate(self.ledger_entries):
-            if (abs(entry.get('timestamp', 0) - timestamp) < 0.001 and 
-                entry.get('item_name') == item_name):
-                entry_to_delete = entry
-                entry_index = i
-                break
-                
-        if not entry_to_delete:
-            return False
-            
-        # Reverse the transaction if requested
-        if reverse_transaction:
-            transaction_type = entry_to_delete.get('transaction_type')
+        with self.lock:
+            # Find the entry to delete
+            if self.storage is not None:
+                entry_to_delete = self.storage.delete_ledger_entry(timestamp, item_name)
+                if entry_to_delete is None:
+                    return False
+            else:
+                entry_index = find_entry(self.ledger_entries, timestamp, item_name)
+                if entry_index is None:
+                    return False
+                entry_to_delete = self.ledger_entries[entry_index]
             
-            if transaction_type == 'sale':
-                # Reverse sale: add items back to inventory
-                quantity = entry_to_delete.get('quantity', 0)
-                price = entry_to_delete.get('price', 0)
+            # Reverse the transaction if requested
+            if reverse_transaction:
+                transaction_type = entry_to_delete.get('transaction_type')
                 
-                # Get current stock
-                current_stock = 0
-                if item_name in self.items:
-                    current_stock = self.items[item_name].get('stock', 0)
+                if transaction_type == 'sale':
+                    # Reverse sale: add items back to inventory
+                    quantity = entry_to_delete.get('quantity', 0)
+                    price = entry_to_delete.get('price', 0)
                     
-                # Add items back to inventory
-                if item_name in self.items:
-                    self.items[item_name]['stock'] = current_stock + quantity
-                else:
-                    # Item was removed from inventory, add it back
-                    self.items[item_name] = {
-                        'name': item_name,
-                        'price': price,
-                        'stock': quantity
-                    }
+                    # Get current stock
+                    current_stock = 0
+                    if item_name in self.items:
+                        current_stock = self.items[item_name].get('stock', 0)
                     
-            elif transaction_type == 'adjustment':
-                # Reverse adjustment: restore previous stock
-                old_stock = entry_to_delete.get('old_stock', 0)
+                    # Add items back to inventory
+                    if item_name in self.items:
+                        self.items[item_name]['stock'] = current_stock + quantity
+                    else:
+                        # Item was removed from inventory, add it back
+                        self.items[item_name] = {
+                            'name': item_name,
+                            'price': price,
+                            'stock': quantity
+                        }
+                        self.name_index.add(item_name)
                 
-                # Restore previous stock
-                if item_name in self.items:
-                    self.items[item_name]['stock'] = old_stock
+                elif transaction_type == 'adjustment':
+                    # Reverse adjustment: restore previous stock
+                    old_stock = entry_to_delete.get('old_stock', 0)
                     
-            elif transaction_type == 'price_update':
-                # Reverse price update: restore previous price
-                old_price = entry_to_delete.get('old_price', 0)
+                    # Restore previous stock
+                    if item_name in self.items:
+                        self.items[item_name]['stock'] = old_stock
                 
-                # Restore previous price
-                if item_name in self.items:
-                    self.items[item_name]['price'] = old_price
-        
-        # Remove the entry
-        self.ledger_entries.pop(entry_index)
-        
-        # Save changes
-        self.save_ledger()
-        self.save_items()
-        
-        return True
+                elif transaction_type == 'price_update':
+                    # Reverse price update: restore previous price
+                    old_price = entry_to_delete.get('old_price', 0)
+                    
+                    # Restore previous price
+                    if item_name in self.items:
+                        self.items[item_name]['price'] = old_price
+            
+            # Remove the entry (the SQLite storage already deleted its row)
+            if self.storage is None:
+                self.ledger_entries.pop(entry_index)
+                try:
+                    self.ledger_journal.record_delete(entry_to_delete.get('timestamp', 0), item_name)
+                    if self.ledger_journal.needs_compaction(len(self.ledger_entries)):
+                        self.ledger_journal.compact(self.ledger_entries)
+                except Exception as e:
+                    print(f"Error saving ledger: {e}")
+            
+            if entry_to_delete.get('transaction_type') == 'sale':
+                self._refresh_sales_summary(item_name)
+            
+            # Save changes
+            self.save_items([item_name])
+            self._notify_change('ledger_deleted', [item_name])
+            if reverse_transaction:
+                self._notify_change('updated', [item_name])
+            
+            return True
     
     def get_ledger_stats(self):
         """Get statistics from the ledger
@@ -746,63 +1458,112 @@ class ItemDatabase:
         Returns:
             Dictionary with ledger statistics
         """
-        total_entries = len(self.ledger_entries)
-        
-        # Count by transaction type
-        transaction_counts = {}
-        
-        # Total values
-        total_sales_value = 0
-        total_purchase_value = 0
-        
-        for entry in self.ledger_entries:
-            # Count by type
-            tx_type = entry.get('transaction_type', 'unknown')
-            transaction_counts[tx_type] = transaction_counts.get(tx_type, 0) + 1
+        with self.lock:
+            if self.storage is not None:
+                by_type = self.storage.ledger_stats()
+                return {
+                    'total_entries': sum(count for count, _ in by_type.values()),
+                    'transaction_counts': {tx_type: count for tx_type, (count, _) in by_type.items()},
+                    'total_sales_value': by_type.get('sale', (0, 0))[1],
+                    'total_purchase_value': by_type.get('purchase', (0, 0))[1]
+                }
+            
+            total_entries = len(self.ledger_entries)
+            
+            # Count by transaction type
+            transaction_counts = {}
+            
+            # Total values
+            total_sales_value = 0
+            total_purchase_value = 0
             
-            # Calculate sales value
-            if tx_type == 'sale':
-                total_sales_value += entry.get('value', 0)
+            for entry in self.ledger_entries:
+                # Count by type
+                tx_type = entry.get('transaction_type', 'unknown')
+                transaction_counts[tx_type] = transaction_counts.get(tx_type, 0) + 1
                 
-            # Calculate purchase value
-            if tx_type == 'purchase':
-                total_purchase_value += entry.get('value', 0)
+                # Calculate sales value
+                if tx_type == 'sale':
+                    total_sales_value += entry.get('value', 0)
                 
-        return {
-            'total_entries': total_entries,
-            'transaction_counts': transaction_counts,
-            'total_sales_value': total_sales_value,
-            'total_purchase_value': total_purchase_value
-        }
+                # Calculate purchase value
+                if tx_type == 'purchase':
+                    total_purchase_value += entry.get('value', 0)
+            
+            return {
+                'total_entries': total_entries,
+                'transaction_counts': transaction_counts,
+                'total_sales_value': total_sales_value,
+                'total_purchase_value': total_purchase_value
+            }
+    
+    def _append_ledger_entry(self, entry):
+        """Add an entry to the end of the ledger and append it to the journal"""
+        if entry.get('transaction_type') == 'sale':
+            record_sale(self.sales_summary, entry)
         
-    def save_ledger(self):
-        """Save the ledger to a file"""
-        ledger_path = "ledger.json"
-        ledger_data = {
-            'ledger': self.ledger_entries,
-            'last_updated': time.time()
-        }
         try:
-            with open(ledger_path, 'w') as f:
-                json.dump(ledger_data, f, indent=2)
+            if self.storage is not None:
+                self.storage.add_ledger_entries([entry])
+            else:
+                self.ledger_entries.append(entry)
+                self.ledger_journal.append(entry)
         except Exception as e:
             print(f"Error saving ledger: {e}")
-            
+        
+        self._notify_change('ledger', [entry.get('item_name')])
+    
+    def save_ledger(self):
+        """Rewrite the ledger journal so it holds only the current entries"""
+        with self.lock:
+            if self.storage is not None:
+                # Every ledger change is committed as it happens
+                return
+            try:
+                self.ledger_journal.compact(self.ledger_entries)
+            except Exception as e:
+                print(f"Error saving ledger: {e}")
+    
     def load_ledger(self):
-        """Load the ledger from file"""
-        ledger_path = "ledger.json"
-        if os.path.exists(ledger_path):
+        """Load the ledger by replaying the journal"""
+        with self.lock:
+            if self.storage is not None:
+                # The SQLite ledger is queried on demand instead of held in memory
+                self.ledger_entries = []
+                self.sales_summary = self.storage.sales_summary()
+                return
             try:
-                with open(ledger_path, 'r') as f:
-                    data = json.load(f)
-                    self.ledger_entries = data.get('ledger', [])
+                self.ledger_entries = self.ledger_journal.load()
             except Exception as e:
                 print(f"Error loading ledger: {e}")
                 # Create empty ledger if loading fails
                 self.ledger_entries = []
+            self.sales_summary = summarize_sales(self.ledger_entries)
+    
+    def _refresh_sales_summary(self, item_name):
+        """Recompute the sales totals of one item after a sale was removed"""
+        if self.storage is not None:
+            item_summary = self.storage.sales_summary(item_name).get(item_name)
         else:
-            # Create empty ledger if file doesn't exist
-            self.ledger_entries = []
+            item_summary = summarize_sales(entry for entry in self.ledger_entries
+                                           if entry.get('item_name') == item_name).get(item_name)
+        if item_summary:
+            self.sales_summary[item_name] = item_summary
+        else:
+            self.sales_summary.pop(item_name, None)
+    
+    def get_sales_summary(self, item_name):
+        """Get the sales totals of an item
+        
+        Args:
+            item_name: Name of the item
+            
+        Returns:
+            Dictionary with last_sale (timestamp or None), sales, units and revenue
+        """
+        with self.lock:
+            return dict(self.sales_summary.get(item_name) or
+                        {'last_sale': None, 'sales': 0, 'units': 0, 'revenue': 0})
     
     def get_inventory_value(self):
         """Calculate the total value of all items in inventory
@@ -810,49 +1571,51 @@ class ItemDatabase:
         Returns:
             Dictionary with inventory statistics
         """
-        total_items = 0
-        total_value = 0
-        items_with_stock = 0
-        
-        for item_name, item_data in self.items.items():
-            stock = item_data.get('stock', 0)
-            price = item_data.get('price', 0)
+        with self.lock:
+            total_items = 0
+            total_value = 0
+            items_with_stock = 0
             
-            total_items += 1
-            if stock > 0:
-                items_with_stock += 1
-                total_value += stock * price
-        
-        return {
-            'total_items': total_items,
-            'items_with_stock': items_with_stock,
-            'total_value': total_value
-        }
-        
+            for item_name, item_data in self.items.items():
+                stock = item_data.get('stock', 0)
+                price = item_data.get('price', 0)
+                
+                total_items += 1
+                if stock > 0:
+                    items_with_stock += 1
+                    total_value += stock * price
+            
+            return {
+                'total_items': total_items,
+                'items_with_stock': items_with_stock,
+                'total_value': total_value
+            }
+    
     def get_inventory_items(self):
         """Get all items with their inventory information
         
         Returns:
             List of dictionaries with item name, price, stock, and value
         """
-        inventory = []
-        
-        for item_name, item_data in self.items.items():
-            stock = item_data.get('stock', 0)
-            price = item_data.get('price', 0)
-            value = stock * price
+        with self.lock:
+            inventory = []
             
-            inventory.append({
-                'name': item_name,
-                'price': price,
-                'stock': stock,
-                'value': value
-            })
-        
-        # Sort by value (highest first)
-        inventory.sort(key=lambda x: x['value'], reverse=True)
-        
-        return inventory
+            for item_name, item_data in self.items.items():
+                stock = item_data.get('stock', 0)
+                price = item_data.get('price', 0)
+                value = stock * price
+                
+                inventory.append({
+                    'name': item_name,
+                    'price': price,
+                    'stock': stock,
+                    'value': value
+                })
+            
+            # Sort by value (highest first)
+            inventory.sort(key=lambda x: x['value'], reverse=True)
+            
+            return inventory
     
     def get_inventory_data(self):
         """Get all inventory data
@@ -860,27 +1623,36 @@ class ItemDatabase:
         Returns:
             List of dictionaries with inventory data
         """
-        inventory_data = []
+        with self.lock:
+            # Sale history comes from the sales summary, so this is one pass over the items
+            return [self.get_inventory_item(name) for name in self.items]
+    
+    def get_inventory_item(self, item_name):
+        """Get the inventory data of one item
         
-        for name, item in self.items.items():
+        Args:
+            item_name: Name of the item
+            
+        Returns:
+            Dictionary with inventory data, or None if the item does not exist
+        """
+        with self.lock:
+            item = self.items.get(item_name)
+            if item is None:
+                return None
+            
             # Get item data
             price = item.get('price', 0)
             stock = item.get('stock', 0)
-            value = price * stock
             
-            # Create inventory item
-            inventory_item = {
-                'name': name,
+            return {
+                'name': item_name,
                 'price': price,
                 'stock': stock,
-                'value': value,
-                'last_sold': self.get_last_sold_date(name),
-                'price_adjustment': self.calculate_price_adjustment(name)
+                'value': price * stock,
+                'last_sold': self.get_last_sold_date(item_name),
+                'price_adjustment': self.calculate_price_adjustment(item_name)
             }
-            
-            inventory_data.append(inventory_item)
-            
-        return inventory_data
     
     def get_last_sold_date(self, item_name):
         """Get the last sold date for an item
@@ -891,21 +1663,22 @@ class ItemDatabase:
         Returns:
             Formatted date string or empty string if never sold
         """
-        # Get sales history for this item
-        sales = [entry for entry in self.ledger_entries 
-                if entry.get('item_name') == item_name and 
-                   entry.get('transaction_type') == 'sale']
-        
-        if not sales:
-            return ""
+        with self.lock:
+            # Find the most recent sale time
+            last_sale_timestamp = self._last_sale_timestamp(item_name)
             
-        # Find the most recent sale time
-        last_sale_timestamp = max(entry.get('timestamp', 0) for entry in sales)
-        
-        # Format the date
-        from datetime import datetime
-        date_str = datetime.fromtimestamp(last_sale_timestamp).strftime('%Y-%m-%d')
-        return date_str
+            if not last_sale_timestamp:
+                return ""
+            
+            # Format the date
+            from datetime import datetime
+            date_str = datetime.fromtimestamp(last_sale_timestamp).strftime('%Y-%m-%d')
+            return date_str
+    
+    def _last_sale_timestamp(self, item_name):
+        """Get the timestamp of the most recent sale of an item, or None"""
+        item_summary = self.sales_summary.get(item_name)
+        return item_summary['last_sale'] if item_summary else None
     
     def calculate_price_adjustment(self, item_name):
         """Calculate whether an item needs visual highlighting
@@ -922,74 +1695,67 @@ class ItemDatabase:
                 'suggested_price': int
             }
         """
-        if item_name not in self.items:
-            return {'recommended': False}
+        with self.lock:
+            if item_name not in self.items:
+                return {'recommended': False}
             
-        # Get item data
-        item = self.items[item_name]
-        current_price = item.get('price', 0)
-        current_stock = item.get('stock', 0)
-        
-        # If no stock, no need for highlighting
-        if current_stock == 0:
-            return {'recommended': False}
+            # Get item data
+            item = self.items[item_name]
+            current_price = item.get('price', 0)
+            current_stock = item.get('stock', 0)
             
-        # Get sales history for this item
-        sales = [entry for entry in self.ledger_entries 
-                if entry.get('item_name') == item_name and 
-                   entry.get('transaction_type') == 'sale']
-        
-        # Check when the last sale was
-        now = time.time()
-        last_sale_timestamp = None  # Start with None to detect if there have been no sales
-        
-        if sales:
-            # Find the most recent sale time
-            last_sale_timestamp = max(entry.get('timestamp', 0) for entry in sales)
-            
-        # Calculate days since last sale (or a very large number if never sold)
-        days_since_last_sale = 999  # Default to a large number if never sold
-        if last_sale_timestamp:
-            days_since_last_sale = (now - last_sale_timestamp) / (60 * 60 * 24)
-        
-        result = {
-            'recommended': False,
-            'reason': '',
-            'last_sale_days': days_since_last_sale,
-            'suggested_price': current_price
-        }
-        
-        # Only highlight if the item has stock and has never been sold
-        if current_stock > 0 and not last_sale_timestamp:
-            result['recommended'] = True
-            result['reason'] = 'Never been sold'
-            # No price suggestion - removed 10% discount heuristic
-            result['suggested_price'] = current_price
-                
-        return result
-
-    def update_price(self, item_name, new_price):
-        """Update the price of an item in the database"""
-        if item_name in self.items:
-            # Get current price for logging
-            old_price = self.items[item_name]['price']
+            # If no stock, no need for highlighting
+            if current_stock == 0:
+                return {'recommended': False}
             
-            # Update the price
-            self.items[item_name]['price'] = new_price
+            # Check when the last sale was (None if there have been no sales)
+            now = time.time()
+            last_sale_timestamp = self._last_sale_timestamp(item_name)
             
-            # Add to ledger
-            entry = {
-                'timestamp': time.time(),
-                'item_name': item_name,
-                'old_price': old_price,
-                'new_price': new_price,
-                'transaction_type': 'price_update'
+            # Calculate days since last sale (or a very large number if never sold)
+            days_since_last_sale = 999  # Default to a large number if never sold
+            if last_sale_timestamp:
+                days_since_last_sale = (now - last_sale_timestamp) / (60 * 60 * 24)
+            
+            result = {
+                'recommended': False,
+                'reason': '',
+                'last_sale_days': days_since_last_sale,
+                'suggested_price': current_price
             }
-            self.ledger_entries.append(entry)
-            self.save_ledger()
             
-            # Save the database
-            self.save_items()
+            # Only highlight if the item has stock and has never been sold
+            if current_stock > 0 and not last_sale_timestamp:
+                result['recommended'] = True
+                result['reason'] = 'Never been sold'
+                # No price suggestion - removed 10% discount heuristic
+                result['suggested_price'] = current_price
             
-            return True
-        return False
+            return result
+    
+    def update_price(self, item_name, new_price):
+        """Update the price of an item in the database"""
+        with self.lock:
+            if item_name in self.items:
+                # Get current price for logging
+                old_price = self.items[item_name]['price']
+                
+                # Update the price
+                self.items[item_name]['price'] = new_price
+                
+                # Add to ledger
+                entry = {
+                    'timestamp': time.time(),
+                    'item_name': item_name,
+                    'old_price': old_price,
+                    'new_price': new_price,
+                    'transaction_type': 'price_update'
+                }
+                self._append_ledger_entry(entry)
+                
+                # Save the database
+                self.save_items([item_name])
+                self._notify_change('updated', [item_name])
+                
+                return True
+            return False
@@ -5,15 +5,14 @@ Provides UI elements for item management and logging
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-    QTableWidget, QTableWidgetItem, QHeaderView,
+    QTableView, QHeaderView, QAbstractItemView,
     QPushButton, QDialog, QFormLayout, QDialogButtonBox,
     QLineEdit, QMenu, QMessageBox
 )
 from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QColor, QAction, QFont, QIntValidator
+from PyQt6.QtGui import QAction, QFont, QIntValidator
 
-import time
-from datetime import datetime
+from table_models import LogTableModel, ItemTableModel, SearchFilterProxyModel
 
 class CorrectMatchDialog(QDialog):
     """Dialog for correcting a mismatched item"""
@@ -74,7 +73,7 @@ class CorrectMatchDialog(QDialog):
             price = int(self.price_edit.text())
         except ValueError:
             price = 0
-            
+        
         return {
             'item_name': self.item_edit.text(),
             'price': price
@@ -100,8 +99,10 @@ class RecentlyLoggedWidget(QWidget):
         self.layout.addWidget(self.header_label)
         
         # Log table
-        self.log_table = QTableWidget(0, 6)  # 0 rows, 6 columns
-        self.log_table.setHorizontalHeaderLabels(["OCR Text", "Matched Item", "Price", "Stock", "Confidence", "Time"])
+        self.log_model = LogTableModel(self)
+        self.log_table = QTableView()
+        self.log_table.setModel(self.log_model)
+        self.log_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         
         # Configure column sizes
         header = self.log_table.horizontalHeader()
@@ -118,100 +119,27 @@ class RecentlyLoggedWidget(QWidget):
         self.log_table.customContextMenuRequested.connect(self.show_context_menu)
         
         self.layout.addWidget(self.log_table)
-        
-        # Store original log data
-        self.log_data = []
+    
+    @property
+    def log_data(self):
+        """Log entries shown in the table, newest first"""
+        return self.log_model.records
     
     def update_log(self, log_data):
-        """Update the log table with new data"""
-        # Store the original data
-        self.log_data = log_data
-        
-        # Clear existing log
-        self.log_table.setRowCount(0)
+        """Replace the log table contents"""
+        self.log_model.set_records(log_data)
+    
+    def add_entries(self, log_data):
+        """Insert log entries newer than the newest shown entry
         
-        # Add new log data
-        for i, entry in enumerate(log_data):
-            self.log_table.insertRow(i)
-            
-            # OCR Text column
-            ocr_text = entry.get('ocr_text', '')
-            if ocr_text:
-                ocr_item = QTableWidgetItem(ocr_text)
-                self.log_table.setItem(i, 0, ocr_item)
-            
-            # Matched Item column
-            matched_item = entry.get('matched_item')
-            if matched_item:
-                match_item = QTableWidgetItem(matched_item)
-                self.log_table.setItem(i, 1, match_item)
-            else:
-                not_found_item = QTableWidgetItem("Not found")
-                not_found_item.setForeground(QColor(150, 150, 150))  # Gray text
-                self.log_table.setItem(i, 1, not_found_item)
-            
-            # Price column
-            price = entry.get('price')
-            if price is not None:
-                # Ensure price is an integer or float before formatting
-                if isinstance(price, (int, float)):
-                    price_item = QTableWidgetItem(f"{price:,}")
-                else:
-                    # If it's not a number, convert to string
-                    price_item = QTableWidgetItem(str(price))
-                self.log_table.setItem(i, 2, price_item)
-            else:
-                price_item = QTableWidgetItem("")
-                self.log_table.setItem(i, 2, price_item)
-                
-            # Stock column (getting from item_database via additional data in entry)
-            stock = entry.get('stock', 0)
-            if stock > 0:
-                stock_item = QTableWidgetItem(str(stock))
-                # Improved contrast: darker green background with black text for better readability
-                stock_item.setBackground(QColor(150, 215, 150))
-                stock_item.setForeground(QColor(0, 0, 0))  # Black text for better contrast
-                # Make text bold for emphasis
-                font = stock_item.font()
-                font.setBold(True)
-                stock_item.setFont(font)
-            else:
-                stock_item = QTableWidgetItem("0")
-                # Improved contrast: lighter gray with darker gray text
-                stock_item.setBackground(QColor(240, 240, 240))
-                stock_item.setForeground(QColor(80, 80, 80))  # Dark gray text for better contrast
-            stock_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.log_table.setItem(i, 3, stock_item)
-            
-            # Confidence column
-            match_score = entry.get('match_score')
-            if match_score is not None:
-                conf_item = QTableWidgetItem(f"{match_score:.1f}%")
-                
-                # Color-code confidence levels with improved contrast
-                if match_score > 90:
-                    # Darker green for high confidence
-                    conf_item.setBackground(QColor(150, 220, 150))
-                    conf_item.setForeground(QColor(0, 80, 0))  # Dark green text
-                elif match_score > 75:
-                    # Darker yellow for medium confidence
-                    conf_item.setBackground(QColor(240, 230, 140))
-                    conf_item.setForeground(QColor(100, 80, 0))  # Dark yellow text
-                else:
-                    # Darker red for low confidence
-                    conf_item.setBackground(QColor(255, 160, 160))
-                    conf_item.setForeground(QColor(140, 0, 0))  # Dark red text
-                
-                self.log_table.setItem(i, 4, conf_item)
-            else:
-                self.log_table.setItem(i, 4, QTableWidgetItem(""))
-            
-            # Time column
-            timestamp = entry.get('timestamp')
-            if timestamp:
-                time_str = time.strftime("%H:%M:%S", time.localtime(timestamp))
-                time_item = QTableWidgetItem(time_str)
-                self.log_table.setItem(i, 5, time_item)
+        Args:
+            log_data: Recent log entries, newest first
+        """
+        self.log_model.add_entries(log_data)
+    
+    def update_stock(self, item_name, stock):
+        """Update the stock shown for an item's log entries"""
+        self.log_model.update_stock(item_name, stock)
     
     def on_table_double_clicked(self, index):
         """Handle double-click on a log entry"""
@@ -262,7 +190,7 @@ class RecentlyLoggedWidget(QWidget):
             
             # Show the menu
             menu.exec(self.log_table.mapToGlobal(position))
-            
+    
     def open_stock_dialog(self, row):
         """Open dialog to set stock for the matched item in a log entry"""
         if row >= 0 and row < len(self.log_data):
@@ -301,29 +229,8 @@ class RecentlyLoggedWidget(QWidget):
                 
                 # Only emit if there's a change
                 if new_stock != current_stock:
-                    # Emit signal to update stock
+                    # Emit signal to update stock; the row updates when the database reports the change
                     self.stock_updated.emit(matched_item, new_stock)
-                    
-                    # Update the stock in the table UI directly for immediate feedback
-                    stock_item = self.log_table.item(row, 3)  # Stock is in column 3
-                    if stock_item:
-                        stock_item.setText(str(new_stock))
-                        if new_stock > 0:
-                            # Improved contrast: darker green background with black text
-                            stock_item.setBackground(QColor(150, 215, 150))
-                            stock_item.setForeground(QColor(0, 0, 0))  # Black text
-                            # Make text bold
-                            font = stock_item.font()
-                            font.setBold(True)
-                            stock_item.setFont(font)
-                        else:
-                            # Improved contrast: lighter gray with darker gray text
-                            stock_item.setBackground(QColor(240, 240, 240))
-                            stock_item.setForeground(QColor(80, 80, 80))  # Dark gray text
-                            # Remove bold
-                            font = stock_item.font()
-                            font.setBold(False)
-                            stock_item.setFont(font)
     
     def open_correction_dialog(self, row_index):
         """Open a dialog to correct a mismatched item"""
@@ -361,7 +268,7 @@ class AddItemDialog(QDialog):
         # Ensure ocr_text is a string
         if ocr_text is None or not isinstance(ocr_text, str):
             ocr_text = ""
-            
+        
         # Item name field
         self.name_edit = QLineEdit(ocr_text)
         form_layout.addRow("Item Name:", self.name_edit)
@@ -397,7 +304,7 @@ class AddItemDialog(QDialog):
             price = int(self.price_edit.text())
         except ValueError:
             price = 0
-            
+        
         return {
             'name': self.name_edit.text(),
             'price': price
@@ -440,9 +347,14 @@ class ItemDatabaseWidget(QWidget):
         
         self.layout.addLayout(search_layout)
         
-        # Table for items
-        self.table = QTableWidget(0, 3)  # rows, columns
-        self.table.setHorizontalHeaderLabels(["Item Name", "Price", "Last Updated"])
+        # Table for items; search results are a filtered, ranked view of the same model
+        self.model = ItemTableModel(self)
+        self.proxy = SearchFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         
         # Set column widths
         header = self.table.horizontalHeader()
@@ -452,9 +364,8 @@ class ItemDatabaseWidget(QWidget):
         
         self.layout.addWidget(self.table)
         
-        # Store the complete dataset and fuzzy search results
+        # Store the complete dataset
         self.all_items = {}
-        self.filtered_items = {}
         
         # Buttons layout
         buttons_layout = QHBoxLayout()
@@ -486,52 +397,34 @@ class ItemDatabaseWidget(QWidget):
         """Update the items table with the provided items"""
         # Store the complete dataset
         self.all_items = items
+        self.model.set_items(items)
         
         # Apply any active search filter
-        if self.search_edit.text().strip():
+        self.search_items()
+    
+    def item_changed(self, change, item_names):
+        """Update the rows of items the database reports as changed
+        
+        Args:
+            change: Change type reported by ItemDatabase listeners
+            item_names: Names of the changed items
+        """
+        self.model.item_changed(change, item_names)
+        
+        # Added, renamed and deleted items can change the search results
+        if change in ('added', 'renamed', 'deleted') and self.search_edit.text().strip():
             self.search_items()
-        else:
-            # No active search, show all items
-            self.filtered_items = self.all_items
-            self.display_items(self.filtered_items)
     
-    def display_items(self, items_to_display):
-        """Display the specified items in the table"""
-        # Clear the table
-        self.table.setRowCount(0)
-        
-        # Add items
-        for i, (name, data) in enumerate(items_to_display.items()):
-            self.table.insertRow(i)
-            
-            # Item Name
-            name_item = QTableWidgetItem(name)
-            self.table.setItem(i, 0, name_item)
-            
-            # Price - handle both dictionary and direct integer formats
-            if isinstance(data, dict):
-                price = data.get('price', 0)
-            else:
-                # Handle case where data is directly a price (integer)
-                price = data
-                
-            price_item = QTableWidgetItem(f"{price:,}")
-            price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(i, 1, price_item)
-            
-            # Last Updated
-            if isinstance(data, dict):
-                last_updated = data.get('last_updated', data.get('added_date', 0))
-                if last_updated:
-                    date_str = datetime.fromtimestamp(last_updated).strftime('%Y-%m-%d %H:%M')
-                    date_item = QTableWidgetItem(date_str)
-                else:
-                    date_item = QTableWidgetItem("Unknown")
-            else:
-                # No timestamp for direct integer price
-                date_item = QTableWidgetItem("Unknown")
-            
-            self.table.setItem(i, 2, date_item)
+    def selected_item_name(self):
+        """Get the name of the selected item, or None"""
+        selected_rows = self.table.selectionModel().selectedIndexes()
+        if not selected_rows:
+            return None
+        return self.item_name_at(selected_rows[0])
+    
+    def item_name_at(self, index):
+        """Get the item name shown at a view index"""
+        return self.model.record(self.proxy.mapToSource(index).row())
     
     def update_stats(self, stats):
         """Update the database statistics"""
@@ -547,26 +440,14 @@ class ItemDatabaseWidget(QWidget):
         
         if not query:
             # Empty query, show all items
-            self.filtered_items = self.all_items
+            self.proxy.set_ranking(None)
         else:
             # Emit signal for the search (will be connected to the actual search method)
             self.search_requested.emit(query)
-        
-        # Show the filtered items
-        self.display_items(self.filtered_items)
     
     def update_search_results(self, search_results):
-        """Update the table with search results"""
-        # Convert search results to the format needed for display
-        self.filtered_items = {}
-        for result in search_results:
-            name = result.get('name')
-            if name:
-                # Use the original item data from all_items
-                self.filtered_items[name] = self.all_items.get(name, {})
-        
-        # Display the filtered items
-        self.display_items(self.filtered_items)
+        """Show only the search results, best match first"""
+        self.proxy.set_ranking([result['name'] for result in search_results if result.get('name')])
     
     def add_item(self, ocr_text=None):
         """Add a new item to the database"""
@@ -575,7 +456,7 @@ class ItemDatabaseWidget(QWidget):
             ocr_text = ""
         elif not isinstance(ocr_text, str):
             ocr_text = str(ocr_text)
-            
+        
         dialog = AddItemDialog(ocr_text, self)
         if dialog.exec():
             item_data = dialog.get_item_data()
@@ -583,16 +464,15 @@ class ItemDatabaseWidget(QWidget):
     
     def edit_item(self):
         """Edit the selected item"""
-        # Get selected row
-        selected_rows = self.table.selectedIndexes()
-        if not selected_rows:
+        # Get the selected item
+        original_name = self.selected_item_name()
+        if original_name is None:
             QMessageBox.information(self, "No Selection", "Please select an item to edit.")
             return
         
-        # Get item name and price from the selected row
-        row = selected_rows[0].row()
-        original_name = self.table.item(row, 0).text()
-        price_text = self.table.item(row, 1).text().replace(',', '')
+        # Get the price of the selected item
+        data = self.all_items.get(original_name, {})
+        price_text = str(data.get('price', 0) if isinstance(data, dict) else data)
         
         # Create dialog with item data
         dialog = AddItemDialog(original_name, self)
@@ -609,16 +489,12 @@ class ItemDatabaseWidget(QWidget):
     
     def delete_item(self):
         """Delete the selected item"""
-        # Get selected row
-        selected_rows = self.table.selectedIndexes()
-        if not selected_rows:
+        # Get the selected item
+        item_name = self.selected_item_name()
+        if item_name is None:
             QMessageBox.information(self, "No Selection", "Please select an item to delete.")
             return
         
-        # Get item name from the selected row
-        row = selected_rows[0].row()
-        item_name = self.table.item(row, 0).text()
-        
         # Confirm deletion
         reply = QMessageBox.question(
             self, "Confirm Deletion",
@@ -635,12 +511,11 @@ class ItemDatabaseWidget(QWidget):
         """Show a context menu for the table"""
         menu = QMenu()
         
-        # Get the row under the cursor
-        row = self.table.rowAt(position.y())
+        # Get the item under the cursor
+        index = self.table.indexAt(position)
         
-        if row >= 0:
-            # Get the item name from the first column
-            item_name = self.table.item(row, 0).text()
+        if index.isValid():
+            item_name = self.item_name_at(index)
             
             # Edit action
             edit_action = QAction("Edit Item", self)
@@ -671,7 +546,7 @@ class ItemDatabaseWidget(QWidget):
             
             # Show the context menu
             menu.exec(self.table.mapToGlobal(position))
-            
+    
     def open_stock_dialog(self, item_name):
         """Open dialog to set stock for an item"""
         if item_name in self.all_items:
@@ -0,0 +1,66 @@
+"""
+Deferred imports for MapleLegends ShopHelper
+Keeps the OCR stack, OpenCV and charting out of startup until they are first used
+"""
+
+import sys
+import time
+import importlib
+import threading
+
+
+class LazyModule:
+    """Placeholder for a module that is imported on first attribute access
+    
+    `ocr = lazy_import('ocr_utils')` costs nothing at startup; the first
+    `ocr.get_ocr_processor` imports ocr_utils (and with it PaddleOCR and
+    OpenCV) on whichever thread asked first. Concurrent first uses wait for
+    the same import.
+    """
+    
+    def __init__(self, name):
+        """Initialize the placeholder
+        
+        Args:
+            name: Dotted module name to import
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+        self.import_time = None
+    
+    @property
+    def loaded(self):
+        """Whether the module has been imported (by this placeholder or elsewhere)"""
+        return self._module is not None or self._name in sys.modules
+    
+    def load(self):
+        """Import the module if needed and return it"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start_time = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    self.import_time = time.perf_counter() - start_time
+                    self._module = module
+        return self._module
+    
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+    
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Create a placeholder that imports a module on first use
+    
+    Args:
+        name: Dotted module name
+    
+    Returns:
+        LazyModule for the module
+    """
+    return LazyModule(name)
+
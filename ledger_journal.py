@@ -0,0 +1,152 @@
+"""
+Append-only ledger journal for MapleLegends ShopHelper
+Stores ledger changes as JSON Lines so each transaction is a single append
+"""
+
+import os
+import json
+from persistence import atomic_write, backup_path, DEFAULT_BACKUPS
+from data_codecs import json_loads
+
+class LedgerJournal:
+    """Append-only JSON Lines journal backing the transaction ledger
+    
+    Every line is one record: {"op": "add", "entry": {...}} for a new ledger
+    entry or {"op": "delete", "timestamp": ..., "item_name": ...} for a removed
+    one. Replaying the file in order rebuilds the ledger. Once deleted records
+    make up a large share of the file it is rewritten with only live entries.
+    """
+    
+    def __init__(self, path="ledger.jsonl", legacy_path="ledger.json", compact_min_records=500):
+        """Initialize the journal
+        
+        Args:
+            path: Path to the JSON Lines journal
+            legacy_path: Path to the old single-document ledger, migrated on first load
+            compact_min_records: Number of records the file must hold before compaction is considered
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        self.compact_min_records = compact_min_records
+        self.record_count = 0
+        self.torn_tail = False  # The file ends in a partial line from an interrupted append
+    
+    def load(self):
+        """Replay the journal
+        
+        Returns:
+            List of live ledger entries, oldest first
+        """
+        if not os.path.exists(self.path) and os.path.exists(backup_path(self.path, 1)):
+            # A compaction was interrupted after the old journal became the backup
+            print(f"Restoring {self.path} from {backup_path(self.path, 1)}")
+            os.replace(backup_path(self.path, 1), self.path)
+        if not os.path.exists(self.path):
+            return self._migrate_legacy()
+        
+        entries = []
+        self.record_count = 0
+        self.torn_tail = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                self.torn_tail = not line.endswith("\n")
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json_loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write, skip it
+                    print(f"Skipping unreadable ledger journal line {line_number}")
+                    continue
+                
+                self.record_count += 1
+                op = record.get('op')
+                if op == 'add':
+                    entries.append(record.get('entry', {}))
+                elif op == 'delete':
+                    index = find_entry(entries, record.get('timestamp', 0), record.get('item_name'))
+                    if index is not None:
+                        entries.pop(index)
+        
+        if self.needs_compaction(len(entries)):
+            self.compact(entries)
+        
+        return entries
+    
+    def append(self, entry):
+        """Append a new ledger entry to the journal"""
+        self._write_record({'op': 'add', 'entry': entry})
+    
+    def record_delete(self, timestamp, item_name):
+        """Record the removal of a ledger entry"""
+        self._write_record({'op': 'delete', 'timestamp': timestamp, 'item_name': item_name})
+    
+    def needs_compaction(self, live_count):
+        """Check whether the journal holds enough dead records to rewrite it
+        
+        Args:
+            live_count: Number of entries currently in the ledger
+        """
+        return (self.record_count >= self.compact_min_records and
+                self.record_count > 2 * live_count)
+    
+    def compact(self, entries):
+        """Rewrite the journal so it holds exactly the given entries
+        
+        Args:
+            entries: Live ledger entries, oldest first
+        """
+        lines = [json.dumps({'op': 'add', 'entry': entry}, separators=(',', ':')) + "\n"
+                 for entry in entries]
+        atomic_write(self.path, "".join(lines).encode('utf-8'), DEFAULT_BACKUPS)
+        self.record_count = len(entries)
+        self.torn_tail = False
+    
+    def _write_record(self, record):
+        """Append a single record as one line"""
+        # Start on a fresh line so a torn final line does not swallow this record
+        prefix = "\n" if self.torn_tail else ""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(prefix + json.dumps(record, separators=(',', ':')) + "\n")
+            # A sale is only acknowledged once its record is on disk
+            f.flush()
+            os.fsync(f.fileno())
+        self.torn_tail = False
+        self.record_count += 1
+    
+    def _migrate_legacy(self):
+        """Convert an old ledger.json into the journal format"""
+        self.record_count = 0
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return []
+        
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        # The old ledger stored most transactions newest first but appended
+        # price updates at the end, so order by timestamp instead
+        entries = sorted(data.get('ledger', []), key=lambda entry: entry.get('timestamp', 0))
+        self.compact(entries)
+        os.replace(self.legacy_path, self.legacy_path + ".bak")
+        print(f"Migrated {len(entries)} ledger entries to {self.path}")
+        return entries
+
+
+def find_entry(entries, timestamp, item_name):
+    """Find the most recent entry matching a timestamp and item name
+    
+    Args:
+        entries: Ledger entries, oldest first
+        timestamp: Timestamp of the entry
+        item_name: Item name of the entry
+    
+    Returns:
+        Index of the entry, or None if not found
+    """
+    for i in range(len(entries) - 1, -1, -1):
+        entry = entries[i]
+        if (abs(entry.get('timestamp', 0) - timestamp) < 0.001 and
+            entry.get('item_name') == item_name):
+            return i
+    return None
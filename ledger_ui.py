@@ -1,13 +1,13 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-                             QTableWidgetItem, QHeaderView, QComboBox, QLabel,
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, 
+                             QAbstractItemView, QHeaderView, QComboBox, QLabel,
                              QPushButton, QSpinBox, QDateEdit, QMenu, QSplitter,
                              QLineEdit, QGroupBox, QFormLayout, QDialog, QDialogButtonBox)
 from PyQt6.QtCore import Qt, pyqtSignal, QDateTime, QDate
 from PyQt6.QtGui import QColor, QBrush, QFont, QAction, QIntValidator
 import time
 from datetime import datetime, timedelta
-from ledger_charts import LedgerChartWidget
 from cash_balance import CashManager
+from table_models import LedgerTableModel, LedgerFilterProxyModel
 
 class CashEntryDialog(QDialog):
     """Dialog for entering cash transactions"""
@@ -272,8 +272,9 @@ class LedgerWidget(QWidget):
     def __init__(self, parent=None, item_database=None):
         super().__init__(parent)
         
-        # Initialize cash manager for persistence
-        self.cash_manager = CashManager()
+        # Initialize cash manager for persistence, sharing the item database's storage
+        self.cash_manager = CashManager(storage=getattr(item_database, 'storage', None),
+                                        codec=getattr(item_database, 'codec', None))
         
         # Store reference to item database
         self.item_database = item_database
@@ -283,7 +284,7 @@ class LedgerWidget(QWidget):
         
         # Initialize data
         self.filtered_data = []
-        self.all_ledger_data = []  # Store all entries before filtering
+        self.latest_ledger_timestamp = 0  # Newest item database entry shown
         self.cash_balance = self.cash_manager.get_cash_balance()  # Get saved cash balance
         self.cash_transactions = self.cash_manager.get_transactions()  # Get saved transactions
         
@@ -394,18 +395,20 @@ class LedgerWidget(QWidget):
         self.splitter = QSplitter(Qt.Orientation.Vertical)
         self.splitter.setStyleSheet("QSplitter::handle { background-color: #555555; }")
         
+        # Ledger model holding every entry; the proxy applies the type and date filters
+        self.ledger_model = LedgerTableModel(self)
+        self.ledger_proxy = LedgerFilterProxyModel(self)
+        self.ledger_proxy.setSourceModel(self.ledger_model)
+        
         # Create table for ledger entries
-        self.ledger_table = QTableWidget()
-        self.ledger_table.setColumnCount(9)
-        self.ledger_table.setHorizontalHeaderLabels([
-            "Date & Time", "Item", "Type", "Old Stock", "New Stock", 
-            "Quantity", "Default Price", "Selling Price", "Value"
-        ])
+        self.ledger_table = QTableView()
+        self.ledger_table.setModel(self.ledger_proxy)
         
         # Set dark mode style for table
         self.ledger_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #2D2D2D;
+                alternate-background-color: #323232;
                 color: #E0E0E0;
                 gridline-color: #555555;
                 selection-background-color: #505050;
@@ -417,27 +420,34 @@ class LedgerWidget(QWidget):
                 border: 1px solid #555555;
                 font-weight: bold;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #505050;
             }
         """)
         
-        # Set table properties
+        # Set table properties; fixed column widths instead of measuring every row
+        for column, width in enumerate([140, 200, 90, 75, 75, 70, 100, 100, 110]):
+            self.ledger_table.setColumnWidth(column, width)
         self.ledger_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)  # Item column stretches
         self.ledger_table.horizontalHeader().setDefaultAlignment(Qt.AlignmentFlag.AlignLeft)
         self.ledger_table.verticalHeader().setVisible(False)
+        self.ledger_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.ledger_table.setAlternatingRowColors(True)
-        self.ledger_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)  # Read-only
-        self.ledger_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.ledger_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)  # Read-only
+        self.ledger_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.ledger_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.ledger_table.customContextMenuRequested.connect(self.show_context_menu)
         
-        # Create chart widget
-        self.chart_widget = LedgerChartWidget()
+        # Container for the chart, which is created when the ledger is first shown
+        # so matplotlib is not imported at startup
+        self.chart_widget = None
+        self.chart_container = QWidget()
+        self.chart_layout = QVBoxLayout(self.chart_container)
+        self.chart_layout.setContentsMargins(0, 0, 0, 0)
         
         # Add table and chart to splitter
         self.splitter.addWidget(self.ledger_table)
-        self.splitter.addWidget(self.chart_widget)
+        self.splitter.addWidget(self.chart_container)
         
         # Set initial sizes (table gets more space)
         self.splitter.setSizes([600, 400])
@@ -473,16 +483,12 @@ class LedgerWidget(QWidget):
             tx_data = dialog.get_transaction_data()
             if tx_data:
                 # Use cash manager to add transaction and update balance
-                ledger_entry = self.cash_manager.add_transaction(tx_data)
+                self.cash_manager.add_transaction(tx_data)
                 
-                # Update local cash balance
+                # Update local cash balance; the row is added when the change is delivered
                 self.cash_balance = self.cash_manager.get_cash_balance()
                 self.cash_balance_label.setText(f"Cash Balance: {self.cash_balance:,}")
                 
-                # Add to all ledger data and refresh
-                self.all_ledger_data.append(ledger_entry)
-                self.filter_changed()
-                
                 # Emit signal that cash balance changed
                 self.cash_balance_changed.emit(self.cash_balance)
                 
@@ -518,23 +524,13 @@ class LedgerWidget(QWidget):
         start_date = self.date_from.date().startOfDay().toSecsSinceEpoch()
         end_date = self.date_to.date().endOfDay().toSecsSinceEpoch()
         
-        # Filter the data
-        self.filtered_data = []
-        for entry in self.all_ledger_data:
-            timestamp = entry.get('timestamp', 0)
-            tx_type = entry.get('transaction_type')
-            
-            # Check type filter (None means 'All')
-            type_match = (selected_type is None) or (tx_type == selected_type)
-            
-            # Check date filter
-            date_match = (start_date <= timestamp <= end_date)
-            
-            if type_match and date_match:
-                self.filtered_data.append(entry)
-        
-        # Update the table display
-        self.update_table()
+        # Filter the data (None as the type means 'All')
+        self.ledger_proxy.set_filter(selected_type, start_date, end_date)
+        self.refresh_filtered()
+    
+    def refresh_filtered(self):
+        """Recalculate statistics and the chart for the entries that pass the filters"""
+        self.filtered_data = self.ledger_proxy.entries()
         
         # Calculate and update statistics based on filtered data
         self.calculate_stats()
@@ -549,8 +545,8 @@ class LedgerWidget(QWidget):
             ledger_entries: List of ledger entry dictionaries
             stats: Dictionary of statistics (optional)
         """
-        # Store all entries
-        self.all_ledger_data = ledger_entries
+        # Remember the newest entry so later additions can be inserted on their own
+        self.latest_ledger_timestamp = ledger_entries[0].get('timestamp', 0) if ledger_entries else 0
         
         # Get cash transactions and merge with ledger entries
         cash_transactions = self.cash_manager.get_transactions()
@@ -562,7 +558,7 @@ class LedgerWidget(QWidget):
         combined_entries.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
         
         # Store combined entries
-        self.all_ledger_data = combined_entries
+        self.ledger_model.set_records(combined_entries)
         
         # Apply filters
         self.filter_changed()
@@ -575,157 +571,59 @@ class LedgerWidget(QWidget):
             
         # Update chart data
         self.update_chart_data()
-            
-    def update_table(self):
-        """Update the table with current filtered data"""
-        # Clear existing rows
-        self.ledger_table.setRowCount(0)
-        
-        # Add data rows
-        for i, entry in enumerate(self.filtered_data):
-            self.ledger_table.insertRow(i)
-            
-            # Format timestamp
-            timestamp = entry.get('timestamp', 0)
-            dt = datetime.fromtimestamp(timestamp)
-            date_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-            date_item = QTableWidgetItem(date_str)
-            self.ledger_table.setItem(i, 0, date_item)
-            
-            # Item name
-            item_name = entry.get('item_name', '')
-            name_item = QTableWidgetItem(item_name)
-            # Make item name bold for readability
-            font = name_item.font()
-            font.setBold(True)
-            name_item.setFont(font)
-            self.ledger_table.setItem(i, 1, name_item)
-            
-            # Transaction type
-            tx_type = entry.get('transaction_type', '')
-            type_item = QTableWidgetItem(tx_type.capitalize())
-            
-            # Dark mode colors for transaction types
-            if tx_type == 'sale':
-                # Bright green for sales
-                type_item.setForeground(QColor(80, 200, 120))  # Bright green
-                font = QFont("", -1, QFont.Weight.Bold)
-                type_item.setFont(font)
-            elif tx_type == 'purchase':
-                # Bright blue for purchases
-                type_item.setForeground(QColor(100, 150, 255))  # Bright blue
-                font = QFont("", -1, QFont.Weight.Bold)
-                type_item.setFont(font)
-            elif tx_type == 'adjustment':
-                # Yellow/gold for adjustments
-                type_item.setForeground(QColor(255, 215, 0))  # Gold
-            elif tx_type == 'cash':
-                # Orange for cash transactions
-                type_item.setForeground(QColor(255, 165, 0))  # Orange
-                
-            self.ledger_table.setItem(i, 2, type_item)
-            
-            # Old stock
-            old_stock = entry.get('old_stock', 0)
-            old_stock_item = QTableWidgetItem(str(old_stock))
-            old_stock_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.ledger_table.setItem(i, 3, old_stock_item)
-            
-            # New stock
-            new_stock = entry.get('new_stock', 0)
-            new_stock_item = QTableWidgetItem(str(new_stock))
-            new_stock_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            
-            # Highlight stock changes with dark mode colors
-            if new_stock > old_stock:
-                # Stock increased - blue
-                new_stock_item.setForeground(QColor(100, 150, 255))
-            elif new_stock < old_stock:
-                # Stock decreased - red
-                new_stock_item.setForeground(QColor(255, 100, 100))
-                
-            self.ledger_table.setItem(i, 4, new_stock_item)
-            
-            # Quantity
-            quantity = entry.get('quantity', 0)
-            quantity_item = QTableWidgetItem(str(quantity))
-            quantity_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            # Make quantity bold for better visibility
-            font = quantity_item.font()
-            font.setBold(True)
-            quantity_item.setFont(font)
-            quantity_item.setForeground(QColor(255, 220, 100))  # Gold/yellow for quantity
-            self.ledger_table.setItem(i, 5, quantity_item)
-            
-            # Default Price
-            default_price = entry.get('price', 0)
-            price_text = format(default_price, ",")  # Format with commas
-            price_item = QTableWidgetItem(price_text)
-            price_item.setData(Qt.ItemDataRole.UserRole, default_price)  # Store raw value for sorting
-            price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            price_item.setForeground(QColor(150, 200, 255))  # Light blue for prices
-            self.ledger_table.setItem(i, 6, price_item)
-            
-            # Selling Price (if different from default)
-            selling_price = entry.get('selling_price')
-            
-            if selling_price is not None and selling_price != default_price:
-                # Different selling price
-                selling_price_text = format(selling_price, ",")
-                selling_price_item = QTableWidgetItem(selling_price_text)
-                selling_price_item.setData(Qt.ItemDataRole.UserRole, selling_price)
-                selling_price_item.setForeground(QColor(255, 130, 130))  # Bright red/pink
-                font = QFont()
-                font.setBold(True)
-                selling_price_item.setFont(font)
-            elif selling_price is not None:
-                # Same as default price
-                selling_price_text = format(selling_price, ",")
-                selling_price_item = QTableWidgetItem(selling_price_text)
-                selling_price_item.setData(Qt.ItemDataRole.UserRole, selling_price)
+    
+    def add_entries(self, ledger_entries, stats=None):
+        """Insert item database entries newer than the newest one shown
+        
+        Args:
+            ledger_entries: Recent ledger entries, newest first
+            stats: Dictionary of statistics (optional)
+        """
+        new_entries = [entry for entry in ledger_entries
+                       if entry.get('timestamp', 0) > self.latest_ledger_timestamp]
+        if not new_entries:
+            return
+        self.latest_ledger_timestamp = new_entries[0].get('timestamp', 0)
+        self.ledger_model.insert_records(0, new_entries)
+        
+        self.refresh_filtered()
+        if stats:
+            self.update_stats(stats)
+    
+    def cash_changed(self, change=None, item_names=None):
+        """Show the current cash balance and add or remove changed cash transaction rows
+        
+        Args:
+            change: Change type reported by CashManager listeners (unused)
+            item_names: Unused; cash changes name no items
+        """
+        self.cash_balance = self.cash_manager.get_cash_balance()
+        self.cash_balance_label.setText(f"Cash Balance: {self.cash_balance:,}")
+        
+        # Rows hold the cash manager's own transaction dictionaries
+        transactions = {id(tx): tx for tx in self.cash_manager.get_transactions()}
+        shown = set()
+        for row in range(len(self.ledger_model.records) - 1, -1, -1):
+            entry = self.ledger_model.records[row]
+            if entry.get('transaction_type') != 'cash':
+                continue
+            if id(entry) in transactions:
+                shown.add(id(entry))
             else:
-                # No selling price (not a sale)
-                selling_price_item = QTableWidgetItem("-")
-                selling_price_item.setData(Qt.ItemDataRole.UserRole, 0)
-            
-            selling_price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.ledger_table.setItem(i, 7, selling_price_item)
-            
-            # Value
-            value = entry.get('value', 0)
-            value_text = format(value, ",")  # Format with commas
-            value_item = QTableWidgetItem(value_text)
-            value_item.setData(Qt.ItemDataRole.UserRole, value)  # Store raw value for sorting
-            value_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            # Bold values with bright color for better readability
-            font = value_item.font()
-            font.setBold(True)
-            value_item.setFont(font)
-            
-            # Color value based on transaction type
-            if tx_type == 'sale':
-                value_item.setForeground(QColor(80, 200, 120))  # Green for sales
-            elif tx_type == 'purchase':
-                value_item.setForeground(QColor(100, 150, 255))  # Blue for purchases
-            elif tx_type == 'adjustment':
-                value_item.setForeground(QColor(255, 215, 0))  # Gold for adjustments
-            elif tx_type == 'cash':
-                value_item.setForeground(QColor(255, 165, 0))  # Orange for cash transactions
-                
-            self.ledger_table.setItem(i, 8, value_item)
-            
-            # Set row background color
-            row_color = QColor(45, 45, 45) if i % 2 == 0 else QColor(50, 50, 50)
-            for col in range(self.ledger_table.columnCount()):
-                item = self.ledger_table.item(i, col)
-                if item:
-                    item.setBackground(row_color)
-        
-        # Resize columns to content
-        self.ledger_table.resizeColumnsToContents()
-        # Keep the item name column stretched
-        self.ledger_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-                    
+                self.ledger_model.remove_records(row)
+        
+        for tx in transactions.values():
+            if id(tx) not in shown:
+                # New transactions are normally the newest entry; keep newest-first order
+                timestamp = tx.get('timestamp', 0)
+                row = 0
+                records = self.ledger_model.records
+                while row < len(records) and records[row].get('timestamp', 0) > timestamp:
+                    row += 1
+                self.ledger_model.insert_records(row, [tx])
+        
+        self.refresh_filtered()
+    
     def calculate_stats(self):
         """Calculate statistics from filtered data"""
         total_entries = len(self.filtered_data)
@@ -774,8 +672,24 @@ class LedgerWidget(QWidget):
             total_assets = self.cash_balance + total_capital_value
             self.net_value_label.setText(f"Total Assets: {total_assets:,}")
     
+    def showEvent(self, event):
+        """Create the chart the first time the ledger is shown"""
+        super().showEvent(event)
+        if self.chart_widget is None:
+            self.create_chart()
+    
+    def create_chart(self):
+        """Import the charting modules and add the chart below the table"""
+        from ledger_charts import LedgerChartWidget
+        self.chart_widget = LedgerChartWidget()
+        self.chart_layout.addWidget(self.chart_widget)
+        self.update_chart_data()
+    
     def update_chart_data(self):
         """Update chart data based on filtered ledger entries"""
+        if self.chart_widget is None:
+            return  # Computed when the chart is created
+        
         # Group data by day for the chart
         daily_data = {}
         
@@ -837,12 +751,12 @@ class LedgerWidget(QWidget):
         """Show context menu for the ledger table"""
         menu = QMenu()
         
-        # Get the row
-        row = self.ledger_table.indexAt(position).row()
+        # Get the entry under the cursor
+        index = self.ledger_table.indexAt(position)
+        entry = self.ledger_model.record(self.ledger_proxy.mapToSource(index).row()) if index.isValid() else None
         
         # Only show context menu if a valid row is clicked
-        if row >= 0 and row < len(self.filtered_data):
-            entry = self.filtered_data[row]
+        if entry is not None:
             item_name = entry.get('item_name', '')
             timestamp = entry.get('timestamp', 0)
             tx_type = entry.get('transaction_type', '')
@@ -923,14 +837,7 @@ class LedgerWidget(QWidget):
                 
                 # Emit signal that cash balance changed
                 self.cash_balance_changed.emit(self.cash_balance)
-                
-                # Refresh the ledger
-                if hasattr(self.parent(), 'refresh_ledger'):
-                    self.parent().refresh_ledger()
-                
-                # Update the chart
-                self.update_chart_data()
-
+    
     def delete_ledger_entry(self, timestamp, item_name, tx_type):
         """Delete a ledger entry and reverse its effects
         
@@ -989,14 +896,8 @@ class LedgerWidget(QWidget):
                 if self.item_database:
                     success = self.item_database.delete_ledger_entry(timestamp, item_name)
             
-            # Refresh the ledger display
+            # The rows are refreshed when the change is delivered
             if success:
-                # Get updated ledger entries
-                if self.item_database:
-                    entries = self.item_database.get_ledger_entries(limit=1000)
-                    stats = self.item_database.get_ledger_stats()
-                    self.update_data(entries, stats)
-                
                 # Show success message - use QApplication.activeWindow() to find main window
                 main_window = QApplication.activeWindow()
                 if hasattr(main_window, 'status_bar'):
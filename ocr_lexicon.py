@@ -0,0 +1,205 @@
+"""
+Lexicon-constrained CTC decoding for MapleLegends ShopHelper
+Decodes the recognizer's character probabilities straight to an item name
+with a beam search over a prefix trie of the catalogue
+"""
+
+import math
+import numpy as np
+
+TERMINAL = ''  # Key under which a trie node keeps the names ending there
+NEG_INF = float('-inf')
+
+
+def _logaddexp(a, b):
+    """log(exp(a) + exp(b)) for Python floats"""
+    if a < b:
+        a, b = b, a
+    if b == NEG_INF:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def _similarity(a, b):
+    """Indel similarity of two strings from 0 to 100, as fuzz.ratio scores it"""
+    if not a and not b:
+        return 100.0
+    # Longest common subsequence, one row at a time
+    row = [0] * (len(b) + 1)
+    for char_a in a:
+        previous = 0
+        for j, char_b in enumerate(b, 1):
+            previous, row[j] = row[j], previous + 1 if char_a == char_b else max(row[j], row[j - 1])
+    return 200.0 * row[-1] / (len(a) + len(b))
+
+
+def _merge(beams, node, last, p_blank, p_char):
+    """Add the probability of reaching a trie node to the beam for that node"""
+    beam = beams.get(id(node))
+    if beam is None:
+        beams[id(node)] = [node, last, p_blank, p_char]
+    else:
+        beam[2] = _logaddexp(beam[2], p_blank)
+        beam[3] = _logaddexp(beam[3], p_char)
+
+
+class NameTrie:
+    """Prefix trie of item names, keyed by lowercase character
+    
+    Each node is a dictionary of child nodes by character; a node where
+    names end also lists them under TERMINAL. Names are added and removed
+    one at a time as the catalogue changes, so the trie never needs a full
+    rebuild after an edit.
+    """
+    
+    def __init__(self, names=()):
+        """Build a trie of the given names"""
+        self.root = {}
+        self.size = 0
+        for name in names:
+            self.add(name)
+    
+    def __len__(self):
+        return self.size
+    
+    def add(self, name):
+        """Add a name to the trie"""
+        node = self.root
+        for char in name.lower():
+            node = node.setdefault(char, {})
+        names = node.setdefault(TERMINAL, [])
+        if name not in names:
+            names.append(name)
+            self.size += 1
+    
+    def remove(self, name):
+        """Remove a name, pruning the nodes no other name passes through"""
+        key = name.lower()
+        path = [self.root]
+        for char in key:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        
+        names = path[-1].get(TERMINAL, [])
+        if name not in names:
+            return
+        names.remove(name)
+        self.size -= 1
+        if not names:
+            del path[-1][TERMINAL]
+        
+        for char, parent, node in zip(reversed(key), reversed(path[:-1]), reversed(path[1:])):
+            if node:
+                break
+            del parent[char]
+
+
+class LexiconDecoder:
+    """CTC prefix beam search restricted to the names in a NameTrie
+    
+    Every beam is a trie node, so only prefixes of item names are ever
+    extended and the search ends on whole names. Upper and lower case
+    classes are summed into one, matching names regardless of case, and at
+    each time step only the characters above `min_char_prob` are tried,
+    which keeps the work per line to a few beams times a few characters.
+    
+    Scores are on the 0-100 scale of fuzzy match scores: the similarity of
+    the name to the best unconstrained reading (what greedy decoding
+    returns), counting the characters they share as fuzz.ratio does. One
+    misread letter in "Blue Potion" scores 91, about what token_set_ratio
+    gives the misread text; text that is not an item name decodes to the
+    closest reachable name but scores below item_database.LEXICON_MIN_SCORE.
+    """
+    
+    def __init__(self, characters, beam_width=8, min_char_prob=1e-4):
+        """
+        Prepare the decoder for a recognizer's character set
+        
+        Args:
+            characters: Recognizer class labels, 'blank' first
+            beam_width: Prefixes kept per time step
+            min_char_prob: Characters less likely than this at a time step are not tried there
+        """
+        self.beam_width = beam_width
+        self.min_char_prob = min_char_prob
+        
+        # Case-folded character of each column of the folded probabilities
+        self.keys = []
+        key_index = {}
+        columns = []
+        for label, char in enumerate(characters[1:], 1):
+            key = char.lower()
+            if len(key) != 1:
+                continue
+            if key not in key_index:
+                key_index[key] = len(self.keys)
+                self.keys.append(key)
+            columns.append((label, key_index[key]))
+        
+        self.fold = np.zeros((len(characters), len(self.keys)), dtype=np.float32)
+        for label, index in columns:
+            self.fold[label, index] = 1
+    
+    def decode(self, probs, trie):
+        """
+        Find the most likely item name for one text line
+        
+        Args:
+            probs: Array of shape (time steps, classes) with the recognizer's softmax outputs
+            trie: NameTrie of the item names
+        
+        Returns:
+            Tuple of (name, score from 0 to 100), or (None, 0) if no name is reachable
+        """
+        folded = np.asarray(probs, dtype=np.float32) @ self.fold
+        with np.errstate(divide='ignore'):
+            log_blank = np.log(probs[:, 0]).tolist()
+            log_chars = np.log(folded)
+        active = [np.flatnonzero(row >= self.min_char_prob).tolist() for row in folded]
+        log_chars = log_chars.tolist()
+        
+        # Trie node id -> [node, last character, log P(ending in blank), log P(ending in a character)]
+        beams = {id(trie.root): [trie.root, -1, 0.0, NEG_INF]}
+        for blank, row, characters in zip(log_blank, log_chars, active):
+            next_beams = {}
+            for node, last, p_blank, p_char in beams.values():
+                total = _logaddexp(p_blank, p_char)
+                _merge(next_beams, node, last, total + blank, NEG_INF)
+                if last >= 0:
+                    # The last character held over another time step
+                    _merge(next_beams, node, last, NEG_INF, p_char + row[last])
+                for k in characters:
+                    child = node.get(self.keys[k])
+                    if child is None:
+                        continue
+                    # A repeated character only starts anew after a blank
+                    _merge(next_beams, child, k, NEG_INF, (p_blank if k == last else total) + row[k])
+            
+            if len(next_beams) > self.beam_width:
+                ranked = sorted(next_beams.values(), key=lambda beam: _logaddexp(beam[2], beam[3]), reverse=True)
+                next_beams = {id(beam[0]): beam for beam in ranked[:self.beam_width]}
+            beams = next_beams
+        
+        best_name, best_log_prob = None, NEG_INF
+        for node, _, p_blank, p_char in beams.values():
+            names = node.get(TERMINAL)
+            log_prob = _logaddexp(p_blank, p_char)
+            if names and log_prob > best_log_prob:
+                best_name, best_log_prob = names[0], log_prob
+        if best_name is None:
+            return None, 0
+        
+        return best_name, _similarity(self.greedy_text(folded, probs[:, 0]), best_name.lower())
+    
+    def greedy_text(self, folded, blank):
+        """Best path decoding of case-folded probabilities: the likeliest class per step, collapsed"""
+        path = np.column_stack((blank, folded)).argmax(axis=1)
+        text = []
+        last = 0
+        for label in path.tolist():
+            if label and label != last:
+                text.append(self.keys[label - 1])
+            last = label
+        return ''.join(text)
@@ -0,0 +1,83 @@
+"""
+OCR model locations for MapleLegends ShopHelper
+Kept free of OCR dependencies so the models can be checked without loading them
+"""
+
+from pathlib import Path
+
+DET_MODEL_DIR = 'models/det'
+REC_MODEL_DIR = 'models/rec'
+CLS_MODEL_DIR = 'models/cls'
+
+# The same detector and recognizer exported for ONNX Runtime, with the
+# recognizer's character dictionary
+ONNX_MODEL_DIR = 'models/onnx'
+ONNX_DET_MODEL = 'models/onnx/det.onnx'
+ONNX_REC_MODEL = 'models/onnx/rec.onnx'
+ONNX_REC_DICT = 'models/onnx/en_dict.txt'
+
+# INT8 quantizations of the ONNX models
+ONNX_DET_MODEL_INT8 = 'models/onnx/det.int8.onnx'
+ONNX_REC_MODEL_INT8 = 'models/onnx/rec.int8.onnx'
+
+# OCR engines: PaddlePaddle inference, or ONNX Runtime on the CPU with the
+# FP32 or INT8 models
+OCR_ENGINES = ('paddle', 'onnx', 'onnx-int8')
+DEFAULT_OCR_ENGINE = 'paddle'
+
+
+def models_exist(det_model_dir=DET_MODEL_DIR, rec_model_dir=REC_MODEL_DIR):
+    """
+    Check if the required OCR models exist
+    
+    Args:
+        det_model_dir: Folder of the text detection model
+        rec_model_dir: Folder of the text recognition model
+    
+    Returns:
+        bool: True if all required models exist, False otherwise
+    """
+    # Check for model files in the model directories
+    det_path = Path(det_model_dir)
+    rec_path = Path(rec_model_dir)
+    
+    # Check if the directories exist and contain model files
+    det_files = list(det_path.glob('*.pdmodel')) if det_path.exists() else []
+    rec_files = list(rec_path.glob('*.pdmodel')) if rec_path.exists() else []
+    
+    return len(det_files) > 0 and len(rec_files) > 0
+
+
+def onnx_models_exist(det_model=ONNX_DET_MODEL, rec_model=ONNX_REC_MODEL, rec_dict=ONNX_REC_DICT):
+    """
+    Check if the ONNX exports of the OCR models exist
+    
+    Args:
+        det_model: Text detection model file
+        rec_model: Text recognition model file
+        rec_dict: Character dictionary of the recognition model
+    
+    Returns:
+        bool: True if all three files exist
+    """
+    return all(Path(path).is_file() for path in (det_model, rec_model, rec_dict))
+
+
+def engine_models_exist(engine=DEFAULT_OCR_ENGINE):
+    """
+    Check if an OCR engine has the models it needs
+    
+    The ONNX engines can also start from the Paddle models, which they
+    export (and quantize) on first load.
+    
+    Args:
+        engine: 'paddle', 'onnx' or 'onnx-int8'
+    
+    Returns:
+        bool: True if the engine can load
+    """
+    if engine == 'onnx-int8' and onnx_models_exist(ONNX_DET_MODEL_INT8, ONNX_REC_MODEL_INT8):
+        return True
+    if engine in ('onnx', 'onnx-int8') and onnx_models_exist():
+        return True
+    return models_exist()
@@ -0,0 +1,230 @@
+"""
+CPU tuning for the MapleLegends ShopHelper OCR engines
+Sweeps threads, oneDNN, batch size and detector input size over stored captures
+and remembers the fastest accurate settings per machine
+"""
+
+import os
+import time
+import json
+import hashlib
+import platform
+import statistics
+from persistence import CorruptFileError, load_document, save_document
+
+TUNING_PATH = "ocr_tuning.json"
+
+# Engine settings; a cpu_threads of 0 leaves the thread count to the library
+DEFAULT_TUNING = {
+    'cpu_threads': 0,
+    'enable_mkldnn': False,
+    'rec_batch_num': 6,
+    'det_limit_side_len': 960
+}
+
+
+def machine_fingerprint():
+    """
+    Identify this machine's CPU setup
+    
+    Returns:
+        Tuple of (short hash, human-readable description)
+    """
+    description = (f"{platform.system()} {platform.machine()} "
+                   f"{platform.processor() or 'unknown CPU'} x{os.cpu_count()}")
+    return hashlib.sha1(description.encode('utf-8')).hexdigest()[:12], description
+
+
+def load_tuning(engine, path=TUNING_PATH):
+    """
+    Get the tuned settings saved for this machine and engine
+    
+    Args:
+        engine: OCR engine name
+        path: Tuning file
+    
+    Returns:
+        Settings dictionary, or None if this machine has not been tuned
+    """
+    try:
+        data = load_document(path)
+    except CorruptFileError as e:
+        print(f"Ignoring OCR tuning file: {e}")
+        return None
+    if not data:
+        return None
+    
+    fingerprint, _ = machine_fingerprint()
+    entry = data.get('machines', {}).get(fingerprint, {}).get(engine)
+    if entry is None:
+        return None
+    return dict(DEFAULT_TUNING, **entry['settings'])
+
+
+def save_tuning(engine, settings, metrics, path=TUNING_PATH):
+    """
+    Save tuned settings for this machine and engine
+    
+    Args:
+        engine: OCR engine name
+        settings: Settings dictionary
+        metrics: Measurements the settings were chosen on
+        path: Tuning file
+    """
+    try:
+        data = load_document(path) or {}
+    except CorruptFileError:
+        data = {}
+    
+    fingerprint, description = machine_fingerprint()
+    machine = data.setdefault('machines', {}).setdefault(fingerprint, {})
+    machine['description'] = description
+    machine[engine] = {'settings': settings, 'metrics': metrics, 'tuned_at': time.time()}
+    save_document(path, data)
+
+
+def load_labels(corpus_dir):
+    """Load the expected item text of a capture corpus from its labels.json, if any"""
+    labels_path = os.path.join(corpus_dir, "labels.json")
+    if not os.path.exists(labels_path):
+        return {}
+    with open(labels_path, 'r') as f:
+        return json.load(f)
+
+
+def normalize_text(text):
+    """Normalize OCR text for comparison"""
+    return " ".join(text.lower().split())
+
+
+def measure(processor, images, settings, labels=None, reference=None, repeats=3, preprocess=True):
+    """
+    Measure latency and accuracy of one setting combination
+    
+    Args:
+        processor: OCRProcessor to run
+        images: List of (name, image) captures
+        settings: Tuning settings to load the engine with
+        labels: Capture name -> expected item text
+        reference: Capture name -> text lines read with the default settings,
+            used for captures without a label
+        repeats: Runs per capture
+        preprocess: Apply game text preprocessing
+    
+    Returns:
+        Dictionary with median 'latency_ms', 'accuracy' (fraction correct)
+        and the 'texts' read, or None if the engine did not load
+    """
+    processor.set_tuning(settings)
+    if not processor.ensure_engine():
+        return None
+    processor.process_image(images[0][1], preprocess=preprocess)  # Warm up
+    
+    labels = labels or {}
+    samples = []
+    texts = {}
+    correct = 0
+    for name, image in images:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = processor.process_image(image, preprocess=preprocess)
+            samples.append(time.perf_counter() - start)
+        texts[name] = [normalize_text(result['text']) for result in results]
+        
+        if name in labels:
+            correct += normalize_text(labels[name]) in texts[name]
+        elif reference is not None:
+            correct += texts[name] == reference.get(name)
+        else:
+            correct += 1
+    
+    return {
+        'latency_ms': statistics.median(samples) * 1000,
+        'accuracy': correct / len(images),
+        'texts': texts
+    }
+
+
+def sweep_values(engine):
+    """
+    Candidate values of each setting, in the order they are tuned
+    
+    oneDNN is a PaddlePaddle option; for ONNX Runtime it selects the
+    oneDNN execution provider, offered only when the installed build has it.
+    """
+    cpu_count = os.cpu_count() or 1
+    threads = sorted({1, 2, 4, max(1, cpu_count // 2), cpu_count})
+    
+    mkldnn = [False, True]
+    if engine != 'paddle':
+        try:
+            import onnxruntime
+            if 'DnnlExecutionProvider' not in onnxruntime.get_available_providers():
+                mkldnn = [False]
+        except ImportError:
+            mkldnn = [False]
+    
+    return [
+        ('cpu_threads', [0] + threads),
+        ('enable_mkldnn', mkldnn),
+        ('rec_batch_num', [1, 2, 6]),
+        ('det_limit_side_len', [320, 480, 736, 960])
+    ]
+
+
+def autotune(processor, images, labels=None, repeats=3, tolerance=0.0, preprocess=True, callback=None):
+    """
+    Find the fastest engine settings that read the captures as well as the defaults
+    
+    Settings are tuned one at a time (threads, oneDNN, batch size, detector
+    input size), each keeping the best value found so far, which takes a
+    few dozen engine loads instead of every combination. A candidate only
+    counts if its accuracy is within `tolerance` of the default settings.
+    
+    Args:
+        processor: OCRProcessor whose engine is tuned
+        images: List of (name, image) captures
+        labels: Capture name -> expected item text
+        repeats: Runs per capture
+        tolerance: Accuracy (as a fraction) a faster setting may lose
+        preprocess: Apply game text preprocessing
+        callback: Optional function receiving progress messages
+    
+    Returns:
+        Tuple of (best settings, their measurement, default measurement),
+        or (None, None, None) if the engine did not load
+    """
+    processor.cache.maxsize = 0  # Measure recognition, not the capture cache
+    
+    # The first engine load in a process pays one-off costs, so the
+    # defaults are measured on a second load
+    if measure(processor, images[:1], DEFAULT_TUNING, labels, None, 1, preprocess) is None:
+        return None, None, None
+    baseline = measure(processor, images, DEFAULT_TUNING, labels, None, repeats, preprocess)
+    if baseline is None:
+        return None, None, None
+    if callback:
+        callback(f"defaults: {baseline['latency_ms']:.1f} ms, accuracy {baseline['accuracy'] * 100:.0f}%")
+    
+    best_settings = dict(DEFAULT_TUNING)
+    best = baseline
+    for key, values in sweep_values(processor.engine_name):
+        for value in values:
+            if value == best_settings[key]:
+                continue
+            settings = dict(best_settings, **{key: value})
+            result = measure(processor, images, settings, labels, baseline['texts'], repeats, preprocess)
+            if result is None:
+                if callback:
+                    callback(f"{key}={value}: engine failed to load")
+                continue
+            
+            accurate = result['accuracy'] >= baseline['accuracy'] - tolerance
+            if callback:
+                callback(f"{key}={value}: {result['latency_ms']:.1f} ms, "
+                         f"accuracy {result['accuracy'] * 100:.0f}%{'' if accurate else ' (rejected)'}")
+            if accurate and result['latency_ms'] < best['latency_ms']:
+                best_settings, best = settings, result
+    
+    processor.set_tuning(best_settings)
+    return best_settings, best, baseline
@@ -5,54 +5,992 @@ Optimized for game text with faster inference
 """
 
 import os
+import re
 import numpy as np
 from PIL import Image
 import time
-from paddleocr import PaddleOCR
 import cv2
 import sys
 import shutil
 from pathlib import Path
-import requests
 import io
+import copy
+import hashlib
 import tarfile
+import threading
+from collections import OrderedDict
+from ocr_models import (DET_MODEL_DIR, REC_MODEL_DIR, CLS_MODEL_DIR, ONNX_MODEL_DIR,
+                        ONNX_DET_MODEL, ONNX_REC_MODEL, ONNX_REC_DICT, ONNX_DET_MODEL_INT8,
+                        ONNX_REC_MODEL_INT8, DEFAULT_OCR_ENGINE,
+                        models_exist, onnx_models_exist, engine_models_exist)
+from ocr_lexicon import LexiconDecoder
+
+# Capture sizes (width, height) the engine is warmed up on: the default grab
+# region and a typical tooltip left by auto-crop
+WARMUP_SIZES = ((480, 160), (240, 80))
+
+def find_text_rows(image, min_height=6, max_gap=2, padding=3):
+    """Locate horizontal text lines with a projection profile
+    
+    The image is binarized with Otsu's threshold and the less common class
+    is taken as ink, so light-on-dark tooltips and dark-on-light text both
+    work. Rows containing ink are grouped into bands; each band becomes one
+    box spanning its inked columns.
+    
+    Args:
+        image: Grayscale, RGB or BGRA numpy array
+        min_height: Bands shorter than this many pixels are treated as noise
+        max_gap: Bands separated by at most this many blank rows are merged
+        padding: Pixels added around each box
+    
+    Returns:
+        List of (x0, y0, x1, y1) boxes, top to bottom
+    """
+    if len(image.shape) == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        gray = cv2.cvtColor(image, code)
+    else:
+        gray = image
+    
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    ink = binary.astype(bool)
+    if ink.mean() > 0.5:
+        ink = ~ink
+    
+    height, width = ink.shape
+    row_has_ink = ink.sum(axis=1) > max(1, width // 100)
+    
+    # Group inked rows into bands, bridging small gaps
+    bands = []
+    start = None
+    last_ink = None
+    for y in range(height):
+        if row_has_ink[y]:
+            if start is None:
+                start = y
+            elif y - last_ink - 1 > max_gap:
+                bands.append((start, last_ink + 1))
+                start = y
+            last_ink = y
+    if start is not None:
+        bands.append((start, last_ink + 1))
+    
+    boxes = []
+    for y0, y1 in bands:
+        if y1 - y0 < min_height:
+            continue
+        columns = np.flatnonzero(ink[y0:y1].any(axis=0))
+        boxes.append((max(0, int(columns[0]) - padding), max(0, y0 - padding),
+                      min(width, int(columns[-1]) + 1 + padding), min(height, y1 + padding)))
+    return boxes
+
+
+def capture_hash(image):
+    """Hash the exact pixels of an image
+    
+    Only pixel-identical captures share a hash. Tooltips of different items
+    can differ in a few letters only, which a perceptual hash would treat
+    as the same capture.
+    
+    Args:
+        image: Numpy array of any shape and type
+    
+    Returns:
+        16-byte BLAKE2b digest of the shape, type and pixels
+    """
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(f"{image.shape}{image.dtype}".encode('ascii'), digest_size=16)
+    digest.update(image.data)
+    return digest.digest()
+
+
+# Tooltip lines that describe an item rather than name it: "Req Lev: 10",
+# "STR: +3", "+5 ATT", bare numbers and fragments without a real word
+STAT_LINE_PATTERN = re.compile(r':|^\s*[+\-]|^[^A-Za-z]*$|^\W*\w{0,2}\W*$')
+
+
+def rank_tooltip_lines(results, max_candidates=2, weights=(0.45, 0.35, 0.2)):
+    """Pick the lines of a capture most likely to hold the item name
+    
+    The name is the first and usually the largest line of a tooltip, so
+    each line is scored by how close it is to the top, its box height
+    relative to the tallest line and its recognition confidence.
+    Requirement and stat lines are skipped unless nothing else was read.
+    
+    Args:
+        results: OCR results with 'text', 'confidence' and optionally 'box'
+        max_candidates: Maximum number of lines returned
+        weights: Weights of the (position, height, confidence) scores
+    
+    Returns:
+        Indices into results, most likely name line first
+    """
+    lines = []
+    for i, result in enumerate(results):
+        text = result.get('text', '').strip()
+        if not text:
+            continue
+        box = result.get('box')
+        if box:
+            ys = [point[1] for point in box]
+            top, height = min(ys), max(ys) - min(ys)
+        else:
+            top, height = i, 0  # Without a box keep the reading order
+        lines.append((i, top, height, result.get('confidence') or 0, text))
+    
+    names = [line for line in lines if not STAT_LINE_PATTERN.search(line[4])]
+    lines = names or lines
+    if len(lines) <= 1:
+        return [line[0] for line in lines]
+    
+    order = sorted(lines, key=lambda line: line[1])
+    position = {line[0]: 1 - rank / len(order) for rank, line in enumerate(order)}
+    tallest = max(line[2] for line in lines) or 1
+    
+    position_weight, height_weight, confidence_weight = weights
+    scores = {
+        i: position_weight * position[i] + height_weight * height / tallest + confidence_weight * confidence
+        for i, _, height, confidence, _ in lines
+    }
+    return sorted(scores, key=lambda i: (-scores[i], i))[:max_candidates]
+
+
+def synthetic_tooltip(width, height, lines=("Sample Item Name", "Req Lev: 30", "STR: +3", "Price: 1,000")):
+    """
+    Draw light text on a dark background, laid out like an item tooltip
+    
+    Used to warm up the OCR engine on input shaped like real captures.
+    
+    Args:
+        width: Image width
+        height: Image height
+        lines: Text lines, the first drawn larger like an item name
+    
+    Returns:
+        RGB image as a numpy array
+    """
+    image = np.full((height, width, 3), 24, dtype=np.uint8)
+    y = 6
+    for i, line in enumerate(lines):
+        scale = 0.6 if i == 0 else 0.45
+        (_, text_height), baseline = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, scale, 1)
+        y += text_height + 4
+        if y + baseline > height:
+            break
+        cv2.putText(image, line, (8, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (235, 235, 235), 1, cv2.LINE_AA)
+        y += baseline
+    return image
+
+
+class CaptureCache:
+    """Bounded LRU cache of OCR results keyed by exact capture hash
+    
+    Each entry holds the recognized text and, once the OCR worker has
+    matched it, the match results for the threshold they were made with.
+    Match results can be dropped on their own when items change, which
+    keeps the text so only matching runs again.
+    """
+    
+    def __init__(self, maxsize=64):
+        """Initialize the cache
+        
+        Args:
+            maxsize: Maximum number of captures kept
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Get the entry for a capture hash, or None on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, results):
+        """Store the OCR results of a capture"""
+        with self.lock:
+            self.entries[key] = {'results': results, 'matches': None, 'match_threshold': None}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+    
+    def store_matches(self, key, matches, threshold):
+        """Attach match results to a cached capture"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry['matches'] = matches
+                entry['match_threshold'] = threshold
+    
+    def invalidate_matches(self, item_names=None):
+        """Drop cached match results
+        
+        Args:
+            item_names: Only drop matches that reference these items (None for all)
+        """
+        with self.lock:
+            for entry in self.entries.values():
+                matches = entry['matches']
+                if matches is None:
+                    continue
+                if item_names is None or any(match.get('matched_item') in item_names
+                                             for match in matches):
+                    entry['matches'] = None
+                    entry['match_threshold'] = None
+    
+    def clear(self):
+        """Remove all entries"""
+        with self.lock:
+            self.entries.clear()
+
+
+def _to_bgr(image):
+    """Give an image the three channels the OCR models take"""
+    if len(image.shape) == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return image
+
+
+def order_box_points(points):
+    """Order the corners of a rotated rectangle as PaddleOCR does
+    
+    Args:
+        points: Four (x, y) corners in any order
+    
+    Returns:
+        Float32 array of the top-left, top-right, bottom-right and bottom-left corners
+    """
+    points = sorted(np.asarray(points, dtype=np.float32).tolist(), key=lambda point: point[0])
+    left = sorted(points[:2], key=lambda point: point[1])
+    right = sorted(points[2:], key=lambda point: point[1])
+    return np.array([left[0], right[0], right[1], left[1]], dtype=np.float32)
+
+
+def db_postprocess(pred, image_shape, thresh=0.3, box_thresh=0.5, unclip_ratio=1.6,
+                   max_candidates=1000, min_size=3):
+    """Turn a DB text detector's probability map into text boxes
+    
+    Follows PaddleOCR's DBPostProcess: threshold the map, score each
+    contour's minimum-area rectangle by its mean probability, then grow the
+    rectangle by area * unclip_ratio / perimeter on every side. Growing a
+    rectangle that way is exact, so the polygon clipping library Paddle
+    uses is not needed.
+    
+    Args:
+        pred: Probability map of shape (height, width)
+        image_shape: (height, width) of the image the boxes are scaled to
+        thresh: Probability above which a pixel is text
+        box_thresh: Minimum mean probability of a box
+        unclip_ratio: How far boxes are grown past the shrunk text kernels
+        max_candidates: Most contours considered
+        min_size: Boxes with a shorter side are dropped
+    
+    Returns:
+        List of float32 (4, 2) box arrays in image coordinates
+    """
+    height, width = pred.shape
+    dest_height, dest_width = image_shape[:2]
+    bitmap = (pred > thresh).astype(np.uint8) * 255
+    contours = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[-2]
+    
+    boxes = []
+    for contour in contours[:max_candidates]:
+        rect = cv2.minAreaRect(contour)
+        if min(rect[1]) < min_size:
+            continue
+        box = order_box_points(cv2.boxPoints(rect))
+        
+        # Mean probability inside the box
+        x0 = int(np.clip(np.floor(box[:, 0].min()), 0, width - 1))
+        x1 = int(np.clip(np.ceil(box[:, 0].max()), 0, width - 1))
+        y0 = int(np.clip(np.floor(box[:, 1].min()), 0, height - 1))
+        y1 = int(np.clip(np.ceil(box[:, 1].max()), 0, height - 1))
+        mask = np.zeros((y1 - y0 + 1, x1 - x0 + 1), dtype=np.uint8)
+        cv2.fillPoly(mask, [(box - [x0, y0]).astype(np.int32)], 1)
+        if cv2.mean(pred[y0:y1 + 1, x0:x1 + 1], mask)[0] < box_thresh:
+            continue
+        
+        # Unclip: offset every side of the rectangle by the same distance
+        (center_x, center_y), (rect_width, rect_height), angle = rect
+        distance = rect_width * rect_height * unclip_ratio / (2 * (rect_width + rect_height))
+        rect = ((center_x, center_y), (rect_width + 2 * distance, rect_height + 2 * distance), angle)
+        if min(rect[1]) < min_size + 2:
+            continue
+        box = order_box_points(cv2.boxPoints(rect))
+        
+        box[:, 0] = np.clip(np.round(box[:, 0] / width * dest_width), 0, dest_width)
+        box[:, 1] = np.clip(np.round(box[:, 1] / height * dest_height), 0, dest_height)
+        if int(np.linalg.norm(box[0] - box[1])) <= 3 or int(np.linalg.norm(box[0] - box[3])) <= 3:
+            continue
+        boxes.append(box)
+    return boxes
+
+
+def sort_text_boxes(boxes):
+    """Sort text boxes into reading order: top to bottom, then left to right within a line"""
+    boxes = sorted(boxes, key=lambda box: (box[0][1], box[0][0]))
+    for i in range(len(boxes) - 1):
+        for j in range(i, -1, -1):
+            if abs(boxes[j + 1][0][1] - boxes[j][0][1]) < 10 and boxes[j + 1][0][0] < boxes[j][0][0]:
+                boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+            else:
+                break
+    return boxes
+
+
+def crop_text_box(image, box):
+    """Cut a (possibly rotated) text box out of an image as an upright strip"""
+    box = np.asarray(box, dtype=np.float32)
+    crop_width = int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3])))
+    crop_height = int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2])))
+    target = np.float32([[0, 0], [crop_width, 0], [crop_width, crop_height], [0, crop_height]])
+    transform = cv2.getPerspectiveTransform(box, target)
+    crop = cv2.warpPerspective(image, transform, (crop_width, crop_height),
+                               borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+    if crop.shape[0] >= crop.shape[1] * 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+
+def det_input_blob(image, limit_side_len=960):
+    """Resize and normalize an image for the DB text detector
+    
+    Args:
+        image: Three-channel image as a numpy array
+        limit_side_len: Longest side after resizing; both sides are rounded to multiples of 32
+    
+    Returns:
+        Float32 array of shape (1, 3, height, width)
+    """
+    height, width = image.shape[:2]
+    ratio = min(1.0, limit_side_len / max(height, width))
+    resize_height = max(int(round(height * ratio / 32) * 32), 32)
+    resize_width = max(int(round(width * ratio / 32) * 32), 32)
+    resized = cv2.resize(image, (resize_width, resize_height))
+    
+    blob = resized.astype(np.float32) / 255.0
+    blob -= np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    blob /= np.array([0.229, 0.224, 0.225], dtype=np.float32)
+    return blob.transpose(2, 0, 1)[np.newaxis]
+
+
+def rec_input_blob(crops, rec_image_shape=(3, 48, 320)):
+    """Resize, normalize and pad a batch of text crops for the CRNN recognizer
+    
+    Every crop is scaled to the model height and padded to the width of the
+    widest crop in the batch (at least the model's minimum width).
+    
+    Args:
+        crops: List of three-channel text line images
+        rec_image_shape: (channels, height, minimum width) of the model input
+    
+    Returns:
+        Float32 array of shape (len(crops), channels, height, width)
+    """
+    channels, height, min_width = rec_image_shape
+    max_ratio = max([min_width / height] + [crop.shape[1] / float(crop.shape[0]) for crop in crops])
+    width = int(height * max_ratio)
+    
+    blob = np.zeros((len(crops), channels, height, width), dtype=np.float32)
+    for i, crop in enumerate(crops):
+        resized_width = min(width, int(np.ceil(height * crop.shape[1] / crop.shape[0])))
+        resized = cv2.resize(crop, (max(1, resized_width), height)).astype(np.float32)
+        blob[i, :, :, :resized.shape[1]] = (resized.transpose(2, 0, 1) / 255.0 - 0.5) / 0.5
+    return blob
+
+
+def ctc_greedy_decode(probs, characters):
+    """Decode CTC output by best path
+    
+    Repeated labels are merged and blanks (label 0) dropped; a line's
+    confidence is the mean probability of the characters kept.
+    
+    Args:
+        probs: Array of shape (batch, time steps, classes) with softmax outputs
+        characters: Class labels, 'blank' first
+    
+    Returns:
+        List of (text, confidence) tuples
+    """
+    labels = probs.argmax(axis=2)
+    label_probs = probs.max(axis=2)
+    
+    results = []
+    for line_labels, line_probs in zip(labels, label_probs):
+        keep = line_labels != 0
+        keep[1:] &= line_labels[1:] != line_labels[:-1]
+        text = ''.join(characters[label] for label in line_labels[keep])
+        confidence = float(line_probs[keep].mean()) if keep.any() else 0.0
+        results.append((text, confidence))
+    return results
+
+
+def line_probs(rec_result):
+    """Get the character probabilities a recognizer result carries, or None"""
+    if len(rec_result) > 2 and isinstance(rec_result[2], np.ndarray):
+        return rec_result[2]
+    return None
+
+
+class CTCProbsDecode:
+    """Wraps PaddleOCR's CTC label decoder so each result carries its probabilities
+    
+    Results become (text, confidence, probabilities), the layout of
+    OnnxOCREngine's recognizer; PaddleOCR passes the extra element through.
+    """
+    
+    def __init__(self, decode):
+        """
+        Args:
+            decode: The recognizer's CTCLabelDecode
+        """
+        self.decode = decode
+        self.character = decode.character
+    
+    def __call__(self, preds, *args, **kwargs):
+        """Decode a batch like the wrapped decoder, adding each line's probabilities"""
+        results = self.decode(preds, *args, **kwargs)
+        if isinstance(preds, (tuple, list)):
+            preds = preds[-1]
+        if not isinstance(preds, np.ndarray):
+            preds = preds.numpy()
+        return [(result[0], result[1], probs) for result, probs in zip(results, preds)]
+
+
+class OnnxOCREngine:
+    """PaddleOCR's DB detector and CRNN recognizer run through ONNX Runtime
+    
+    Runs the same models as the Paddle engine, exported to ONNX, on the CPU
+    execution provider; pre- and post-processing are reimplemented with
+    NumPy and OpenCV. Importing onnxruntime takes a fraction of the time
+    and memory of paddlepaddle and needs no MKL libraries on the PATH.
+    
+    Offers the subset of the PaddleOCR interface OCRProcessor uses:
+    ocr() for the full pipeline and text_recognizer() for batched
+    recognition of row crops.
+    """
+    
+    def __init__(self, det_model=ONNX_DET_MODEL, rec_model=ONNX_REC_MODEL, rec_dict=ONNX_REC_DICT,
+                 det_db_thresh=0.3, det_db_box_thresh=0.5, det_db_unclip_ratio=1.6,
+                 det_limit_side_len=960, rec_image_shape=(3, 48, 320), rec_batch_num=6,
+                 drop_score=0.5, cpu_threads=0, use_dnnl=False):
+        """
+        Load the ONNX models
+        
+        Args:
+            det_model: Text detection model file
+            rec_model: Text recognition model file
+            rec_dict: Recognition character dictionary, one character per line
+            det_db_thresh: Probability above which a pixel is text
+            det_db_box_thresh: Minimum mean probability of a detected box
+            det_db_unclip_ratio: How far detected boxes are grown
+            det_limit_side_len: Longest image side fed to the detector
+            rec_image_shape: (channels, height, minimum width) of recognizer input
+            rec_batch_num: Text lines recognized per model call
+            drop_score: Recognized lines below this confidence are dropped
+            cpu_threads: Threads per model call (0 for ONNX Runtime's default)
+            use_dnnl: Run on the oneDNN execution provider if this build has it
+        
+        Raises:
+            ImportError: onnxruntime is not installed
+        """
+        import onnxruntime
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = cpu_threads
+        providers = ['CPUExecutionProvider']
+        if use_dnnl and 'DnnlExecutionProvider' in onnxruntime.get_available_providers():
+            providers.insert(0, 'DnnlExecutionProvider')
+        self.det_session = onnxruntime.InferenceSession(det_model, options, providers=providers)
+        self.rec_session = onnxruntime.InferenceSession(rec_model, options, providers=providers)
+        self.det_input = self.det_session.get_inputs()[0].name
+        self.rec_input = self.rec_session.get_inputs()[0].name
+        
+        with open(rec_dict, 'r', encoding='utf-8') as f:
+            characters = [line.rstrip('\r\n') for line in f]
+        self.characters = ['blank'] + characters + [' ']
+        
+        self.det_db_thresh = det_db_thresh
+        self.det_db_box_thresh = det_db_box_thresh
+        self.det_db_unclip_ratio = det_db_unclip_ratio
+        self.det_limit_side_len = det_limit_side_len
+        self.rec_image_shape = rec_image_shape
+        self.rec_batch_num = rec_batch_num
+        self.drop_score = drop_score
+    
+    def detect(self, image):
+        """
+        Find text boxes in an image
+        
+        Args:
+            image: Three-channel image as a numpy array
+        
+        Returns:
+            List of (4, 2) box arrays in reading order
+        """
+        blob = det_input_blob(image, self.det_limit_side_len)
+        pred = self.det_session.run(None, {self.det_input: blob})[0][0, 0]
+        boxes = db_postprocess(pred, image.shape[:2], self.det_db_thresh,
+                               self.det_db_box_thresh, self.det_db_unclip_ratio)
+        return sort_text_boxes(boxes)
+    
+    def text_recognizer(self, crops):
+        """
+        Recognize text line crops
+        
+        Crops are batched by aspect ratio so little padding is recognized.
+        
+        Args:
+            crops: List of text line images
+        
+        Returns:
+            Tuple of (list of (text, confidence, probabilities), seconds spent),
+            like PaddleOCR's recognizer; the probabilities are the (time steps,
+            classes) softmax outputs the text was decoded from
+        """
+        start_time = time.perf_counter()
+        crops = [_to_bgr(crop) for crop in crops]
+        order = np.argsort([crop.shape[1] / float(crop.shape[0]) for crop in crops])
+        
+        results = [None] * len(crops)
+        for start in range(0, len(crops), self.rec_batch_num):
+            batch = order[start:start + self.rec_batch_num]
+            blob = rec_input_blob([crops[i] for i in batch], self.rec_image_shape)
+            probs = self.rec_session.run(None, {self.rec_input: blob})[0]
+            for i, result, line_probs in zip(batch, ctc_greedy_decode(probs, self.characters), probs):
+                results[i] = result + (line_probs,)
+        return results, time.perf_counter() - start_time
+    
+    def ocr(self, img, det=True, rec=True, cls=False):
+        """
+        Run the OCR pipeline with PaddleOCR's result layout
+        
+        Args:
+            img: Image as a numpy array
+            det: Detect text boxes; when False the whole image is one text line
+            rec: Recognize the text; when False only boxes are returned
+            cls: Ignored; there is no angle classifier
+        
+        Returns:
+            [[[box, (text, confidence, probabilities)], ...]] with det and rec,
+            [[box, ...]] with only det, or [[(text, confidence, probabilities)]] with only rec
+        """
+        image = _to_bgr(img)
+        if not det:
+            return [self.text_recognizer([image])[0]]
+        
+        boxes = self.detect(image)
+        if not rec:
+            return [[box.tolist() for box in boxes]]
+        if not boxes:
+            return [[]]
+        
+        texts, _ = self.text_recognizer([crop_text_box(image, box) for box in boxes])
+        return [[[box.tolist(), result] for box, result in zip(boxes, texts)
+                 if result[1] >= self.drop_score]]
+
+
+def export_onnx_models(det_model_dir=DET_MODEL_DIR, rec_model_dir=REC_MODEL_DIR, callback=None):
+    """
+    Export the Paddle OCR models to ONNX for OnnxOCREngine
+    
+    Needs the paddle2onnx command. The character dictionary is copied from
+    the installed paddleocr package.
+    
+    Args:
+        det_model_dir: Folder of the Paddle text detection model
+        rec_model_dir: Folder of the Paddle text recognition model
+        callback: Optional function receiving progress messages
+    
+    Returns:
+        bool: True if the ONNX models and dictionary are in place
+    """
+    import glob
+    import subprocess
+    import importlib.util
+    
+    converter = shutil.which('paddle2onnx')
+    if converter is None:
+        print("paddle2onnx is not installed; install it to export the OCR models to ONNX")
+        return False
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    
+    try:
+        for model_dir, save_file in ((det_model_dir, ONNX_DET_MODEL), (rec_model_dir, ONNX_REC_MODEL)):
+            if os.path.exists(save_file):
+                continue
+            if callback:
+                callback(f"Exporting {model_dir} to ONNX...")
+            model_file = sorted(glob.glob(os.path.join(model_dir, '*.pdmodel')))[0]
+            params_file = os.path.splitext(model_file)[0] + '.pdiparams'
+            subprocess.run([converter, '--model_dir', model_dir,
+                            '--model_filename', os.path.basename(model_file),
+                            '--params_filename', os.path.basename(params_file),
+                            '--save_file', save_file, '--opset_version', '11'],
+                           check=True, capture_output=True)
+        
+        if not os.path.exists(ONNX_REC_DICT):
+            spec = importlib.util.find_spec('paddleocr')
+            if spec is None or not spec.submodule_search_locations:
+                print(f"paddleocr is not installed; copy its ppocr/utils/en_dict.txt to {ONNX_REC_DICT}")
+                return False
+            package_dir = list(spec.submodule_search_locations)[0]
+            shutil.copyfile(os.path.join(package_dir, 'ppocr', 'utils', 'en_dict.txt'), ONNX_REC_DICT)
+    except (IndexError, OSError, subprocess.CalledProcessError) as e:
+        print(f"ONNX model export error: {e}")
+        return False
+    
+    return onnx_models_exist()
+
+
+class CalibrationCaptures:
+    """Feeds model inputs to ONNX Runtime's static quantization calibrator"""
+    
+    def __init__(self, input_name, inputs):
+        """
+        Args:
+            input_name: Name of the model input
+            inputs: List of input arrays, one per calibration run
+        """
+        self.input_name = input_name
+        self.inputs = iter(inputs)
+    
+    def get_next(self):
+        """Get the next calibration input, or None when all have been used"""
+        blob = next(self.inputs, None)
+        return None if blob is None else {self.input_name: blob}
+
+
+def quantize_onnx_models(method='dynamic', calibration_images=None, callback=None):
+    """
+    Quantize the ONNX detector and recognizer to INT8
+    
+    Dynamic quantization stores INT8 weights and quantizes activations on
+    the fly, so it needs no data. Static quantization also fixes the
+    activation ranges, measured by running the FP32 models over the
+    calibration images: whole images for the detector and their text rows
+    for the recognizer.
+    
+    Args:
+        method: 'dynamic' or 'static'
+        calibration_images: Preprocessed captures, required for static quantization
+        callback: Optional function receiving progress messages
+    
+    Raises:
+        ValueError: Unknown method, or static quantization without calibration images
+        ImportError: onnxruntime is not installed
+    """
+    import onnxruntime
+    from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantFormat, QuantType
+    
+    if method not in ('dynamic', 'static'):
+        raise ValueError(f"Unknown quantization method: {method}")
+    
+    calibration = {}
+    if method == 'static':
+        if not calibration_images:
+            raise ValueError("Static quantization needs calibration captures")
+        images = [_to_bgr(image) for image in calibration_images]
+        calibration[ONNX_DET_MODEL] = [det_input_blob(image) for image in images]
+        
+        crops = []
+        for image in images:
+            boxes = find_text_rows(image) or [(0, 0, image.shape[1], image.shape[0])]
+            crops.extend(np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes)
+        calibration[ONNX_REC_MODEL] = [rec_input_blob([crop]) for crop in crops]
+    
+    for model, quantized_model in ((ONNX_DET_MODEL, ONNX_DET_MODEL_INT8), (ONNX_REC_MODEL, ONNX_REC_MODEL_INT8)):
+        if callback:
+            callback(f"Quantizing {model} to INT8 ({method})...")
+        temp_path = f"{quantized_model}.tmp"
+        if method == 'dynamic':
+            quantize_dynamic(model, temp_path, weight_type=QuantType.QInt8)
+        else:
+            session = onnxruntime.InferenceSession(model, providers=['CPUExecutionProvider'])
+            reader = CalibrationCaptures(session.get_inputs()[0].name, calibration[model])
+            quantize_static(model, temp_path, reader, quant_format=QuantFormat.QDQ,
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        # Replace the previous quantization only once the new one is complete
+        os.replace(temp_path, quantized_model)
+
+
+_shared_processor = None
+_shared_processor_lock = threading.Lock()
+
+
+def get_ocr_processor(engine=None):
+    """
+    Get the process-wide OCR processor, creating it on first call
+    
+    The OCR models are not loaded here. They load on the first OCR
+    call, or earlier if something calls ensure_engine() (for example a
+    background thread once the window is up), so every component shares
+    one set of predictors.
+    
+    Args:
+        engine: Engine the processor is created with (see OCRProcessor.set_engine to switch later)
+    
+    Returns:
+        The shared OCRProcessor
+    """
+    global _shared_processor
+    with _shared_processor_lock:
+        if _shared_processor is None:
+            _shared_processor = OCRProcessor(use_gpu=False, check_models=True, load_engine=False,
+                                             engine=engine or DEFAULT_OCR_ENGINE)
+        return _shared_processor
+
 
 class OCRProcessor:
-    def __init__(self, use_gpu=False, check_models=True):
+    def __init__(self, use_gpu=False, check_models=True, fast_mode=True, load_engine=True,
+                 engine=DEFAULT_OCR_ENGINE, tuning=None, warmup=True):
         """
         Initialize OCR processor with PaddleOCR
         
         Args:
             use_gpu: Whether to use GPU acceleration (default: False for CPU-only)
             check_models: Whether to check if models exist (default: True)
+            fast_mode: Recognize projection-profile rows instead of running text detection
+            load_engine: Load the models now; otherwise they load on first use or ensure_engine()
+            engine: 'paddle' for PaddlePaddle inference, 'onnx' for ONNX Runtime on the CPU,
+                or 'onnx-int8' for ONNX Runtime with INT8-quantized models
+            tuning: CPU settings (see ocr_tuning.DEFAULT_TUNING); None uses the
+                settings auto-tuned for this machine, or the defaults
+            warmup: Run warm-up inferences right after the engine loads, so the
+                first capture does not pay for graph optimization and buffer allocation
         """
         # Create models directory if it doesn't exist
         os.makedirs('models', exist_ok=True)
         
         # Model paths
-        self.det_model_dir = 'models/det'
-        self.rec_model_dir = 'models/rec'
-        self.cls_model_dir = 'models/cls'
+        self.det_model_dir = DET_MODEL_DIR
+        self.rec_model_dir = REC_MODEL_DIR
+        self.cls_model_dir = CLS_MODEL_DIR
+        self.engine_name = engine
+        self.tuning = tuning
         
         # Check if models exist
         self.models_exist = self.check_models_exist() if check_models else True
         self.initialization_error = None
+        self.use_gpu = use_gpu
+        self.ocr = None
+        self.engine_lock = threading.Lock()  # Held while an engine loads and warms up
+        self.state_lock = threading.Lock()   # Held briefly to change the engine or its settings
+        self.engine_generation = 0           # Bumped whenever the loaded engine goes stale
+        self.engine_load_time = None
+        self.lexicon_decoder = None
+        self.warmup_enabled = warmup
+        self.reset_latency_stats()
         
-        if not self.models_exist:
-            # Don't initialize PaddleOCR yet - models will be downloaded later
-            self.ocr = None
-        else:
+        # Recognition-only fast path settings, needed by the warm-up
+        self.fast_mode = fast_mode
+        self.fast_min_confidence = 0.8  # Fall back to full detection below this
+        self.fast_max_rows = 4  # More rows than a tooltip strip holds: use detection
+        
+        if self.models_exist and load_engine:
             # Initialize PaddleOCR with optimized settings for game text
-            init_success = self.initialize_paddleocr(use_gpu)
-            if not init_success:
-                self.ocr = None
-                self.initialization_error = "Failed to initialize PaddleOCR. Check console for details."
-                print("OCR initialization failed. Models may be incomplete or dependencies missing.")
+            self.ensure_engine()
+        # Otherwise the models are downloaded or loaded later
+        
+        # Cache of recent captures so repeated presses skip recognition
+        self.cache = CaptureCache()
+        self.last_cache_key = None
+        self.last_cache_entry = None
         
         # Store the last OCR result
         self.last_result = None
         self.last_image = None
     
+    @property
+    def engine_loaded(self):
+        """Whether the OCR engine is loaded"""
+        return self.ocr is not None
+    
+    def ensure_engine(self, callback=None):
+        """
+        Load the configured OCR engine if it is not loaded yet
+        
+        Safe to call from several threads; callers wait while another
+        thread is loading or warming up the engine. The engine is only
+        published once warmed up, and one whose settings changed while it
+        loaded is discarded and loaded again with the new settings.
+        
+        Args:
+            callback: Optional function receiving progress messages
+        
+        Returns:
+            bool: True if the engine is ready
+        """
+        with self.engine_lock:
+            while True:
+                with self.state_lock:
+                    if self.ocr is not None:
+                        return True
+                    if not self.models_exist or self.initialization_error:
+                        return False
+                    generation = self.engine_generation
+                    engine_name = self.engine_name
+                
+                if callback:
+                    callback("Loading OCR models...")
+                start_time = time.perf_counter()
+                
+                if engine_name in ('onnx', 'onnx-int8'):
+                    engine = self.initialize_onnx(callback, quantized=engine_name == 'onnx-int8')
+                else:
+                    engine = self.initialize_paddleocr(self.use_gpu)
+                if engine is None:
+                    with self.state_lock:
+                        if generation != self.engine_generation:
+                            continue
+                        engine_label = "PaddleOCR" if engine_name == 'paddle' else "ONNX Runtime"
+                        self.initialization_error = f"Failed to initialize {engine_label}. Check console for details."
+                    print("OCR initialization failed. Models may be incomplete or dependencies missing.")
+                    if callback:
+                        callback(self.initialization_error)
+                    return False
+                
+                load_time = time.perf_counter() - start_time
+                self.reset_latency_stats()
+                if self.warmup_enabled:
+                    if callback:
+                        callback("Warming up OCR engine...")
+                    self.warm_up(engine)
+                
+                with self.state_lock:
+                    if generation != self.engine_generation:
+                        continue
+                    self.ocr = engine
+                    self.engine_load_time = load_time
+                    self.lexicon_decoder = None
+                
+                if callback:
+                    warmup_note = f", warm-up {self.warmup_time:.1f}s" if self.warmup_time is not None else ""
+                    callback(f"OCR engine ready ({self.engine_load_time:.1f}s{warmup_note})")
+                return True
+    
+    def acquire_engine(self):
+        """
+        Get the loaded engine, loading it first if needed
+        
+        Callers keep using the returned engine even if the engine is
+        switched meanwhile; the generation tells them whether it went stale.
+        
+        Returns:
+            Tuple of (engine, generation), or (None, None) if no engine can be loaded
+        """
+        while self.ensure_engine():
+            with self.state_lock:
+                if self.ocr is not None:
+                    return self.ocr, self.engine_generation
+        return None, None
+    
+    def invalidate_engine(self):
+        """Drop the loaded engine so the next OCR call loads it again; call with state_lock held"""
+        self.ocr = None
+        self.initialization_error = None
+        self.engine_load_time = None
+        self.lexicon_decoder = None
+        self.engine_generation += 1
+    
+    def get_lexicon_decoder(self):
+        """
+        Get a LexiconDecoder for the loaded recognizer's character set
+        
+        Returns:
+            LexiconDecoder, or None if no engine is loaded
+        """
+        engine = self.ocr
+        if self.lexicon_decoder is None and engine is not None:
+            characters = getattr(engine, 'characters', None)
+            if characters is None:
+                # PaddleOCR: the character list of the recognizer's CTC decoder
+                decode = getattr(getattr(engine, 'text_recognizer', None), 'postprocess_op', None)
+                characters = getattr(decode, 'character', None)
+            if characters:
+                self.lexicon_decoder = LexiconDecoder(characters)
+        return self.lexicon_decoder
+    
+    def reset_latency_stats(self):
+        """Forget the cold and warm latency of the previous engine"""
+        self.warmup_time = None
+        self.warmup_cold_latency = None
+        self.warmup_warm_latency = None
+        self.cold_latency = None
+        self.warm_latency_total = 0
+        self.warm_captures = 0
+    
+    def warm_up(self, engine):
+        """
+        Run a freshly loaded engine on synthetic tooltips of each expected input shape
+        
+        The first inferences after a load pay for graph optimization, memory
+        allocation and oneDNN primitive creation; doing them here keeps that
+        out of the first capture. Each size goes through full detection and
+        the recognizer at every fast path batch size, twice: the first pass
+        is timed as cold latency, the repeat as warm latency.
+        
+        Called by ensure_engine() with the engine lock held, before the
+        engine is published, so captures wait for the warm-up instead of
+        running alongside it.
+        
+        Args:
+            engine: The engine to warm up
+        
+        Returns:
+            bool: True if the warm-up ran without errors
+        """
+        start_time = time.perf_counter()
+        inputs = []
+        for width, height in WARMUP_SIZES:
+            image = self.preprocess_game_text(synthetic_tooltip(width, height))
+            crops = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in find_text_rows(image)]
+            inputs.append((image, crops[:self.fast_max_rows]))
+        
+        try:
+            passes = []
+            for _ in range(2):
+                pass_start = time.perf_counter()
+                for image, crops in inputs:
+                    self.detect_and_recognize(image, engine)
+                    for batch_size in range(1, len(crops) + 1):
+                        self.recognize_crops(crops[:batch_size], engine)
+                passes.append(time.perf_counter() - pass_start)
+        except Exception as e:
+            print(f"OCR warm-up error: {e}")
+            return False
+        
+        self.warmup_cold_latency, self.warmup_warm_latency = passes
+        self.warmup_time = time.perf_counter() - start_time
+        return True
+    
+    def record_latency(self, elapsed):
+        """
+        Add the recognition time of a capture to the cold or warm latency
+        
+        Returns:
+            bool: True if this was the first capture since the engine loaded
+                and it was not warmed up
+        """
+        if self.cold_latency is None:
+            self.cold_latency = elapsed
+            return self.warmup_time is None
+        self.warm_latency_total += elapsed
+        self.warm_captures += 1
+        return False
+    
     def check_models_exist(self):
         """
         Check if the required OCR models exist
@@ -60,15 +998,138 @@ class OCRProcessor:
         Returns:
             bool: True if all required models exist, False otherwise
         """
-        # Check for model files in the model directories
-        det_path = Path(self.det_model_dir)
-        rec_path = Path(self.rec_model_dir)
+        if self.engine_name != 'paddle':
+            return engine_models_exist(self.engine_name)
+        return models_exist(self.det_model_dir, self.rec_model_dir)
+    
+    def set_engine(self, engine):
+        """
+        Switch between the Paddle and ONNX Runtime engines
         
-        # Check if the directories exist and contain model files
-        det_files = list(det_path.glob('*.pdmodel')) if det_path.exists() else []
-        rec_files = list(rec_path.glob('*.pdmodel')) if rec_path.exists() else []
+        The current engine is dropped; the new one loads on the next OCR
+        call or ensure_engine(). Returns straight away, even during a load:
+        a capture already running finishes on the engine it started with,
+        and an engine still loading is discarded once loaded.
         
-        return len(det_files) > 0 and len(rec_files) > 0
+        Args:
+            engine: 'paddle', 'onnx' or 'onnx-int8'
+        """
+        with self.state_lock:
+            if engine == self.engine_name:
+                return
+            self.engine_name = engine
+            self.models_exist = self.check_models_exist()
+            self.invalidate_engine()
+        
+        # Cached text came from the other engine
+        self.cache.clear()
+    
+    def get_tuning(self):
+        """
+        Get the CPU settings the engine loads with
+        
+        Returns:
+            Dictionary of cpu_threads, enable_mkldnn, rec_batch_num and det_limit_side_len
+        """
+        from ocr_tuning import DEFAULT_TUNING, load_tuning
+        if self.tuning is not None:
+            return dict(DEFAULT_TUNING, **self.tuning)
+        return load_tuning(self.engine_name) or dict(DEFAULT_TUNING)
+    
+    def set_tuning(self, tuning):
+        """
+        Change the CPU settings; the engine reloads with them on next use
+        
+        Returns straight away, like set_engine().
+        
+        Args:
+            tuning: Settings dictionary, or None for the machine's auto-tuned settings
+        """
+        with self.state_lock:
+            self.tuning = tuning
+            self.invalidate_engine()
+        self.cache.clear()
+    
+    def initialize_onnx(self, callback=None, quantized=False):
+        """
+        Initialize the ONNX Runtime engine, exporting the Paddle models first if needed
+        
+        Args:
+            callback: Optional function receiving progress messages
+            quantized: Load the INT8 models, quantizing them dynamically if
+                they have not been made yet (see quantize_models)
+        
+        Returns:
+            The OnnxOCREngine, or None if it failed to load
+        """
+        try:
+            if quantized and onnx_models_exist(ONNX_DET_MODEL_INT8, ONNX_REC_MODEL_INT8):
+                det_model, rec_model = ONNX_DET_MODEL_INT8, ONNX_REC_MODEL_INT8
+            else:
+                if not onnx_models_exist() and not export_onnx_models(self.det_model_dir, self.rec_model_dir,
+                                                                       callback=callback):
+                    print(f"ONNX models not found in {ONNX_MODEL_DIR}")
+                    return False
+                det_model, rec_model = ONNX_DET_MODEL, ONNX_REC_MODEL
+                if quantized:
+                    quantize_onnx_models('dynamic', callback=callback)
+                    det_model, rec_model = ONNX_DET_MODEL_INT8, ONNX_REC_MODEL_INT8
+            
+            tuning = self.get_tuning()
+            return OnnxOCREngine(det_model, rec_model, det_db_box_thresh=0.5, det_db_unclip_ratio=1.6,
+                                 det_limit_side_len=tuning['det_limit_side_len'],
+                                 rec_batch_num=tuning['rec_batch_num'],
+                                 cpu_threads=tuning['cpu_threads'],
+                                 use_dnnl=tuning['enable_mkldnn'])
+        except ImportError:
+            print("onnxruntime is not installed; install it to use the ONNX Runtime engine")
+            return None
+        except Exception as e:
+            print(f"Unexpected error initializing ONNX Runtime: {str(e)}")
+            return None
+    
+    def quantize_models(self, method='dynamic', calibration_dir='captures', preprocess=True, callback=None):
+        """
+        Make the INT8 models used by the 'onnx-int8' engine
+        
+        Static quantization calibrates on stored captures, preprocessed the
+        way process_image() would, so the activation ranges match what the
+        models see in use.
+        
+        Args:
+            method: 'dynamic' or 'static'
+            calibration_dir: Folder of PNG captures for static quantization
+            preprocess: Apply game text preprocessing to the calibration captures
+            callback: Optional function receiving progress messages
+        
+        Raises:
+            ValueError: Static quantization without any calibration captures
+            ImportError: onnxruntime is not installed
+        """
+        if not onnx_models_exist() and not export_onnx_models(self.det_model_dir, self.rec_model_dir,
+                                                               callback=callback):
+            raise ValueError(f"ONNX models not found in {ONNX_MODEL_DIR}")
+        
+        images = []
+        if method == 'static':
+            import glob
+            for path in sorted(glob.glob(os.path.join(calibration_dir, '*.png'))):
+                image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+                if image is None:
+                    continue
+                if len(image.shape) == 3 and image.shape[2] == 3:
+                    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                images.append(self.preprocess_game_text(image) if preprocess else image)
+        
+        quantize_onnx_models(method, images, callback=callback)
+        
+        # Reload if the quantized engine is in use
+        with self.state_lock:
+            reload = self.engine_name == 'onnx-int8'
+            if reload:
+                self.invalidate_engine()
+        if reload:
+            self.cache.clear()
     
     def initialize_paddleocr(self, use_gpu=False):
         """
@@ -76,6 +1137,9 @@ class OCRProcessor:
         
         Args:
             use_gpu: Whether to use GPU acceleration
+        
+        Returns:
+            The PaddleOCR instance, or None if it failed to load
         """
         try:
             # Check for MKL dependencies on Windows
@@ -99,28 +1163,45 @@ class OCRProcessor:
                     if os.path.exists(lib_dir):
                         os.environ['PATH'] = lib_dir + os.pathsep + os.environ.get('PATH', '')
             
+            # Imported here, after the library paths are set, so importing ocr_utils stays cheap
+            from paddleocr import PaddleOCR
+            
+            tuning = self.get_tuning()
+            cpu_options = {}
+            if tuning['cpu_threads']:
+                cpu_options['cpu_threads'] = tuning['cpu_threads']
+            
             # Initialize PaddleOCR with optimized settings for game text
-            self.ocr = PaddleOCR(
+            ocr = PaddleOCR(
                 # Disable angle classifier for faster processing (game text is usually horizontal)
                 use_angle_cls=False,
                 lang='en',
                 use_gpu=use_gpu,
                 show_log=True,  # Enable logs to help diagnose issues
+                # CPU threads and oneDNN (MKL-DNN) kernels, auto-tuned per machine
+                enable_mkldnn=tuning['enable_mkldnn'],
+                **cpu_options,
                 # Use faster detection model
                 det_algorithm="DB",  # DB is faster than EAST
                 # Optimize detection parameters for game text
                 det_db_thresh=0.3,  # Lower threshold for faster detection
                 det_db_box_thresh=0.5,  # Lower box threshold
                 det_db_unclip_ratio=1.6,  # Adjust for game text
+                det_limit_side_len=tuning['det_limit_side_len'],
                 # Recognition optimization
-                rec_batch_num=6,  # Increase batch size for faster processing
+                rec_batch_num=tuning['rec_batch_num'],
                 rec_algorithm="CRNN",  # CRNN is faster than other options
                 # Set model directory to local path
                 det_model_dir=self.det_model_dir,
                 rec_model_dir=self.rec_model_dir,
                 cls_model_dir=self.cls_model_dir
             )
-            return True
+            
+            # Keep the character probabilities for lexicon decoding
+            recognizer = getattr(ocr, 'text_recognizer', None)
+            if recognizer is not None and recognizer.postprocess_params.get('name') == 'CTCLabelDecode':
+                recognizer.postprocess_op = CTCProbsDecode(recognizer.postprocess_op)
+            return ocr
         except RuntimeError as e:
             error_msg = str(e)
             print(f"PaddleOCR initialization error: {error_msg}")
@@ -130,10 +1211,10 @@ class OCRProcessor:
                 print("MKL dependency error detected. Trying to locate MKL libraries...")
                 # This could be expanded with more specific handling
             
-            return False
+            return None
         except Exception as e:
             print(f"Unexpected error initializing PaddleOCR: {str(e)}")
-            return False
+            return None
     
     def download_models(self, callback=None):
         """
@@ -165,6 +1246,8 @@ class OCRProcessor:
             
             # Create the PaddleOCR instance with explicit download=True
             try:
+                from paddleocr import PaddleOCR
+                
                 if callback:
                     callback("Downloading detection model (det_db)...")
                 
@@ -208,7 +1291,8 @@ class OCRProcessor:
                     if callback:
                         callback("Models verified successfully. Initializing OCR engine...")
                     
-                    self.initialize_paddleocr(use_gpu=False)
+                    self.initialization_error = None
+                    self.ensure_engine()
                     
                     if callback:
                         callback("PaddleOCR Models downloaded and initialized successfully!")
@@ -235,7 +1319,7 @@ class OCRProcessor:
         Preprocess image specifically for game text to improve OCR speed and accuracy
         
         Args:
-            image: PIL Image object
+            image: PIL Image object, RGB array or BGRA array from the screen grabber
         
         Returns:
             Preprocessed numpy array
@@ -249,6 +1333,8 @@ class OCRProcessor:
         # Convert to grayscale for faster processing
         if len(img_array.shape) == 3 and img_array.shape[2] == 3:
             gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        elif len(img_array.shape) == 3 and img_array.shape[2] == 4:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_BGRA2GRAY)
         else:
             gray = img_array
             
@@ -270,22 +1356,28 @@ class OCRProcessor:
         Process an image and extract text using OCR
         
         Args:
-            image: PIL Image object
+            image: PIL Image object, RGB array or BGRA array from the screen grabber
             preprocess: Whether to apply game text preprocessing
         
         Returns:
             List of detected text and their confidence scores
         """
-        # Check if OCR is initialized
-        if not self.ocr:
+        # Load the engine on first use; waits for a warm-up in progress. The
+        # capture runs on this engine even if another is chosen meanwhile
+        engine, generation = self.acquire_engine()
+        if engine is None:
             return []
             
         # Convert PIL Image to numpy array if needed
         if isinstance(image, Image.Image):
             img_array = np.array(image)
+        elif len(image.shape) == 3 and image.shape[2] == 4:
+            # Screen grabber frames are BGRA; OCR expects three channels
+            img_array = cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
         else:
             img_array = image
-            
+        original_array = img_array
+        
         # Store the original image for reference
         self.last_image = image
         
@@ -296,14 +1388,68 @@ class OCRProcessor:
             except Exception as e:
                 print(f"Preprocessing error: {e}")
                 # Fall back to original image if preprocessing fails
-                if isinstance(image, Image.Image):
-                    img_array = np.array(image)
-            
-        # Run OCR on the image
+                img_array = original_array
+        
         start_time = time.time()
-        result = self.ocr.ocr(img_array, cls=False)  # Disable classifier for speed
+        
+        # Reuse the results of an identical recent capture
+        self.last_cache_key = capture_hash(img_array)
+        self.last_cache_entry = self.cache.get(self.last_cache_key)
+        if self.last_cache_entry is not None:
+            processed_results = copy.deepcopy(self.last_cache_entry['results'])
+            self.last_result = {
+                'results': processed_results,
+                'processing_time': time.time() - start_time,
+                'timestamp': time.time(),
+                'mode': 'cache',
+                'cold': False
+            }
+            return processed_results
+        
+        processed_results = None
+        mode = 'full'
+        
+        # Try recognizing the text rows directly before running detection
+        if self.fast_mode:
+            try:
+                processed_results = self.recognize_rows(img_array, engine)
+            except Exception as e:
+                print(f"Fast recognition error: {e}")
+            mode = 'fast' if processed_results is not None else 'fast_fallback'
+        
+        if processed_results is None:
+            processed_results = self.detect_and_recognize(img_array, engine)
         end_time = time.time()
         
+        # Results and timings of an engine dropped meanwhile are not kept
+        current = generation == self.engine_generation
+        if current:
+            self.cache.put(self.last_cache_key, copy.deepcopy(processed_results))
+        
+        # Store the processed results
+        self.last_result = {
+            'results': processed_results,
+            'processing_time': end_time - start_time,
+            'timestamp': time.time(),
+            'mode': mode,
+            'cold': self.record_latency(end_time - start_time) if current else False
+        }
+        
+        return processed_results
+    
+    def detect_and_recognize(self, img_array, engine):
+        """
+        Run the full PaddleOCR detection and recognition pipeline
+        
+        Args:
+            img_array: Image as a numpy array
+            engine: Loaded engine (see acquire_engine)
+        
+        Returns:
+            List of detected text and their confidence scores
+        """
+        result = engine.ocr(img_array, cls=False)  # Disable classifier for speed
+        
         # Process the results
         processed_results = []
         
@@ -316,18 +1462,89 @@ class OCRProcessor:
                 processed_results.append({
                     'text': text,
                     'confidence': confidence,
-                    'box': box
+                    'box': box,
+                    'char_probs': line_probs(line[1])
                 })
         
-        # Store the processed results
-        self.last_result = {
-            'results': processed_results,
-            'processing_time': end_time - start_time,
-            'timestamp': time.time()
-        }
+        return processed_results
+    
+    def recognize_rows(self, img_array, engine):
+        """
+        Recognize text rows found by find_text_rows() without text detection
+        
+        All row crops go to the recognizer in one batch.
+        
+        Args:
+            img_array: Image as a numpy array
+            engine: Loaded engine (see acquire_engine)
+        
+        Returns:
+            List of recognized text and their confidence scores, or None when
+            the rows look unlike a tooltip strip or any row is recognized with
+            low confidence, in which case full detection should be used
+        """
+        boxes = find_text_rows(img_array)
+        if not boxes or len(boxes) > self.fast_max_rows:
+            return None
+        
+        crops = [np.ascontiguousarray(img_array[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes]
+        rec_results = self.recognize_crops(crops, engine)
+        
+        processed_results = []
+        for (x0, y0, x1, y1), rec_result in zip(boxes, rec_results):
+            text, confidence = rec_result[0], rec_result[1]
+            if not text.strip() or confidence < self.fast_min_confidence:
+                return None
+            processed_results.append({
+                'text': text,
+                'confidence': confidence,
+                'box': [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+                'char_probs': line_probs(rec_result)
+            })
         
         return processed_results
     
+    def recognize_crops(self, crops, engine):
+        """
+        Recognize text line crops in one batch, without detection
+        
+        Args:
+            crops: List of image arrays, one text line each
+            engine: Loaded engine (see acquire_engine)
+        
+        Returns:
+            List of (text, confidence, probabilities) tuples; the probabilities
+            are missing if the recognizer does not provide them
+        """
+        if hasattr(engine, 'text_recognizer'):
+            rec_results, _ = engine.text_recognizer(crops)
+            return rec_results
+        return engine.ocr([crops], det=False, cls=False)[0]
+    
+    def get_cached_matches(self, threshold):
+        """Get the cached match results of the last capture
+        
+        Args:
+            threshold: Match threshold the results must have been made with
+        
+        Returns:
+            Copy of the match results, or None if the last capture was not a
+            cache hit or its matches were invalidated
+        """
+        entry = self.last_cache_entry
+        if entry is None or entry['matches'] is None or entry['match_threshold'] != threshold:
+            return None
+        return copy.deepcopy(entry['matches'])
+    
+    def store_matches(self, matches, threshold):
+        """Cache the match results of the last capture"""
+        if self.last_cache_key is not None:
+            self.cache.store_matches(self.last_cache_key, copy.deepcopy(matches), threshold)
+    
+    def set_fast_mode(self, enabled):
+        """Enable or disable the recognition-only fast path"""
+        self.fast_mode = enabled
+    
     def get_all_text(self):
         """
         Get all detected text from the last OCR result
@@ -360,18 +1577,43 @@ class OCRProcessor:
         """
         Get statistics about the last OCR processing
         
+        Cold latency is the recognition time of the first capture after the
+        engine loaded, warm latency the mean of the captures since; the
+        warm-up's own first and repeat passes are reported alongside.
+        
         Returns:
             Dictionary with processing statistics
         """
+        latency_stats = {
+            'cold_latency': self.cold_latency,
+            'warm_latency': self.warm_latency_total / self.warm_captures if self.warm_captures else None,
+            'warm_captures': self.warm_captures,
+            'warmup_time': self.warmup_time,
+            'warmup_cold_latency': self.warmup_cold_latency,
+            'warmup_warm_latency': self.warmup_warm_latency
+        }
+        
         if not self.last_result:
             return {
                 'processing_time': 0,
                 'text_count': 0,
-                'timestamp': None
+                'timestamp': None,
+                'ocr_mode': None,
+                'ocr_engine': self.engine_name,
+                'cold_start': False,
+                'cache_hits': self.cache.hits,
+                'cache_misses': self.cache.misses,
+                **latency_stats
             }
             
         return {
             'processing_time': self.last_result['processing_time'],
             'text_count': len(self.last_result['results']),
-            'timestamp': self.last_result['timestamp']
+            'timestamp': self.last_result['timestamp'],
+            'ocr_mode': self.last_result['mode'],
+            'ocr_engine': self.engine_name,
+            'cold_start': self.last_result['cold'],
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            **latency_stats
         }
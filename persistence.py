@@ -0,0 +1,382 @@
+"""
+Crash-safe, write-behind persistence for MapleLegends ShopHelper
+Writes the data files atomically with fsync, checksums and rotating backups,
+coalescing saves on a background thread
+"""
+
+import os
+import time
+import zlib
+import shutil
+import threading
+from data_codecs import JsonCodec, create_codec, json_loads
+
+CHECKSUM_KEY = 'checksum'
+BINARY_MAGIC = b'SHDB'  # Binary files start with this, then the payload's CRC32
+DEFAULT_BACKUPS = 3
+
+# Fault injection for crash-safety checks: when set, called as
+# fault_hook(stage, path) at each step of atomic_write; raising from it
+# simulates a crash at that point ('fsync', 'rotate', 'replace'). At 'fsync'
+# the data is in the temporary file (temp_path(path)), which a hook may also
+# truncate to simulate a torn write
+fault_hook = None
+
+
+class CorruptFileError(ValueError):
+    """A data file could not be parsed or failed its checksum"""
+
+
+def _fault(stage, path):
+    """Give the fault injection hook a chance to interrupt a write"""
+    if fault_hook is not None:
+        fault_hook(stage, path)
+
+
+def temp_path(path):
+    """Get the temporary file atomic_write writes before renaming it over path"""
+    return f"{os.fspath(path)}.tmp"
+
+
+def backup_path(path, number):
+    """Get the path of a numbered backup (1 is the most recent)"""
+    return f"{os.fspath(path)}.bak{number}"
+
+
+def _rotate_backups(path, backups):
+    """Shift the numbered backups down and move the current file to backup 1"""
+    for number in range(backups - 1, 0, -1):
+        if os.path.exists(backup_path(path, number)):
+            os.replace(backup_path(path, number), backup_path(path, number + 1))
+    os.replace(path, backup_path(path, 1))
+
+
+def _fsync_directory(path):
+    """Make a rename durable by syncing the directory entry (not possible on Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, backups=0):
+    """Replace a file's contents so a crash leaves either the old or the new file
+    
+    The data is written and fsynced to a temporary file next to the target,
+    which is then renamed over it. With backups, the previous file is kept as
+    path.bak1, the one before as path.bak2 and so on; a crash between the two
+    renames leaves the previous contents in path.bak1, where load_document
+    finds them.
+    
+    Args:
+        path: File to write
+        data: Bytes to write
+        backups: Number of previous versions to keep
+    
+    Returns:
+        Number of bytes written
+    """
+    path = os.fspath(path)
+    temp = temp_path(path)
+    with open(temp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        _fault('fsync', path)
+        os.fsync(f.fileno())
+    
+    if backups and os.path.exists(path):
+        _fault('rotate', path)
+        _rotate_backups(path, backups)
+    _fault('replace', path)
+    os.replace(temp, path)
+    _fsync_directory(path)
+    return len(data)
+
+
+def encode_document(data, codec=None):
+    """Encode a data document with a checksum of its encoding
+    
+    JSON codecs append the CRC32 of the encoded document as a final
+    "checksum" key, so the file stays plain JSON. Binary codecs are framed
+    as BINARY_MAGIC, the CRC32 and the payload.
+    
+    Args:
+        data: Dictionary to encode
+        codec: Codec from data_codecs (compact JSON by default)
+    
+    Returns:
+        File contents as bytes
+    """
+    codec = codec or JsonCodec()
+    payload = codec.encode(data)
+    if codec.binary:
+        return BINARY_MAGIC + zlib.crc32(payload).to_bytes(4, 'big') + payload
+    
+    # '{...}' becomes '{...,"checksum":"<crc>"}', the CRC covering '{...}'
+    # without any whitespace before the closing brace
+    body = payload.rstrip()[:-1].rstrip()
+    crc = zlib.crc32(body + b'}')
+    separator = b',' if body != b'{' else b''
+    return body + separator + b'"' + CHECKSUM_KEY.encode('ascii') + f'":"{crc:08x}"}}'.encode('ascii')
+
+
+def decode_document(raw):
+    """Decode and verify a data document, detecting the format it was written in
+    
+    Args:
+        raw: File contents
+    
+    Returns:
+        The document without its checksum
+    
+    Raises:
+        CorruptFileError: The contents cannot be decoded or the checksum does not
+            match. Files written before checksums were added are accepted as they are.
+    """
+    if raw[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        header_size = len(BINARY_MAGIC) + 4
+        payload = raw[header_size:]
+        if int.from_bytes(raw[len(BINARY_MAGIC):header_size], 'big') != zlib.crc32(payload):
+            raise CorruptFileError("checksum mismatch")
+        try:
+            codec = create_codec('msgpack')
+        except ImportError:
+            raise CorruptFileError("written as MessagePack, but msgpack is not installed")
+        try:
+            return codec.decode(payload)
+        except Exception as e:
+            raise CorruptFileError(f"unreadable MessagePack: {e}")
+    
+    # JSON, verified against the trailing checksum key without re-encoding
+    raw = raw.rstrip()
+    suffix = b'"' + CHECKSUM_KEY.encode('ascii') + b'":"'
+    expected = None
+    if raw.endswith(b'"}') and raw[-10 - len(suffix):-10] == suffix:
+        expected = raw[-10:-2].decode('ascii', 'replace')
+        body = raw[:-10 - len(suffix)]
+        raw = (body[:-1] if body.endswith(b',') else body) + b'}'
+        if f"{zlib.crc32(raw):08x}" != expected:
+            raise CorruptFileError("checksum mismatch")
+    
+    try:
+        data = json_loads(raw)
+    except ValueError as e:
+        raise CorruptFileError(f"unreadable JSON: {e}")
+    if not isinstance(data, dict):
+        raise CorruptFileError("not a JSON object")
+    return data
+
+
+def save_document(path, data, backups=DEFAULT_BACKUPS, codec=None):
+    """Write a data document atomically with its checksum and rotating backups
+    
+    Args:
+        path: File to write
+        data: Dictionary to store
+        backups: Number of previous versions to keep
+        codec: Codec from data_codecs (compact JSON by default)
+    
+    Returns:
+        Number of bytes written
+    """
+    return atomic_write(path, encode_document(data, codec), backups)
+
+
+def load_document(path, backups=DEFAULT_BACKUPS):
+    """Load a data document, falling back to the newest backup that verifies
+    
+    Args:
+        path: File written by save_document, in any codec
+        backups: Number of backups to try after the file itself
+    
+    Returns:
+        The document, or None if neither the file nor any backup exists
+    
+    Raises:
+        CorruptFileError: The file or backups exist but none of them verifies.
+            The file is copied to path.corrupt first, so later saves and
+            backup rotation cannot overwrite the last copy.
+    """
+    path = os.fspath(path)
+    candidates = [path] + [backup_path(path, number) for number in range(1, backups + 1)]
+    found = False
+    for candidate in candidates:
+        if not os.path.exists(candidate):
+            continue
+        found = True
+        try:
+            with open(candidate, 'rb') as f:
+                data = decode_document(f.read())
+        except (OSError, CorruptFileError) as e:
+            print(f"Skipping {candidate}: {e}")
+            continue
+        if candidate != path:
+            print(f"Recovered {path} from backup {candidate}")
+        return data
+    
+    if found:
+        if os.path.exists(path):
+            shutil.copyfile(path, f"{path}.corrupt")
+        raise CorruptFileError(f"{path} and its backups are all unreadable")
+    return None
+
+
+class PersistenceManager:
+    """Marks data files dirty and writes them after a quiet period
+    
+    Each store is a file plus a snapshot function returning the data to
+    write. `mark_dirty` only records the change; a background thread writes
+    the store once no change has arrived for `delay` seconds, or sooner once
+    `max_changes` changes are pending, so a restock session of hundreds of
+    edits costs a handful of writes. Snapshots are taken on the writer
+    thread, so they must copy anything another thread may be changing.
+    """
+    
+    def __init__(self, delay=1.0, max_changes=50, backups=DEFAULT_BACKUPS, codec=None):
+        """Initialize the manager
+        
+        Args:
+            delay: Seconds without changes before dirty stores are written
+            max_changes: Pending changes that trigger a write without waiting
+            backups: Previous versions of each file to keep
+            codec: Codec from data_codecs (compact JSON by default)
+        """
+        self.delay = delay
+        self.max_changes = max_changes
+        self.backups = backups
+        self.codec = codec or JsonCodec()
+        self.stores = {}  # Store name -> (path, snapshot function)
+        self.dirty = {}  # Store name -> changes since it was last written
+        self.last_change_at = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()  # Keeps explicit and background flushes in order
+        self.thread = None
+        
+        self.stats = {
+            'changes': 0,
+            'writes': 0,
+            'bytes_written': 0,
+            'write_time': 0,
+            'errors': 0
+        }
+        self.store_stats = {}  # Store name -> {'changes', 'writes', 'bytes_written'}
+    
+    def register(self, name, path, snapshot):
+        """Add a store
+        
+        Args:
+            name: Store name used with mark_dirty
+            path: File the store is written to
+            snapshot: Function returning the data to write
+        """
+        self.stores[name] = (path, snapshot)
+        self.store_stats[name] = {'changes': 0, 'writes': 0, 'bytes_written': 0}
+    
+    def set_codec(self, codec):
+        """Write every store in a different format from now on
+        
+        Files are read in whatever format they were written in, so all
+        stores are rewritten in the new format on the next flush.
+        """
+        self.codec = codec
+        for name in self.stores:
+            self.mark_dirty(name)
+    
+    def mark_dirty(self, name):
+        """Record that a store changed; it is written later on the background thread"""
+        if self.closed:
+            # After shutdown, write straight away rather than lose the change
+            self._write(name)
+            return
+        
+        with self.condition:
+            self.dirty[name] = self.dirty.get(name, 0) + 1
+            self.stats['changes'] += 1
+            self.store_stats[name]['changes'] += 1
+            self.last_change_at = time.monotonic()
+            
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="PersistenceWriter", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+    
+    def _run(self):
+        """Background loop writing dirty stores after the quiet period"""
+        while True:
+            with self.condition:
+                while not self.dirty and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                
+                # Let changes settle unless enough have piled up
+                while self.dirty and not self.closed:
+                    if sum(self.dirty.values()) >= self.max_changes:
+                        break
+                    remaining = self.last_change_at + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.closed:
+                    return
+            
+            self.flush()
+    
+    def flush(self):
+        """Write every dirty store now
+        
+        Returns:
+            Number of stores written
+        """
+        with self.write_lock:
+            with self.condition:
+                names = list(self.dirty)
+                self.dirty.clear()
+            
+            written = 0
+            for name in names:
+                written += self._write(name)
+            return written
+    
+    def _write(self, name):
+        """Snapshot and write one store, recording the write in the metrics"""
+        path, snapshot = self.stores[name]
+        start_time = time.perf_counter()
+        try:
+            size = save_document(path, snapshot(), self.backups, self.codec)
+        except Exception as e:
+            print(f"Error saving {name} to {path}: {e}")
+            self.stats['errors'] += 1
+            return 0
+        
+        self.stats['writes'] += 1
+        self.stats['bytes_written'] += size
+        self.stats['write_time'] += time.perf_counter() - start_time
+        self.store_stats[name]['writes'] += 1
+        self.store_stats[name]['bytes_written'] += size
+        return 1
+    
+    def close(self):
+        """Stop the background thread and write anything still dirty"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+    
+    def get_stats(self):
+        """Get the write metrics
+        
+        Returns:
+            Dictionary with change, write and byte counts overall and per store
+        """
+        with self.condition:
+            stats = dict(self.stats)
+            stats['pending'] = sum(self.dirty.values())
+            stats['stores'] = {name: dict(store) for name, store in self.store_stats.items()}
+        return stats
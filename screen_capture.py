@@ -0,0 +1,174 @@
+"""
+Screen capture for MapleLegends ShopHelper
+Keeps one capture session open and returns frames as NumPy arrays
+"""
+
+import numpy as np
+import mss
+
+
+def _longest_run(mask, max_gap=0):
+    """Get the (start, end) of the longest run of True values, or (0, 0)
+    
+    Args:
+        mask: One-dimensional boolean array
+        max_gap: Runs separated by at most this many False values are joined
+    """
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    if not len(edges):
+        return 0, 0
+    starts, ends = edges[::2], edges[1::2]
+    
+    # Join runs split by short gaps, such as the text lines inside a tooltip
+    if max_gap and len(starts) > 1:
+        joined = np.concatenate(([True], starts[1:] - ends[:-1] > max_gap))
+        starts = starts[joined]
+        ends = np.maximum.reduceat(ends, np.flatnonzero(joined))
+    
+    longest = np.argmax(ends - starts)
+    return int(starts[longest]), int(ends[longest])
+
+
+def find_tooltip_bounds(frame, dark_level=70, text_level=150, min_fill=0.6,
+                        min_width=40, min_height=12, max_gap=16, padding=2):
+    """Find the dark tooltip box in a capture with row and column projections
+    
+    Rows are first kept if they are about as dark as the darkest rows, which
+    finds the tooltip's band even when it covers only part of the width.
+    Within that band the mostly dark columns give the horizontal bounds, and
+    the mostly dark rows between them the vertical bounds. Bright text
+    lines are bridged as short gaps, and the box must hold some text to
+    count as a tooltip.
+    
+    Args:
+        frame: BGRA, RGB or grayscale numpy array
+        dark_level: Pixels with every channel below this are background
+        text_level: Pixels with a channel at or above this are text
+        min_fill: Fraction of a row or column that must be dark
+        min_width: Narrower boxes are not tooltips
+        min_height: Shorter boxes are not tooltips
+        max_gap: Rows of text up to this tall do not split the tooltip
+        padding: Pixels kept around the box
+    
+    Returns:
+        (x0, y0, x1, y1) bounds, or None if no tooltip was found
+    """
+    if frame.ndim == 3:
+        # Brightest colour channel; much faster than max(axis=2) on interleaved pixels
+        brightness = np.maximum(np.maximum(frame[:, :, 0], frame[:, :, 1]), frame[:, :, 2])
+    else:
+        brightness = frame
+    dark = brightness < dark_level
+    
+    row_fill = dark.mean(axis=1)
+    if not row_fill.max():
+        return None
+    y0, y1 = _longest_run(row_fill >= row_fill.max() * 0.5, max_gap)
+    x0, x1 = _longest_run(dark[y0:y1].mean(axis=0) >= min_fill)
+    if x1 - x0 < min_width:
+        return None
+    top, bottom = _longest_run(dark[:, x0:x1].mean(axis=1) >= min_fill, max_gap)
+    if bottom - top < min_height:
+        return None
+    y0, y1 = top, bottom
+    
+    if not (brightness[y0:y1, x0:x1] >= text_level).any():
+        return None
+    
+    height, width = dark.shape
+    return (max(0, x0 - padding), max(0, y0 - padding),
+            min(width, x1 + padding), min(height, y1 + padding))
+
+
+def crop_to_tooltip(frame, **kwargs):
+    """Crop a capture to its tooltip so OCR only sees the tooltip's pixels
+    
+    Args:
+        frame: Captured numpy array
+        **kwargs: Options for find_tooltip_bounds()
+    
+    Returns:
+        Tuple of (cropped copy, bounds), or (frame, None) if no tooltip was found
+    """
+    bounds = find_tooltip_bounds(frame, **kwargs)
+    if bounds is None:
+        return frame, None
+    x0, y0, x1, y1 = bounds
+    return np.ascontiguousarray(frame[y0:y1, x0:x1]), bounds
+
+
+class ScreenGrabber:
+    """Long-lived screen capture session with reusable frame buffers
+    
+    Opening an mss session and converting its output through PIL costs
+    more than the grab itself for a small tooltip region. The grabber keeps
+    a single session and copies each grab straight into a preallocated
+    BGRA buffer, which is handed to the OCR stage as a NumPy array.
+    
+    Buffers are reused round-robin, so a frame stays valid until
+    `buffer_count` more frames of the same size have been grabbed. The
+    default is larger than the OCR capture queue plus the frame being
+    processed. Callers that hold frames longer must copy them.
+    
+    mss sessions are bound to the thread that opened them, so the session
+    is opened lazily by the first grab() on the capturing thread.
+    """
+    
+    def __init__(self, buffer_count=8):
+        """Initialize the grabber
+        
+        Args:
+            buffer_count: Number of frame buffers kept per region size
+        """
+        self.buffer_count = buffer_count
+        self.sct = None
+        self.buffers = {}
+        self.next_buffer = {}
+    
+    def _get_buffer(self, height, width):
+        """Get the next free buffer for a frame size"""
+        key = (height, width)
+        ring = self.buffers.get(key)
+        if ring is None:
+            # Only keep buffers for the most recent region size
+            self.buffers.clear()
+            self.next_buffer.clear()
+            ring = [np.empty((height, width, 4), dtype=np.uint8) for _ in range(self.buffer_count)]
+            self.buffers[key] = ring
+            self.next_buffer[key] = 0
+        
+        index = self.next_buffer[key]
+        self.next_buffer[key] = (index + 1) % len(ring)
+        return ring[index]
+    
+    def grab(self, left, top, width, height):
+        """Capture a screen region
+        
+        Args:
+            left: Left edge of the region
+            top: Top edge of the region
+            width: Width of the region
+            height: Height of the region
+        
+        Returns:
+            NumPy array of shape (height, width, 4) with BGRA pixels
+        """
+        if self.sct is None:
+            self.sct = mss.mss()
+        
+        screenshot = self.sct.grab({'left': left, 'top': top, 'width': width, 'height': height})
+        frame = np.frombuffer(screenshot.raw, dtype=np.uint8)
+        frame = frame.reshape(screenshot.height, screenshot.width, 4)
+        
+        buffer = self._get_buffer(screenshot.height, screenshot.width)
+        np.copyto(buffer, frame)
+        return buffer
+    
+    def close(self):
+        """Close the capture session"""
+        if self.sct is not None:
+            self.sct.close()
+            self.sct = None
+        self.buffers.clear()
+        self.next_buffer.clear()
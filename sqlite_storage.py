@@ -0,0 +1,390 @@
+"""
+SQLite storage engine for MapleLegends ShopHelper
+Keeps items, OCR logs, the ledger and cash data in one indexed database
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from persistence import load_document
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    name TEXT PRIMARY KEY,
+    price INTEGER NOT NULL DEFAULT 0,
+    stock INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    item_name TEXT,
+    transaction_type TEXT,
+    value NUMERIC NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ledger_timestamp ON ledger (timestamp);
+CREATE INDEX IF NOT EXISTS idx_ledger_type ON ledger (transaction_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_ledger_item ON ledger (item_name, transaction_type, timestamp);
+CREATE TABLE IF NOT EXISTS cash_transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    description TEXT,
+    value NUMERIC NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cash_timestamp ON cash_transactions (timestamp);
+"""
+
+def _dumps(data):
+    """Serialize a row payload"""
+    return json.dumps(data, separators=(',', ':'))
+
+
+class SQLiteStorage:
+    """SQLite backed storage shared by ItemDatabase and CashManager
+    
+    The connection runs in WAL mode so readers never block the writer.
+    Every public write commits on its own unless it runs inside batch(),
+    in which case all writes in the block share one transaction.
+    """
+    
+    def __init__(self, db_path="shophelper.db"):
+        """Open (and create if needed) the database
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.batch_depth = 0
+        
+        # OCR results are logged from the worker thread, so allow
+        # cross-thread use and serialize access with the lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+    
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
+    
+    @contextmanager
+    def batch(self):
+        """Group several writes into a single transaction"""
+        with self.lock:
+            self.batch_depth += 1
+            try:
+                yield self
+            except Exception:
+                self.batch_depth -= 1
+                if self.batch_depth == 0:
+                    self.conn.rollback()
+                raise
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.conn.commit()
+    
+    def _execute(self, sql, params=()):
+        """Run a write statement, committing unless inside a batch"""
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            if self.batch_depth == 0:
+                self.conn.commit()
+            return cursor
+    
+    def _executemany(self, sql, rows):
+        """Run a write statement for many rows in one transaction"""
+        with self.lock:
+            cursor = self.conn.executemany(sql, rows)
+            if self.batch_depth == 0:
+                self.conn.commit()
+            return cursor
+    
+    def _query(self, sql, params=()):
+        """Run a read query and return all rows"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    # Metadata
+    
+    def get_meta(self, key, default=None):
+        """Get a metadata value"""
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]['value'] if rows else default
+    
+    def set_meta(self, key, value):
+        """Set a metadata value"""
+        self._execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+    
+    # Items
+    
+    def load_items(self):
+        """Load the full item catalogue
+        
+        Returns:
+            Dictionary of item name to item data
+        """
+        return {row['name']: json.loads(row['data'])
+                for row in self._query("SELECT name, data FROM items")}
+    
+    def save_items(self, items):
+        """Insert or update the given items
+        
+        Args:
+            items: Dictionary of item name to item data
+        """
+        rows = [(name, data.get('price', 0), data.get('stock', 0), _dumps(data))
+                for name, data in items.items()]
+        self._executemany(
+            "INSERT OR REPLACE INTO items (name, price, stock, data) VALUES (?, ?, ?, ?)", rows)
+    
+    def delete_items(self, names):
+        """Delete items by name"""
+        self._executemany("DELETE FROM items WHERE name = ?", [(name,) for name in names])
+    
+    def replace_items(self, items):
+        """Replace the whole catalogue with the given items"""
+        with self.batch():
+            self._execute("DELETE FROM items")
+            self.save_items(items)
+    
+    def item_count(self):
+        """Get the number of stored items"""
+        return self._query("SELECT COUNT(*) AS n FROM items")[0]['n']
+    
+    # OCR logs
+    
+    def load_logs(self, limit=100):
+        """Load the most recent OCR logs, newest first"""
+        rows = self._query("SELECT data FROM logs ORDER BY id DESC LIMIT ?", (limit,))
+        return [json.loads(row['data']) for row in rows]
+    
+    def add_log(self, entry, keep=100):
+        """Store a new OCR log and drop anything beyond the newest `keep` logs"""
+        self.add_logs([entry], keep)
+    
+    def add_logs(self, entries, keep=100):
+        """Store new OCR logs, newest first, and drop anything beyond the newest `keep` logs"""
+        with self.batch():
+            self._executemany("INSERT INTO logs (timestamp, data) VALUES (?, ?)",
+                              [(entry.get('timestamp', time.time()), _dumps(entry))
+                               for entry in reversed(entries)])
+            self._execute(
+                "DELETE FROM logs WHERE id <= (SELECT id FROM logs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (keep,))
+    
+    def replace_logs(self, entries):
+        """Replace the stored logs with the given list, newest first"""
+        with self.batch():
+            self._execute("DELETE FROM logs")
+            self._executemany("INSERT INTO logs (timestamp, data) VALUES (?, ?)",
+                              [(entry.get('timestamp', 0), _dumps(entry))
+                               for entry in reversed(entries)])
+    
+    # Ledger
+    
+    def add_ledger_entries(self, entries):
+        """Append ledger entries"""
+        rows = [(entry.get('timestamp', time.time()), entry.get('item_name'),
+                 entry.get('transaction_type'), entry.get('value') or 0, _dumps(entry))
+                for entry in entries]
+        self._executemany(
+            "INSERT INTO ledger (timestamp, item_name, transaction_type, value, data) "
+            "VALUES (?, ?, ?, ?, ?)", rows)
+    
+    def query_ledger(self, limit=100, transaction_type=None, item_name=None):
+        """Get ledger entries, newest first
+        
+        Args:
+            limit: Maximum number of entries to return (None for all)
+            transaction_type: Filter by transaction type (optional)
+            item_name: Filter by item name (optional)
+        """
+        clauses = []
+        params = []
+        if transaction_type:
+            clauses.append("transaction_type = ?")
+            params.append(transaction_type)
+        if item_name:
+            clauses.append("item_name = ?")
+            params.append(item_name)
+        
+        sql = "SELECT data FROM ledger"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        return [json.loads(row['data']) for row in self._query(sql, params)]
+    
+    def delete_ledger_entry(self, timestamp, item_name):
+        """Delete the most recent ledger entry matching a timestamp and item name
+        
+        Returns:
+            The deleted entry, or None if no entry matched
+        """
+        with self.batch():
+            rows = self._query(
+                "SELECT id, data FROM ledger WHERE item_name = ? AND timestamp BETWEEN ? AND ? "
+                "ORDER BY id DESC LIMIT 1",
+                (item_name, timestamp - 0.001, timestamp + 0.001))
+            if not rows:
+                return None
+            self._execute("DELETE FROM ledger WHERE id = ?", (rows[0]['id'],))
+        return json.loads(rows[0]['data'])
+    
+    def ledger_stats(self):
+        """Get entry counts and value totals per transaction type
+        
+        Returns:
+            Dictionary of transaction type to (count, total value)
+        """
+        rows = self._query(
+            "SELECT COALESCE(transaction_type, 'unknown') AS tx_type, COUNT(*) AS n, "
+            "SUM(value) AS total FROM ledger GROUP BY tx_type")
+        return {row['tx_type']: (row['n'], row['total'] or 0) for row in rows}
+    
+    def sales_summary(self, item_name=None):
+        """Get per-item sales totals with one grouped query
+        
+        Args:
+            item_name: Limit the summary to one item (optional)
+        
+        Returns:
+            Dictionary of item name to {'last_sale', 'sales', 'units', 'revenue'}
+        """
+        sql = ("SELECT item_name, MAX(timestamp) AS last_sale, COUNT(*) AS sales, "
+               "SUM(COALESCE(json_extract(data, '$.quantity'), 0)) AS units, SUM(value) AS revenue "
+               "FROM ledger WHERE transaction_type = 'sale'")
+        params = ()
+        if item_name is not None:
+            sql += " AND item_name = ?"
+            params = (item_name,)
+        sql += " GROUP BY item_name"
+        
+        return {row['item_name']: {'last_sale': row['last_sale'], 'sales': row['sales'],
+                                   'units': row['units'] or 0, 'revenue': row['revenue'] or 0}
+                for row in self._query(sql, params)}
+    
+    def last_transaction_time(self, item_name, transaction_type):
+        """Get the timestamp of an item's most recent transaction of a type"""
+        rows = self._query(
+            "SELECT MAX(timestamp) AS ts FROM ledger WHERE item_name = ? AND transaction_type = ?",
+            (item_name, transaction_type))
+        return rows[0]['ts'] if rows else None
+    
+    def ledger_count(self):
+        """Get the number of ledger entries"""
+        return self._query("SELECT COUNT(*) AS n FROM ledger")[0]['n']
+    
+    # Cash
+    
+    def load_cash_transactions(self):
+        """Load all cash transactions, oldest first"""
+        rows = self._query("SELECT data FROM cash_transactions ORDER BY id")
+        return [json.loads(row['data']) for row in rows]
+    
+    def add_cash_transactions(self, entries):
+        """Append cash transactions"""
+        rows = [(entry.get('timestamp', time.time()), entry.get('item_name'),
+                 entry.get('value') or 0, _dumps(entry))
+                for entry in entries]
+        self._executemany(
+            "INSERT INTO cash_transactions (timestamp, description, value, data) "
+            "VALUES (?, ?, ?, ?)", rows)
+    
+    def delete_cash_transaction(self, timestamp, description):
+        """Delete the first cash transaction matching a timestamp and description
+        
+        Returns:
+            True if a transaction was deleted
+        """
+        with self.batch():
+            rows = self._query(
+                "SELECT id FROM cash_transactions WHERE description = ? "
+                "AND timestamp BETWEEN ? AND ? ORDER BY id LIMIT 1",
+                (description, timestamp - 0.001, timestamp + 0.001))
+            if not rows:
+                return False
+            self._execute("DELETE FROM cash_transactions WHERE id = ?", (rows[0]['id'],))
+        return True
+    
+    def get_cash_balance(self):
+        """Get the stored cash balance"""
+        return int(float(self.get_meta('cash_balance', 0)))
+    
+    def set_cash_balance(self, balance):
+        """Store the cash balance"""
+        self.set_meta('cash_balance', balance)
+    
+    # Migration
+    
+    def migrate_from_json(self, items_path="items_database.json", logs_path="recent_logs.json",
+                          ledger_path="ledger.jsonl", legacy_ledger_path="ledger.json",
+                          cash_path="cash_data.json"):
+        """Import the existing JSON data files once (in whichever codec they were written)
+        
+        Runs only the first time the database is opened. The JSON files are
+        kept, so nothing recorded before the migration is lost when switching
+        back to JSON storage.
+        
+        Returns:
+            Dictionary with the number of rows imported per table, or None if
+            the migration had already been done
+        """
+        if self.get_meta('migrated_at'):
+            return None
+        
+        counts = {'items': 0, 'logs': 0, 'ledger': 0, 'cash_transactions': 0}
+        with self.batch():
+            items_data = load_document(items_path)
+            if items_data is not None:
+                items = items_data.get('items', {})
+                items = {name: (data if isinstance(data, dict) else {'price': data, 'stock': 0})
+                         for name, data in items.items()}
+                self.save_items(items)
+                self.set_meta('items_seeded', 1)
+                counts['items'] = len(items)
+            
+            logs_data = load_document(logs_path)
+            if logs_data is not None:
+                logs = logs_data.get('logs', [])
+                self.replace_logs(logs)
+                counts['logs'] = len(logs)
+            
+            if os.path.exists(ledger_path) or os.path.exists(legacy_ledger_path):
+                from ledger_journal import LedgerJournal
+                entries = LedgerJournal(ledger_path, legacy_ledger_path).load()
+                self.add_ledger_entries(entries)
+                counts['ledger'] = len(entries)
+            
+            cash_data = load_document(cash_path)
+            if cash_data is not None:
+                transactions = cash_data.get('transactions', [])
+                self.add_cash_transactions(transactions)
+                self.set_cash_balance(cash_data.get('cash_balance', 0))
+                counts['cash_transactions'] = len(transactions)
+            
+            self.set_meta('migrated_at', time.time())
+        
+        return counts
@@ -0,0 +1,107 @@
+"""
+Startup profiling for MapleLegends ShopHelper
+Records module import times and widget construction times for --profile-startup
+"""
+
+import sys
+import time
+import builtins
+import threading
+from contextlib import contextmanager
+
+_enabled = False
+_original_import = None
+_import_depth = 0
+_import_records = []  # [name, depth, seconds] in the order imports started
+_sections = []  # (label, seconds) in completion order
+_start_time = None
+
+# Modules that should stay out of startup; reported as loaded or deferred
+HEAVY_MODULES = ['ocr_utils', 'paddleocr', 'cv2', 'matplotlib', 'requests', 'mss', 'numpy']
+
+
+def enable():
+    """Start recording imports and construction sections"""
+    global _enabled, _original_import, _start_time
+    if _enabled:
+        return
+    _enabled = True
+    _start_time = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def is_enabled():
+    """Whether startup profiling is active"""
+    return _enabled
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """builtins.__import__ replacement that times each module's first import"""
+    global _import_depth
+    # Only the main thread builds the window; worker threads import untimed
+    if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+        return _original_import(name, globals, locals, fromlist, level)
+    
+    record = [name, _import_depth, 0]
+    _import_records.append(record)
+    _import_depth += 1
+    start_time = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth -= 1
+        record[2] = time.perf_counter() - start_time
+
+
+@contextmanager
+def section(label):
+    """Time a block of startup work, such as building one widget
+    
+    Does nothing unless profiling is enabled.
+    
+    Args:
+        label: Name shown in the report
+    """
+    if not _enabled:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        _sections.append((label, time.perf_counter() - start_time))
+
+
+def report(max_depth=1, min_ms=1.0):
+    """Print the import and construction breakdown and stop recording imports
+    
+    Args:
+        max_depth: Deepest level of nested imports to list (0 lists only direct imports)
+        min_ms: Imports faster than this many milliseconds are left out
+    """
+    global _enabled
+    if not _enabled:
+        return
+    builtins.__import__ = _original_import
+    _enabled = False
+    total = time.perf_counter() - _start_time
+    
+    print(f"Startup profile: first paint after {total * 1000:.0f} ms")
+    print("Imports (inclusive time):")
+    import_total = 0
+    for name, depth, seconds in _import_records:
+        if depth == 0:
+            import_total += seconds
+        if depth <= max_depth and seconds * 1000 >= min_ms:
+            print(f"  {'  ' * depth}{name:<{32 - 2 * depth}} {seconds * 1000:9.1f} ms")
+    print(f"  {'total':<32} {import_total * 1000:9.1f} ms")
+    
+    print("Construction:")
+    for label, seconds in _sections:
+        print(f"  {label:<32} {seconds * 1000:9.1f} ms")
+    
+    print("Heavy modules:")
+    for name in HEAVY_MODULES:
+        state = "loaded" if name in sys.modules else "deferred"
+        print(f"  {name:<32} {state}")
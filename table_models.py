@@ -0,0 +1,549 @@
+"""
+Table models for MapleLegends ShopHelper
+Item, inventory, log and ledger tables backed by QAbstractTableModel
+"""
+
+import time
+from datetime import datetime
+
+from PyQt6.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel,
+    QRect, QSize, QEvent, pyqtSignal
+)
+from PyQt6.QtGui import QColor, QFont, QPainter
+from PyQt6.QtWidgets import QStyledItemDelegate
+
+DISPLAY = Qt.ItemDataRole.DisplayRole
+FOREGROUND = Qt.ItemDataRole.ForegroundRole
+BACKGROUND = Qt.ItemDataRole.BackgroundRole
+FONT = Qt.ItemDataRole.FontRole
+ALIGNMENT = Qt.ItemDataRole.TextAlignmentRole
+TOOLTIP = Qt.ItemDataRole.ToolTipRole
+SORT_ROLE = Qt.ItemDataRole.UserRole  # Raw value used for sorting and filtering
+
+ALIGN_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter
+
+# Shared colours, so formatting a cell does not allocate
+AMBER = QColor(255, 200, 0)
+LIGHT_BLUE = QColor(150, 200, 255)
+BRIGHT_GREEN = QColor(80, 200, 120)
+LIGHT_GREEN = QColor(150, 255, 150)
+BRIGHT_BLUE = QColor(100, 150, 255)
+GOLD = QColor(255, 215, 0)
+ORANGE = QColor(255, 165, 0)
+RED = QColor(255, 100, 100)
+PINK = QColor(255, 130, 130)
+QUANTITY_GOLD = QColor(255, 220, 100)
+GRAY = QColor(150, 150, 150)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Table model over a list of records
+    
+    Subclasses set `columns` and implement cell(). The view only asks for
+    the cells it paints, so formatting cost follows the viewport instead of
+    the number of records, and changing one record repaints one row.
+    """
+    
+    columns = []
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self.bold_font = QFont()
+        self.bold_font.setBold(True)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+    
+    def headerData(self, section, orientation, role=DISPLAY):
+        if role == DISPLAY and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section]
+        return None
+    
+    def data(self, index, role=DISPLAY):
+        if not index.isValid() or index.row() >= len(self.records):
+            return None
+        return self.cell(self.records[index.row()], index.column(), role)
+    
+    def cell(self, record, column, role):
+        """Get the data for one cell
+        
+        Args:
+            record: Record shown in the row
+            column: Column number
+            role: Qt item data role
+        """
+        return None
+    
+    def record(self, row):
+        """Get the record in a row, or None"""
+        if 0 <= row < len(self.records):
+            return self.records[row]
+        return None
+    
+    def set_records(self, records):
+        """Replace all records"""
+        self.beginResetModel()
+        self.records = list(records)
+        self.endResetModel()
+    
+    def insert_records(self, row, records):
+        """Insert records before a row"""
+        if not records:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(records) - 1)
+        self.records[row:row] = records
+        self.endInsertRows()
+    
+    def remove_records(self, row, count=1):
+        """Remove a run of rows"""
+        if count <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self.records[row:row + count]
+        self.endRemoveRows()
+    
+    def refresh_row(self, row, first_column=0, last_column=None):
+        """Tell views that (part of) a row changed"""
+        if last_column is None:
+            last_column = len(self.columns) - 1
+        self.dataChanged.emit(self.index(row, first_column), self.index(row, last_column))
+
+
+class KeyedTableModel(RecordTableModel):
+    """Record model with one row per key, so changes can be applied by name"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows_by_key = {}
+    
+    def key(self, record):
+        """Get the key of a record"""
+        return record['name']
+    
+    def row_of(self, key):
+        """Get the row of a key, or None"""
+        return self.rows_by_key.get(key)
+    
+    def _reindex(self):
+        self.rows_by_key = {self.key(record): row for row, record in enumerate(self.records)}
+    
+    def set_records(self, records):
+        super().set_records(records)
+        self._reindex()
+    
+    def insert_records(self, row, records):
+        super().insert_records(row, records)
+        self._reindex()
+    
+    def remove_records(self, row, count=1):
+        super().remove_records(row, count)
+        self._reindex()
+    
+    def upsert(self, records):
+        """Update the rows of existing keys and append the rest"""
+        for record in records:
+            row = self.rows_by_key.get(self.key(record))
+            if row is None:
+                self.insert_records(len(self.records), [record])
+            else:
+                self.records[row] = record
+                self.refresh_row(row)
+    
+    def remove_keys(self, keys):
+        """Remove the rows of the given keys"""
+        for key in keys:
+            row = self.rows_by_key.get(key)
+            if row is not None:
+                self.remove_records(row)
+
+
+class ItemTableModel(KeyedTableModel):
+    """Item database table; rows are item names looked up in the live items dictionary"""
+    
+    columns = ["Item Name", "Price", "Last Updated"]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = {}
+    
+    def key(self, record):
+        return record
+    
+    def set_items(self, items):
+        """Show every item of an items dictionary"""
+        self.items = items
+        self.set_records(list(items))
+    
+    def item_changed(self, change, item_names):
+        """Apply an item database change to the affected rows
+        
+        Args:
+            change: Change type reported by ItemDatabase listeners
+            item_names: Names of the changed items
+        """
+        if change == 'renamed':
+            self.remove_keys(item_names[:1])
+            item_names = item_names[1:]
+        
+        for name in item_names:
+            if name in self.items:
+                self.upsert([name])
+            else:
+                self.remove_keys([name])
+    
+    def cell(self, name, column, role):
+        data = self.items.get(name, {})
+        
+        if role == DISPLAY:
+            if column == 0:
+                return name
+            if column == 1:
+                # Handle both dictionary and direct integer formats
+                price = data.get('price', 0) if isinstance(data, dict) else data
+                return f"{price:,}"
+            if column == 2:
+                last_updated = data.get('last_updated', data.get('added_date', 0)) if isinstance(data, dict) else 0
+                if last_updated:
+                    return datetime.fromtimestamp(last_updated).strftime('%Y-%m-%d %H:%M')
+                return "Unknown"
+        elif role == ALIGNMENT and column == 1:
+            return ALIGN_RIGHT
+        return None
+
+
+class SearchFilterProxyModel(QSortFilterProxyModel):
+    """Shows the items of a fuzzy search, best match first, or every item"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ranks = None
+    
+    def set_ranking(self, names):
+        """Show only the given names in the given order (None to show everything)"""
+        self.ranks = None if names is None else {name: rank for rank, name in enumerate(names)}
+        self.invalidate()
+        self.sort(0 if self.ranks is not None else -1)
+    
+    def _name(self, source_row):
+        return self.sourceModel().record(source_row)
+    
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.ranks is None or self._name(source_row) in self.ranks
+    
+    def lessThan(self, left, right):
+        if self.ranks is None:
+            return left.row() < right.row()
+        return (self.ranks.get(self._name(left.row()), 0) <
+                self.ranks.get(self._name(right.row()), 0))
+
+
+class InventoryTableModel(KeyedTableModel):
+    """Inventory table over the records of ItemDatabase.get_inventory_data()"""
+    
+    columns = ["Item Name", "Price", "Stock", "Value", "Last Sold", "Actions"]
+    
+    def cell(self, item, column, role):
+        price = item.get('price', 0)
+        stock = item.get('stock', 0)
+        price_adjustment = item.get('price_adjustment', {})
+        recommended = price_adjustment.get('recommended', False)
+        
+        if role == DISPLAY:
+            if column == 0:
+                # Mark items where a price adjustment is recommended
+                return f"⚠ {item.get('name', '')}" if recommended else item.get('name', '')
+            if column == 1:
+                return format(price, ",")
+            if column == 2:
+                return str(stock)
+            if column == 3:
+                return format(price * stock, ",")
+            if column == 4:
+                return item.get('last_sold', '')
+        elif role == SORT_ROLE:
+            if column == 0:
+                return item.get('name', '').lower()
+            if column == 1:
+                return price
+            if column == 2:
+                return stock
+            if column == 3:
+                return price * stock
+            if column == 4:
+                return item.get('last_sold', '')
+        elif role == FOREGROUND:
+            if column == 0 and recommended:
+                return AMBER
+            if column == 1:
+                return AMBER if recommended else LIGHT_BLUE
+            if column == 2 and stock > 0:
+                return AMBER if recommended else BRIGHT_GREEN
+            if column == 3 and stock > 0:
+                return AMBER if recommended else LIGHT_GREEN
+        elif role == FONT:
+            if (column == 1 and recommended) or (column in (2, 3) and stock > 0):
+                return self.bold_font
+        elif role == ALIGNMENT:
+            if column in (1, 2, 3, 4):
+                return ALIGN_RIGHT
+        elif role == TOOLTIP and column == 0 and recommended:
+            suggested_price = price_adjustment.get('suggested_price', price)
+            days = int(price_adjustment.get('last_sale_days', 0))
+            return (f"Price reduction recommended: {price_adjustment.get('reason', '')}\n"
+                    f"Current price: {format(price, ',')}\n"
+                    f"Suggested price: {format(suggested_price, ',')}\n"
+                    f"Days since last sale: {days}")
+        return None
+
+
+class LogTableModel(RecordTableModel):
+    """Recently logged captures, newest first"""
+    
+    columns = ["OCR Text", "Matched Item", "Price", "Stock", "Confidence", "Time"]
+    
+    STOCK_COLUMN = 3
+    
+    def __init__(self, parent=None, limit=100):
+        super().__init__(parent)
+        self.limit = limit
+        # Better contrast: green with black text for stock, gray otherwise
+        self.in_stock_colors = (QColor(150, 215, 150), QColor(0, 0, 0))
+        self.no_stock_colors = (QColor(240, 240, 240), QColor(80, 80, 80))
+        self.confidence_colors = [
+            (90, QColor(150, 220, 150), QColor(0, 80, 0)),  # High confidence
+            (75, QColor(240, 230, 140), QColor(100, 80, 0)),  # Medium confidence
+            (None, QColor(255, 160, 160), QColor(140, 0, 0))  # Low confidence
+        ]
+    
+    def add_entries(self, entries):
+        """Insert log entries newer than the newest row and drop rows past the limit
+        
+        Args:
+            entries: Recent log entries, newest first
+        """
+        newest = self.records[0].get('timestamp', 0) if self.records else 0
+        new_entries = [entry for entry in entries if entry.get('timestamp', 0) > newest]
+        self.insert_records(0, new_entries)
+        if len(self.records) > self.limit:
+            self.remove_records(self.limit, len(self.records) - self.limit)
+    
+    def update_stock(self, item_name, stock):
+        """Update the stock shown for every row matched to an item"""
+        for row, entry in enumerate(self.records):
+            if entry.get('matched_item') == item_name and entry.get('stock', 0) != stock:
+                entry['stock'] = stock
+                self.refresh_row(row, self.STOCK_COLUMN, self.STOCK_COLUMN)
+    
+    def _confidence_colors(self, match_score):
+        for threshold, background, foreground in self.confidence_colors:
+            if threshold is None or match_score > threshold:
+                return background, foreground
+    
+    def cell(self, entry, column, role):
+        stock = entry.get('stock', 0)
+        match_score = entry.get('match_score')
+        
+        if role == DISPLAY:
+            if column == 0:
+                return entry.get('ocr_text', '')
+            if column == 1:
+                return entry.get('matched_item') or "Not found"
+            if column == 2:
+                price = entry.get('price')
+                if price is None:
+                    return ""
+                return f"{price:,}" if isinstance(price, (int, float)) else str(price)
+            if column == 3:
+                return str(stock) if stock > 0 else "0"
+            if column == 4:
+                return f"{match_score:.1f}%" if match_score is not None else ""
+            if column == 5:
+                timestamp = entry.get('timestamp')
+                return time.strftime("%H:%M:%S", time.localtime(timestamp)) if timestamp else None
+        elif role == FOREGROUND:
+            if column == 1 and not entry.get('matched_item'):
+                return GRAY
+            if column == 3:
+                return (self.in_stock_colors if stock > 0 else self.no_stock_colors)[1]
+            if column == 4 and match_score is not None:
+                return self._confidence_colors(match_score)[1]
+        elif role == BACKGROUND:
+            if column == 3:
+                return (self.in_stock_colors if stock > 0 else self.no_stock_colors)[0]
+            if column == 4 and match_score is not None:
+                return self._confidence_colors(match_score)[0]
+        elif role == FONT:
+            if column == 3 and stock > 0:
+                return self.bold_font
+        elif role == ALIGNMENT:
+            if column == 3:
+                return ALIGN_CENTER
+        return None
+
+
+class LedgerTableModel(RecordTableModel):
+    """Ledger entries and cash transactions, newest first"""
+    
+    columns = ["Date & Time", "Item", "Type", "Old Stock", "New Stock",
+               "Quantity", "Default Price", "Selling Price", "Value"]
+    
+    TYPE_COLORS = {
+        'sale': BRIGHT_GREEN,
+        'purchase': BRIGHT_BLUE,
+        'adjustment': GOLD,
+        'cash': ORANGE
+    }
+    
+    def cell(self, entry, column, role):
+        tx_type = entry.get('transaction_type', '')
+        
+        if role == DISPLAY:
+            if column == 0:
+                return datetime.fromtimestamp(entry.get('timestamp', 0)).strftime("%Y-%m-%d %H:%M:%S")
+            if column == 1:
+                return entry.get('item_name', '')
+            if column == 2:
+                return tx_type.capitalize()
+            if column == 3:
+                return str(entry.get('old_stock', 0))
+            if column == 4:
+                return str(entry.get('new_stock', 0))
+            if column == 5:
+                return str(entry.get('quantity', 0))
+            if column == 6:
+                return format(entry.get('price', 0), ",")
+            if column == 7:
+                selling_price = entry.get('selling_price')
+                # No selling price unless this is a sale
+                return format(selling_price, ",") if selling_price is not None else "-"
+            if column == 8:
+                return format(entry.get('value', 0), ",")
+        elif role == SORT_ROLE:
+            if column == 0:
+                return entry.get('timestamp', 0)
+            if column == 6:
+                return entry.get('price', 0)
+            if column == 7:
+                return entry.get('selling_price') or 0
+            if column == 8:
+                return entry.get('value', 0)
+        elif role == FOREGROUND:
+            if column in (2, 8):
+                return self.TYPE_COLORS.get(tx_type)
+            if column == 4:
+                old_stock = entry.get('old_stock', 0)
+                new_stock = entry.get('new_stock', 0)
+                if new_stock > old_stock:
+                    return BRIGHT_BLUE  # Stock increased
+                if new_stock < old_stock:
+                    return RED  # Stock decreased
+            if column == 5:
+                return QUANTITY_GOLD
+            if column == 6:
+                return LIGHT_BLUE
+            if column == 7 and self._selling_price_differs(entry):
+                return PINK
+        elif role == FONT:
+            if column in (1, 5, 8):
+                return self.bold_font
+            if column == 2 and tx_type in ('sale', 'purchase'):
+                return self.bold_font
+            if column == 7 and self._selling_price_differs(entry):
+                return self.bold_font
+        elif role == ALIGNMENT:
+            if 3 <= column <= 8:
+                return ALIGN_RIGHT
+        return None
+    
+    def _selling_price_differs(self, entry):
+        selling_price = entry.get('selling_price')
+        return selling_price is not None and selling_price != entry.get('price', 0)
+
+
+class LedgerFilterProxyModel(QSortFilterProxyModel):
+    """Filters ledger rows by transaction type and date range"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.transaction_type = None
+        self.start_time = 0
+        self.end_time = float('inf')
+    
+    def set_filter(self, transaction_type, start_time, end_time):
+        """Set the filter
+        
+        Args:
+            transaction_type: Transaction type to show (None for all)
+            start_time: Earliest timestamp shown
+            end_time: Latest timestamp shown
+        """
+        self.transaction_type = transaction_type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.invalidateFilter()
+    
+    def accepts(self, entry):
+        """Whether an entry passes the filter"""
+        if self.transaction_type is not None and entry.get('transaction_type') != self.transaction_type:
+            return False
+        return self.start_time <= entry.get('timestamp', 0) <= self.end_time
+    
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.accepts(self.sourceModel().records[source_row])
+    
+    def entries(self):
+        """Get the entries that pass the filter, in display order"""
+        return [entry for entry in self.sourceModel().records if self.accepts(entry)]
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a push button in every cell of a column and reports clicks
+    
+    Drawing the button is far cheaper than a QPushButton widget per row,
+    which a long table would otherwise create up front.
+    """
+    
+    clicked = pyqtSignal(QModelIndex)
+    
+    def __init__(self, text, color, parent=None, size=QSize(60, 25)):
+        super().__init__(parent)
+        self.text = text
+        self.color = QColor(color)
+        self.size = size
+        self.font = QFont()
+        self.font.setBold(True)
+    
+    def _button_rect(self, option):
+        rect = QRect(0, 0, self.size.width(), self.size.height())
+        rect.moveCenter(option.rect.center())
+        return rect
+    
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        rect = self._button_rect(option)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.color)
+        painter.drawRoundedRect(rect, 3, 3)
+        painter.setPen(QColor(255, 255, 255))
+        painter.setFont(self.font)
+        painter.drawText(rect, ALIGN_CENTER, self.text)
+        painter.restore()
+    
+    def sizeHint(self, option, index):
+        return QSize(self.size.width() + 10, self.size.height() + 4)
+    
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease and
+                event.button() == Qt.MouseButton.LeftButton and
+                self._button_rect(option).contains(event.position().toPoint())):
+            self.clicked.emit(index)
+            return True
+        return False
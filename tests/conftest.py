@@ -0,0 +1,9 @@
+"""
+Test setup for MapleLegends ShopHelper
+The application modules live in the repository root
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,115 @@
+"""
+Tests for HotkeyManager, driven by the in-process SyntheticBackend
+"""
+
+import pytest
+import hotkeys
+from hotkeys import (CAPTURE, CAPTURE_AND_SELL, REPEAT_LAST, HotkeyManager,
+                     SyntheticBackend)
+
+
+class FailingBackend(SyntheticBackend):
+    """Synthetic backend that rejects one key combination"""
+    
+    def __init__(self, rejected):
+        super().__init__()
+        self.rejected = rejected
+    
+    def add_hotkey(self, combo, callback):
+        if combo == self.rejected:
+            raise ValueError(f"bad combination: {combo}")
+        return super().add_hotkey(combo, callback)
+
+
+@pytest.fixture
+def presses():
+    return []
+
+
+@pytest.fixture
+def backend():
+    return SyntheticBackend()
+
+
+@pytest.fixture
+def manager(backend, presses):
+    manager = HotkeyManager(lambda action, pressed_at: presses.append((action, pressed_at)),
+                            backend=backend, debounce=0.3)
+    manager.start()
+    yield manager
+    manager.stop()
+
+
+def test_default_bindings(manager, backend, presses):
+    assert backend.press('f7') == 1
+    assert backend.press('shift+f7') == 1
+    assert backend.press('f8') == 1
+    assert backend.press('f9') == 0
+    assert [action for action, _ in presses] == [CAPTURE, CAPTURE_AND_SELL, REPEAT_LAST]
+
+
+def test_press_reports_timestamp(manager, backend, presses, monkeypatch):
+    monkeypatch.setattr(hotkeys.time, 'perf_counter', lambda: 12.5)
+    backend.press('F7')
+    assert presses == [(CAPTURE, 12.5)]
+
+
+def test_repeats_inside_debounce_are_ignored(manager, backend, presses, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(hotkeys.time, 'perf_counter', lambda: now[0])
+    
+    backend.press('f7')
+    now[0] = 100.25
+    backend.press('f7')  # Auto-repeat while the key is held
+    backend.press('f8')  # Other actions are debounced separately
+    now[0] = 100.5
+    backend.press('f7')
+    
+    assert presses == [(CAPTURE, 100.0), (REPEAT_LAST, 100.25), (CAPTURE, 100.5)]
+
+
+def test_set_binding_moves_the_hotkey(manager, backend, presses):
+    manager.set_binding(CAPTURE, 'ctrl+f7')
+    
+    assert backend.press('f7') == 0
+    assert backend.press('ctrl+f7') == 1
+    assert presses[0][0] == CAPTURE
+    assert len(backend.hotkeys) == 3
+
+
+def test_set_binding_rejects_unknown_action(manager):
+    with pytest.raises(ValueError):
+        manager.set_binding('unknown', 'f9')
+
+
+def test_invalid_binding_restores_previous(presses):
+    backend = FailingBackend('bad+key')
+    manager = HotkeyManager(lambda action, pressed_at: presses.append(action), backend=backend)
+    manager.start()
+    
+    with pytest.raises(ValueError):
+        manager.set_binding(CAPTURE, 'bad+key')
+    
+    assert manager.bindings[CAPTURE] == 'f7'
+    assert backend.press('f7') == 1
+    assert presses == [CAPTURE]
+
+
+def test_stop_unregisters_everything(manager, backend, presses):
+    manager.stop()
+    assert backend.hotkeys == {}
+    assert backend.press('f7') == 0
+    assert presses == []
+
+
+def test_latency_stats(manager):
+    assert manager.get_latency_stats() == {'count': 0, 'mean': 0, 'p95': 0, 'max': 0}
+    
+    for milliseconds in range(1, 101):
+        manager.record_latency(milliseconds / 1000)
+    
+    stats = manager.get_latency_stats()
+    assert stats['count'] == 100
+    assert stats['mean'] == pytest.approx(0.0505)
+    assert stats['p95'] == pytest.approx(0.096)
+    assert stats['max'] == pytest.approx(0.1)
@@ -0,0 +1,85 @@
+"""
+Tests for the append-only ledger journal
+"""
+
+import os
+import pytest
+import persistence
+from ledger_journal import LedgerJournal
+
+
+def sale(number):
+    return {'timestamp': 1700000000.0 + number, 'item_name': f"Item {number}",
+            'transaction_type': 'sale', 'quantity': 1, 'price': 100}
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "ledger.jsonl")
+
+
+def test_replay(journal_path):
+    journal = LedgerJournal(path=journal_path, legacy_path=None)
+    for number in range(3):
+        journal.append(sale(number))
+    journal.record_delete(sale(1)['timestamp'], sale(1)['item_name'])
+    
+    reloaded = LedgerJournal(path=journal_path, legacy_path=None)
+    assert reloaded.load() == [sale(0), sale(2)]
+    assert reloaded.record_count == 4
+    assert not reloaded.torn_tail
+
+
+def test_torn_final_line(journal_path):
+    journal = LedgerJournal(path=journal_path, legacy_path=None)
+    journal.append(sale(0))
+    journal.append(sale(1))
+    
+    # An append interrupted part way through its line
+    with open(journal_path, 'rb') as f:
+        contents = f.read()
+    with open(journal_path, 'wb') as f:
+        f.write(contents[:-15])
+    
+    reloaded = LedgerJournal(path=journal_path, legacy_path=None)
+    assert reloaded.load() == [sale(0)]
+    assert reloaded.torn_tail
+    
+    # The next record starts on its own line instead of joining the torn one
+    reloaded.append(sale(2))
+    assert not reloaded.torn_tail
+    assert LedgerJournal(path=journal_path, legacy_path=None).load() == [sale(0), sale(2)]
+
+
+def test_compaction_drops_deleted_records(journal_path):
+    journal = LedgerJournal(path=journal_path, legacy_path=None, compact_min_records=10)
+    for number in range(8):
+        journal.append(sale(number))
+    for number in range(1, 8):
+        journal.record_delete(sale(number)['timestamp'], sale(number)['item_name'])
+    
+    reloaded = LedgerJournal(path=journal_path, legacy_path=None, compact_min_records=10)
+    assert reloaded.load() == [sale(0)]
+    assert reloaded.record_count == 1
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+
+def test_interrupted_compaction_restores_backup(journal_path, monkeypatch):
+    journal = LedgerJournal(path=journal_path, legacy_path=None)
+    journal.append(sale(0))
+    journal.append(sale(1))
+    
+    # Crash between moving the old journal to the backup and renaming the new one in
+    def crash(stage, path):
+        if stage == 'replace':
+            raise RuntimeError("simulated crash")
+    monkeypatch.setattr(persistence, 'fault_hook', crash)
+    with pytest.raises(RuntimeError):
+        journal.compact([sale(1)])
+    monkeypatch.setattr(persistence, 'fault_hook', None)
+    assert not os.path.exists(journal_path)
+    
+    reloaded = LedgerJournal(path=journal_path, legacy_path=None)
+    assert reloaded.load() == [sale(0), sale(1)]
+    assert os.path.exists(journal_path)
@@ -0,0 +1,244 @@
+"""
+Tests for the crash-safe data file writes and the write-behind PersistenceManager
+"""
+
+import os
+import time
+import pytest
+import persistence
+from persistence import (CorruptFileError, PersistenceManager, backup_path, load_document,
+                         save_document, temp_path)
+
+STAGES = ['partial_write', 'fsync', 'rotate', 'replace']
+
+
+class SimulatedCrash(Exception):
+    """Raised by the fault hook in place of a crash"""
+
+
+def crash_at(stage):
+    """Fault hook that interrupts atomic_write at one stage
+    
+    'partial_write' leaves only half of the data in the temporary file
+    before crashing, as if the system went down part way through writing.
+    """
+    def hook(current_stage, path):
+        if stage == 'partial_write' and current_stage == 'fsync':
+            temp = temp_path(path)
+            os.truncate(temp, os.path.getsize(temp) // 2)
+            raise SimulatedCrash(stage)
+        if current_stage == stage:
+            raise SimulatedCrash(stage)
+    return hook
+
+
+def read_document(path):
+    """Decode one file on disk, without falling back to backups"""
+    with open(path, 'rb') as f:
+        return persistence.decode_document(f.read())
+
+
+def document(version):
+    return {'items': {'Blue Potion': {'price': 50 + version, 'stock': version}}, 'version': version}
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    return str(tmp_path / "items_database.json")
+
+
+@pytest.mark.parametrize('stage', STAGES)
+def test_crash_keeps_previous_version(data_path, monkeypatch, stage):
+    save_document(data_path, document(1))
+    save_document(data_path, document(2))
+    
+    monkeypatch.setattr(persistence, 'fault_hook', crash_at(stage))
+    with pytest.raises(SimulatedCrash):
+        save_document(data_path, document(3))
+    monkeypatch.setattr(persistence, 'fault_hook', None)
+    
+    if stage == 'replace':
+        # The old file was rotated away before the new one took its place
+        assert not os.path.exists(data_path)
+        assert read_document(backup_path(data_path, 1)) == document(2)
+    else:
+        assert read_document(data_path) == document(2)
+        assert read_document(backup_path(data_path, 1)) == document(1)
+    assert load_document(data_path) == document(2)
+
+
+@pytest.mark.parametrize('stage', STAGES)
+def test_save_after_crash(data_path, monkeypatch, stage):
+    save_document(data_path, document(1))
+    
+    monkeypatch.setattr(persistence, 'fault_hook', crash_at(stage))
+    with pytest.raises(SimulatedCrash):
+        save_document(data_path, document(2))
+    monkeypatch.setattr(persistence, 'fault_hook', None)
+    
+    save_document(data_path, document(3))
+    assert read_document(data_path) == document(3)
+    assert load_document(data_path) == document(3)
+
+
+@pytest.mark.parametrize('stage', ['partial_write', 'fsync', 'replace'])
+def test_crash_on_first_save(data_path, monkeypatch, stage):
+    monkeypatch.setattr(persistence, 'fault_hook', crash_at(stage))
+    with pytest.raises(SimulatedCrash):
+        save_document(data_path, document(1))
+    monkeypatch.setattr(persistence, 'fault_hook', None)
+    
+    assert not os.path.exists(data_path)
+    assert load_document(data_path) is None
+
+
+def test_corrupt_file_falls_back_to_backup(data_path):
+    save_document(data_path, document(1))
+    save_document(data_path, document(2))
+    with open(data_path, 'r+b') as f:
+        f.seek(20)
+        f.write(b'X')
+    
+    with pytest.raises(CorruptFileError):
+        read_document(data_path)
+    assert load_document(data_path) == document(1)
+
+
+def test_all_copies_corrupt(data_path):
+    save_document(data_path, document(1))
+    for path in (data_path, backup_path(data_path, 1)):
+        if os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(b'{"items": {')
+    
+    with pytest.raises(CorruptFileError):
+        load_document(data_path)
+    assert os.path.exists(f"{data_path}.corrupt")
+
+
+def test_backups_rotate(data_path):
+    for version in range(1, 6):
+        save_document(data_path, document(version), backups=3)
+    
+    assert read_document(data_path) == document(5)
+    assert [read_document(backup_path(data_path, number))['version']
+            for number in range(1, 4)] == [4, 3, 2]
+    assert not os.path.exists(backup_path(data_path, 4))
+
+
+class Store:
+    """Data changed by the tests and snapshotted by the manager"""
+    
+    def __init__(self):
+        self.version = 0
+    
+    def change(self):
+        self.version += 1
+    
+    def snapshot(self):
+        return document(self.version)
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def manager():
+    manager = PersistenceManager(delay=60, max_changes=1000)
+    yield manager
+    manager.close()
+
+
+def test_changes_coalesce_into_one_write(manager, data_path):
+    store = Store()
+    manager.register('items', data_path, store.snapshot)
+    
+    for _ in range(200):
+        store.change()
+        manager.mark_dirty('items')
+    
+    assert manager.get_stats()['pending'] == 200
+    assert not os.path.exists(data_path)
+    
+    assert manager.flush() == 1
+    stats = manager.get_stats()
+    assert stats['changes'] == 200
+    assert stats['writes'] == 1
+    assert stats['pending'] == 0
+    assert stats['stores']['items']['writes'] == 1
+    assert read_document(data_path) == document(200)
+    
+    # Nothing is dirty, so nothing is written again
+    assert manager.flush() == 0
+    assert manager.get_stats()['writes'] == 1
+
+
+def test_flush_writes_only_dirty_stores(manager, tmp_path):
+    items, logs = Store(), Store()
+    manager.register('items', str(tmp_path / "items.json"), items.snapshot)
+    manager.register('logs', str(tmp_path / "logs.json"), logs.snapshot)
+    
+    logs.change()
+    manager.mark_dirty('logs')
+    
+    assert manager.flush() == 1
+    assert not os.path.exists(tmp_path / "items.json")
+    assert read_document(str(tmp_path / "logs.json")) == document(1)
+
+
+def test_close_writes_pending_changes(data_path):
+    manager = PersistenceManager(delay=60, max_changes=1000)
+    store = Store()
+    manager.register('items', data_path, store.snapshot)
+    for _ in range(5):
+        store.change()
+        manager.mark_dirty('items')
+    
+    manager.close()
+    assert manager.get_stats()['writes'] == 1
+    assert read_document(data_path) == document(5)
+    
+    # After close, a change is written straight away
+    store.change()
+    manager.mark_dirty('items')
+    assert manager.get_stats()['writes'] == 2
+    assert read_document(data_path) == document(6)
+
+
+def test_background_write_after_quiet_period(data_path):
+    manager = PersistenceManager(delay=0.05, max_changes=1000)
+    store = Store()
+    manager.register('items', data_path, store.snapshot)
+    try:
+        for _ in range(10):
+            store.change()
+            manager.mark_dirty('items')
+        
+        assert wait_for(lambda: manager.get_stats()['writes'] == 1)
+        assert read_document(data_path) == document(10)
+        assert manager.get_stats()['pending'] == 0
+    finally:
+        manager.close()
+    assert manager.get_stats()['writes'] == 1
+
+
+def test_max_changes_writes_without_waiting(data_path):
+    manager = PersistenceManager(delay=60, max_changes=10)
+    store = Store()
+    manager.register('items', data_path, store.snapshot)
+    try:
+        for _ in range(10):
+            store.change()
+            manager.mark_dirty('items')
+        
+        assert wait_for(lambda: manager.get_stats()['writes'] == 1)
+        assert read_document(data_path) == document(10)
+    finally:
+        manager.close()